@@ -1,9 +1,33 @@
 import re
-from mutagen import File
-from mutagen.mp3 import EasyMP3
-from mutagen.id3 import ID3, ID3NoHeaderError
-from mutagen.mp3 import MP3
-
+from functools import cache
+
+
+# Extensions with a known container open the matching class directly instead of
+# letting mutagen score every registered format. WAVE and AIFF have no Easy
+# variant; mutagen.File(easy=True) returns the same classes for them. Native
+# classes expose raw ID3 frames, Vorbis comments and MP4 atoms for the
+# table-driven mapping in tag_service. mutagen is imported on first use so that
+# starting the app does not pay for it.
+@cache
+def audio_classes(easy: bool) -> dict[str, type]:
+    from mutagen.aiff import AIFF
+    from mutagen.easymp4 import EasyMP4
+    from mutagen.flac import FLAC
+    from mutagen.mp4 import MP4
+    from mutagen.oggopus import OggOpus
+    from mutagen.oggvorbis import OggVorbis
+    from mutagen.wave import WAVE
+
+    mp4_class = EasyMP4 if easy else MP4
+    return {
+        "flac": FLAC,
+        "m4a": mp4_class,
+        "mp4": mp4_class,
+        "ogg": OggVorbis,
+        "opus": OggOpus,
+        "wav": WAVE,
+        "aiff": AIFF,
+    }
 
 
 def first_contributing_artist(audio) -> str | None:
@@ -57,6 +81,8 @@ def set_tag(audio, key: str, value: str):
     audio[key] = [value]
 
 def ensure_id3_header(path: str):
+    from mutagen.id3 import ID3, ID3NoHeaderError
+
     try:
         try:
             ID3(path)
@@ -69,17 +95,21 @@ def ensure_id3_header(path: str):
         return False, f"ensure_id3_header failed: {type(e).__name__}: {e}"
 
 
-def load_audio(path: str):
+def load_audio(path: str, easy: bool = True):
     ext = path.lower().rsplit(".", 1)[-1] if "." in path else ""
 
     if ext == "mp3":
+        from mutagen.mp3 import MP3, EasyMP3
+
         ok, id3_err = ensure_id3_header(path)
 
         # First: verify it is an MP3 audio stream (even if it has no tags)
         try:
-            MP3(path)  # parses frames, proves MP3 structure
+            mp3 = MP3(path)  # parses frames, proves MP3 structure
         except Exception as e:
             return None, f"MP3 parse failed: {type(e).__name__}: {e}"
+        if not easy:
+            return mp3, id3_err
 
         # Then: open easy tags interface
         try:
@@ -87,11 +117,20 @@ def load_audio(path: str):
         except Exception as e:
             return None, f"EasyMP3 open failed: {type(e).__name__}: {e} | {id3_err or ''}".strip()
 
-    # non-mp3: sniff with mutagen
+    audio_class = audio_classes(easy).get(ext)
+    if audio_class is not None:
+        try:
+            return audio_class(path), None
+        except Exception:
+            pass  # wrong extension or damaged header: fall back to sniffing
+
+    # unknown or misnamed: sniff with mutagen
+    from mutagen import File
+
     try:
-        a = File(path, easy=True)
+        a = File(path, easy=easy)
         if a:
             return a, None
-        return None, "Mutagen File(easy=True) returned None (unknown/unsupported file)"
+        return None, f"Mutagen File(easy={easy}) returned None (unknown/unsupported file)"
     except Exception as e:
-        return None, f"Mutagen File(easy=True) exception: {type(e).__name__}: {e}"
+        return None, f"Mutagen File(easy={easy}) exception: {type(e).__name__}: {e}"
@@ -0,0 +1 @@
+"""Standalone timing scripts. Run them from the repository root with python -m."""
@@ -0,0 +1,75 @@
+"""Time the batch command line against the GUI's scan and apply path.
+
+Usage: python -m benchmarks.batch_cli [--copies N] [--workers N]
+"""
+import argparse
+import io
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cli
+from services.apply_service import apply_changes
+from services.scanner import ScanOptions, scan_folder
+
+FIXTURES = Path(__file__).resolve().parents[1] / "TestAlbum"
+REMOVE_RULES = ["SpotiDownloader.com - ", "- Copy"]
+
+
+def make_folder(root: Path, copies: int) -> Path:
+    folder = root / "drop"
+    folder.mkdir()
+    sources = [path for path in FIXTURES.iterdir() if path.suffix in {".mp3", ".flac"}]
+    for copy in range(copies):
+        for source in sources:
+            shutil.copyfile(source, folder / f"{copy:04d} SpotiDownloader.com - {source.name}")
+    return folder
+
+
+def timed(label: str, action) -> None:
+    started = time.perf_counter()
+    action()
+    print(f"{label:>24}: {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+
+def gui_path(folder: Path) -> None:
+    items = scan_folder(folder, ScanOptions(remove_rules=REMOVE_RULES))
+    for item in items:
+        item.set_pending_tag("album", "Benchmark")
+    apply_changes(folder, items)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        settings = root / "settings.json"
+        # Every copied name contains " - ", so --extract-tag sets a value on every file.
+        preset = {"remove_rules": REMOVE_RULES, "tag_extract_before": " - "}
+        settings.write_text(json.dumps({"rule_presets": {"Default": preset}}), encoding="utf-8")
+        folder = make_folder(root, args.copies)
+        print(f"{len(list(folder.iterdir()))} files")
+        timed("GUI scan + apply", lambda: gui_path(folder))
+
+        shutil.rmtree(folder)
+        folder = make_folder(root, args.copies)
+        command = [str(folder), "--settings", str(settings), "--extract-tag", "album", "--workers"]
+        for workers in (1, args.workers):
+            timed(
+                f"cli dry run, {workers} worker(s)",
+                lambda: cli.main(command + [str(workers), "--dry-run"], out=io.StringIO()),
+            )
+        timed(
+            f"cli apply, {args.workers} worker(s)",
+            lambda: cli.main(command + [str(args.workers)], out=io.StringIO()),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Time a duplicate search over generated MP3s, and how many bytes it reads compared with hashing every file.
+
+Usage: python -m benchmarks.duplicates [--files N] [--size KIB] [--copies N] [--workers N]
+"""
+import argparse
+import hashlib
+import random
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from services import duplicate_service
+from services.duplicate_service import find_duplicates
+
+
+def id3_tag(title: str) -> bytes:
+    frame = b"\x03" + title.encode("latin-1")
+    body = b"TIT2" + len(frame).to_bytes(4, "big") + b"\x00\x00" + frame
+    size = len(body)
+    syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b"ID3\x03\x00\x00" + syncsafe + body
+
+
+def make_library(folder: Path, files: int, size: int, copies: int) -> list[Path]:
+    """files MP3s; every tenth has copies retagged copies, and some share an audio length."""
+    generator = random.Random(1)
+    paths = []
+    for index in range(files):
+        # Half the files share one length, so the size prefilter alone cannot rule them out.
+        length = size if index % 2 else size + generator.randrange(1, 4096)
+        audio = generator.randbytes(length)
+        for copy in range(1 + (copies if index % 10 == 0 else 0)):
+            path = folder / f"{index:05}-{copy}.mp3"
+            path.write_bytes(id3_tag(f"Track {index} take {copy}") + audio)
+            paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--size", type=int, default=2048, help="audio size of each file in KiB")
+    parser.add_argument("--copies", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = make_library(Path(temp_dir), args.files, args.size * 1024, args.copies)
+        total = sum(path.stat().st_size for path in paths)
+
+        started = time.perf_counter()
+        for path in paths:
+            hashlib.blake2b(path.read_bytes(), digest_size=20)
+        naive = time.perf_counter() - started
+
+        read_bytes = 0
+        real_open = Path.open
+
+        def counting_open(path, *open_args, **open_kwargs):
+            file = real_open(path, *open_args, **open_kwargs)
+            real_read = file.read
+
+            def read(*read_args):
+                nonlocal read_bytes
+                data = real_read(*read_args)
+                read_bytes += len(data)
+                return data
+
+            file.read = read
+            return file
+
+        started = time.perf_counter()
+        groups = find_duplicates(paths, workers=args.workers)
+        elapsed = time.perf_counter() - started
+        with mock.patch.object(duplicate_service.Path, "open", counting_open):
+            find_duplicates(paths, workers=args.workers)
+
+    megabytes = 1024 * 1024
+    print(f"{len(paths)} files, {total / megabytes:.0f} MB, {len(groups)} duplicate groups")
+    print(f"hash every file: {naive * 1000:7.0f} ms, reads {total / megabytes:7.1f} MB")
+    print(f"find_duplicates: {elapsed * 1000:7.0f} ms, reads {read_bytes / megabytes:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Time filling the library index and searching it, without reading audio files.
+
+Usage: python -m benchmarks.library_index [--items N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.validation_index import make_items
+from services.library_service import LibraryIndex
+from services.scanner import TrackDetails
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    for number, item in enumerate(items):
+        item.path = Path("Library") / f"Artist {number % 2000}" / item.filename
+        item.tags["artist"] = f"Artist {number % 2000}"
+        if number % 3:
+            item.tags["date"] = ""
+    details = TrackDetails(mtime_ns=0, size=0, duration=200.0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "library.sqlite3"
+        started = time.perf_counter()
+        with LibraryIndex(path) as library:
+            for item in items:
+                library.store(item, details)
+        print(f"{'store':>24}: {(time.perf_counter() - started) * 1000:8.1f} ms for {args.items} tracks")
+
+        with LibraryIndex(path) as library:
+            searches = {
+                "words": lambda: library.search("song 4242"),
+                "artist, missing year": lambda: library.search(filters={"artist": "artist 42"}, missing=["date"]),
+                "album": lambda: library.search(filters={"album": "album"}, limit=100),
+                "missing year": lambda: library.search(missing=["date"], limit=100),
+            }
+            for name, search in searches.items():
+                best = None
+                for _round in range(5):
+                    started = time.perf_counter()
+                    found = search()
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                print(f"{name:>24}: {best * 1000:8.2f} ms, {len(found)} found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Time the Session bulk edits over a large scan, without the window.
+
+Usage: python -m benchmarks.session_edits [--items N] [--rounds N]
+"""
+import argparse
+import time
+
+from benchmarks.validation_index import make_items
+from models import ArtworkData
+from services.session import Session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    for item in items:
+        item.proposed_filename = f"[{item.tags.pop('tracknumber')}] Artist - {item.tags['title']}.mp3"
+    session = Session(items)
+    session.items.subscribe(lambda _item, _field, _old, _new: None)
+    artwork = ArtworkData(b"jpg", "image/jpeg")
+
+    def set_album():
+        return session.set_tag("album", "Other Album")
+
+    # name: (edit, edit run first so there is something to undo)
+    edits = {
+        "set_tag": (set_album, None),
+        "erase_tag": (lambda: session.erase_tag("album"), None),
+        "reset_tag": (lambda: session.reset_tag("album"), set_album),
+        "titles_from_filenames": (session.titles_from_filenames, None),
+        "extract_tag_from_filenames": (lambda: session.extract_tag_from_filenames("artist", "] ", " - "), None),
+        "number_tracks": (lambda: session.number_tracks(reversed(session.items)), None),
+        "track_numbers_from_filenames": (lambda: session.track_numbers_from_filenames("[]"), None),
+        "set_artwork": (lambda: session.set_artwork(artwork), None),
+        "clear_changes": (session.clear_changes, set_album),
+    }
+    for name, (edit, prepare) in edits.items():
+        best = None
+        for _round in range(args.rounds):
+            session.clear_changes()
+            if prepare is not None:
+                prepare()
+            started = time.perf_counter()
+            summary = edit()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:>28}: {best * 1000:7.2f} ms, {summary.changed} of {args.items} changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Time exporting a large scan to CSV/JSONL and importing it back, with peak memory.
+
+Usage: python -m benchmarks.tag_export [--items N]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.validation_index import make_items
+from services.export_service import export_tracks
+from services.session import Session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    args = parser.parse_args()
+
+    session = Session(make_items(args.items))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for suffix in (".csv", ".jsonl"):
+            path = Path(temp_dir) / f"tags{suffix}"
+            started = time.perf_counter()
+            export_tracks(session.items, path)
+            exported = time.perf_counter() - started
+            # Every row sets a new album, as a whole-library edit would.
+            text = path.read_text(encoding="utf-8-sig").replace("Album", "Edited")
+            path.write_text(text, encoding="utf-8")
+            del text
+
+            session.clear_changes()
+            started = time.perf_counter()
+            summary = session.import_tags(path)
+            imported = time.perf_counter() - started
+            # Importing again changes nothing, so the peak is the import's own working memory.
+            tracemalloc.start()
+            session.import_tags(path)
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size = path.stat().st_size / (1024 * 1024)
+            print(
+                f"{suffix:>6}: {size:5.1f} MB, export {exported * 1000:6.0f} ms, "
+                f"import {imported * 1000:6.0f} ms, {summary.changed} changed, "
+                f"import peak {peak / (1024 * 1024):5.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Compare per-file tag reading through mutagen's Easy layer and the native mapping.
+
+Usage: python -m benchmarks.tag_mapping [folder] [--rounds N]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from audio_utils import load_audio
+from services.scanner import AUDIO_EXTS
+from tag_service import read_supported_tags
+
+
+def time_reads(paths: list[Path], easy: bool, rounds: int) -> float:
+    started = time.process_time()
+    for _round in range(rounds):
+        for path in paths:
+            audio, _error = load_audio(str(path), easy=easy)
+            if audio is not None:
+                read_supported_tags(audio)
+    return time.process_time() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", nargs="?", default="TestAlbum", type=Path)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    paths = sorted(path for path in args.folder.iterdir() if path.suffix.lower() in AUDIO_EXTS)
+    reads = len(paths) * args.rounds
+    for label, easy in (("easy", True), ("native", False)):
+        seconds = time_reads(paths, easy, args.rounds)
+        print(f"{label:>6}: {seconds * 1_000_000 / reads:8.1f} us CPU per file ({reads} reads)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Time tag normalization over a large scan, with and without remembered results.
+
+Usage: python -m benchmarks.tag_normalize [--items N] [--album-size N] [--rounds N]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from models import TrackItem
+from services.session import Session
+from tag_service import TagNormalizer
+
+
+def make_items(count: int, album_size: int) -> list[TrackItem]:
+    items = []
+    for number in range(count):
+        album = number // album_size
+        items.append(
+            TrackItem(
+                path=Path("Library") / f"{number:06d}.mp3",
+                filename=f"{number:06d}.mp3",
+                ext=".mp3",
+                proposed_filename=f"{number:06d}.mp3",
+                tags={
+                    "title": f"song  number {number} ft guest",
+                    "artist": f"artist {album % 500}  Featuring guest",
+                    "albumartist": f"artist {album % 500}",
+                    "album": f"the best of album {album}",
+                    "date": "2026",
+                    "genre": "hip hop",
+                },
+            )
+        )
+    return items
+
+
+class UnmemoizedNormalizer(TagNormalizer):
+    """Runs every value through its chain, for comparison."""
+
+    def normalize(self, key: str, value: str) -> str:
+        for transform in self._chains.get(key, ()):
+            value = transform(value)
+        return value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--album-size", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    session = Session(make_items(args.items, args.album_size))
+    warm = TagNormalizer()
+    runs = {
+        "every value": UnmemoizedNormalizer,
+        "memoized, cold": TagNormalizer,
+        "memoized, warm": lambda: warm,
+    }
+    for name, normalizer_factory in runs.items():
+        best = None
+        for _round in range(args.rounds):
+            session.clear_changes()
+            normalizer = normalizer_factory()
+            started = time.perf_counter()
+            summaries = session.normalize_tags(normalizer)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        changed = sum(summary.changed for summary in summaries)
+        print(f"{name:>15}: {best * 1000:7.2f} ms, {changed} values changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Time apply_order_as_track_numbers-style bulk edits with and without change events.
+
+Usage: python -m benchmarks.track_events [--items N] [--rounds N]
+"""
+import argparse
+import time
+
+from benchmarks.validation_index import make_items
+from models import TrackCollection
+
+
+def renumber(items, round_number: int) -> float:
+    started = time.perf_counter()
+    for index, item in enumerate(items, start=1):
+        item.set_pending_tag("tracknumber", f"{index + round_number:02d}")
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    plain = make_items(args.items)
+    collection = TrackCollection(make_items(args.items))
+    changed = {}
+    collection.subscribe(lambda item, _field, _old, _new: changed.__setitem__(id(item), item))
+
+    for label, items in (("no listener", plain), ("subscribed collection", collection)):
+        best = min(renumber(items, round_number) for round_number in range(args.rounds))
+        print(f"{label:>22}: {best * 1000:7.2f} ms per renumber of {args.items} items")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Measure bytes per track held by scanned TrackItems and by a TrackTable, against the old dict-backed item.
+
+Usage: python -m benchmarks.track_memory [--items N]
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class DictTrackItem:
+    """TrackItem as it was before it was slotted: a __dict__ per item and no interning."""
+
+    path: Path
+    filename: str
+    ext: str
+    proposed_filename: str
+    audio_ok: bool = True
+    read_error: str | None = None
+    artist_first: str = ""
+    tags: dict[str, str] = field(default_factory=dict)
+    pending_tags: dict[str, str] = field(default_factory=dict)
+    validation_warnings: list[str] = field(default_factory=list)
+    artwork_present: bool = False
+    pending_artwork: object = None
+    artwork_change_pending: bool = False
+
+
+def fresh(text: str) -> str:
+    # Tag values read from files are separate string objects even when equal.
+    return "".join(list(text))
+
+
+def scanned_values(number: int) -> dict:
+    album = number // 12
+    return {
+        "path": Path("/music/Downloads") / f"{number:06d} SpotiDownloader.com - Song {number}.mp3",
+        "filename": f"{number:06d} SpotiDownloader.com - Song {number}.mp3",
+        "ext": fresh(".mp3"),
+        "proposed_filename": f"{number:06d} Song {number}.mp3",
+        "artist_first": fresh(f"Artist {album % 50}"),
+        "tags": {
+            "title": f"Song {number}",
+            "albumartist": fresh(f"Artist {album % 50}"),
+            "artist": fresh(f"Artist {album % 50}"),
+            "album": fresh(f"Album {album}"),
+            "date": fresh("2026"),
+            "genre": fresh("Hip-Hop"),
+            "tracknumber": str(number % 12 + 1),
+        },
+    }
+
+
+def measure(label: str, build, count: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    held = build(count)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>28}: {current / count:8.0f} bytes per track")
+    del held
+
+
+def build_baseline_items(count: int):
+    return [DictTrackItem(**scanned_values(number)) for number in range(count)]
+
+
+def build_items(count: int):
+    from models import TrackItem
+
+    return [TrackItem(**scanned_values(number)) for number in range(count)]
+
+
+def build_interned_items(count: int):
+    from models import TrackItem, intern_tag_values
+
+    items = []
+    for number in range(count):
+        values = scanned_values(number)
+        values["tags"] = intern_tag_values(values["tags"])
+        values["ext"] = sys.intern(values["ext"])
+        values["artist_first"] = sys.intern(values["artist_first"])
+        items.append(TrackItem(**values))
+    return items
+
+
+def build_table(count: int):
+    from models import TrackItem
+    from track_table import TrackTable
+
+    table = TrackTable()
+    for number in range(count):
+        table.append(TrackItem(**scanned_values(number)))
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+
+    measure("before: dict-backed items", build_baseline_items, args.items)
+    measure("slotted TrackItem list", build_items, args.items)
+    measure("interned TrackItem list", build_interned_items, args.items)
+    measure("TrackTable", build_table, args.items)
+
+
+if __name__ == "__main__":
+    main()
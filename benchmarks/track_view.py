@@ -0,0 +1,51 @@
+"""Time filtering and sorting the table view over a large scan.
+
+Usage: python -m benchmarks.track_view [--items N]
+"""
+import argparse
+import time
+
+from benchmarks.validation_index import make_items
+from track_view import TrackView
+from warning_service import ValidationIndex
+
+
+def timed(label: str, action) -> None:
+    started = time.perf_counter()
+    action()
+    print(f"{label:>24}: {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    for item in items[::7]:
+        item.set_pending_tag("date", "")
+    validation = ValidationIndex(items)
+
+    def row_values(item):
+        return (
+            item.filename,
+            item.effective_tag("title"),
+            item.effective_tag("date"),
+            item.effective_tag("tracknumber"),
+            "; ".join(validation.warnings(item)),
+        )
+
+    view = TrackView(row_values)
+    timed("index", lambda: view.reset(items))
+    for query in ("year missing", "song 1234", "0", "copy"):
+        timed(f"filter {query!r}", lambda: view.set_filter(query))
+        print(f"{'':>24}  {len(view.rows)} rows")
+    view.set_filter("")
+    timed("first sort by title", lambda: view.set_sort(1))
+    timed("cached sort by title", lambda: view.set_sort(1, descending=True))
+    items[5].set_pending_tag("title", "Edited")
+    timed("update one item", lambda: view.update([items[5]]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Time single-row edits against a ValidationIndex over one large folder.
+
+Usage: python -m benchmarks.validation_index [--items N] [--edits N]
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from models import TrackItem
+from warning_service import ValidationIndex
+
+
+def make_items(count: int) -> list[TrackItem]:
+    return [
+        TrackItem(
+            path=Path("Library") / f"{number:05d}.mp3",
+            filename=f"{number:05d}.mp3",
+            ext=".mp3",
+            proposed_filename=f"{number:05d}.mp3",
+            artist_first="Artist",
+            tags={
+                "title": f"Song {number}",
+                "album": "Album",
+                "albumartist": "Artist",
+                "date": "2026",
+                "genre": "Rock",
+                "tracknumber": str(number),
+            },
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--edits", type=int, default=2000)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    started = time.perf_counter()
+    index = ValidationIndex(items)
+    print(f"build: {(time.perf_counter() - started) * 1000:8.1f} ms for {args.items} items")
+
+    generator = random.Random(1)
+    keys = ["date", "genre", "albumartist", "tracknumber", "title"]
+    started = time.perf_counter()
+    for _edit in range(args.edits):
+        item = generator.choice(items)
+        key = generator.choice(keys)
+        item.set_pending_tag(key, generator.choice(["2025", "Pop", "Other", "7", ""]))
+        index.update([item], {key})
+    elapsed = time.perf_counter() - started
+    print(f"edit:  {elapsed * 1_000_000 / args.edits:8.1f} us per single-row edit")
+
+
+if __name__ == "__main__":
+    main()
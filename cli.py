@@ -0,0 +1,285 @@
+"""Apply a saved rule set to folders without opening the window.
+
+    python -m cli FOLDER [FOLDER ...] [--preset NAME] [--dry-run] [--jsonl] [--watch]
+
+Files are read and written on a pool of worker processes. With --watch, files
+added to the folders later are cleaned up once their downloads finish, until
+Ctrl+C. The exit code is 0 on success, 1 if any file or folder could not be
+changed and 2 for invalid arguments.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
+from pathlib import Path
+from typing import TextIO
+
+from models import TrackItem
+from services.apply_service import (
+    ApplyError,
+    ApplyResult,
+    items_with_changes,
+    rename_files,
+    write_item_changes,
+)
+from services.batch_service import BatchActions, apply_result_record, plan_records, resolve_tag_key
+from services.scanner import ScanOptions, list_audio_files, read_track
+from services.session import EditError
+from services.settings_service import SETTINGS_PATH, RulePreset, load_settings
+from services.watch_service import FolderWatcher
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+class UsageError(Exception):
+    pass
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Rename and retag audio files with a saved rule set.",
+    )
+    parser.add_argument("folders", nargs="+", type=Path, help="folders whose audio files are cleaned up")
+    parser.add_argument("--preset", help="rule set to apply (default: the active rule set)")
+    parser.add_argument("--settings", type=Path, default=SETTINGS_PATH, help="settings file with the rule sets")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without changing any file")
+    parser.add_argument("--jsonl", action="store_true", help="print one JSON object per line")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1), help="worker processes")
+    parser.add_argument("--no-rename", action="store_true", help="keep the current filenames")
+    parser.add_argument("--titles", action="store_true", help="set Title from the proposed filename")
+    parser.add_argument(
+        "--track-numbers",
+        action="store_true",
+        help="set missing track numbers from the rule set's extract markers",
+    )
+    parser.add_argument("--fields", action="store_true", help="set the fields of the rule set's filename pattern")
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="normalize tags with the rule set's normalization steps, after the other edits",
+    )
+    parser.add_argument(
+        "--extract-tag",
+        metavar="FIELD",
+        help="set FIELD from the text between the rule set's extraction boundaries",
+    )
+    parser.add_argument("--watch", action="store_true", help="keep running and clean up files added later")
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="with --watch, how long a new file must stay unchanged before it is touched",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="with --watch, how often folders are checked",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None, out: TextIO | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    out = out or sys.stdout
+    try:
+        preset = _rule_preset(args)
+        actions = BatchActions(
+            keep_names=args.no_rename,
+            titles=args.titles,
+            track_numbers=args.track_numbers,
+            tag_key=None if args.extract_tag is None else resolve_tag_key(args.extract_tag),
+            fields=args.fields,
+            normalize=args.normalize,
+        )
+        actions.check(preset)
+        for folder in args.folders:
+            if not folder.is_dir():
+                raise UsageError(f"{folder} is not a folder")
+    except (UsageError, EditError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return EXIT_USAGE
+
+    report = partial(_report, out, args.jsonl)
+    # The services print diagnostics; keep them out of the plan on stdout.
+    with redirect_stdout(sys.stderr), _worker_pool(args.workers) as pool:
+        process = partial(
+            _process,
+            preset=preset,
+            actions=actions,
+            dry_run=args.dry_run,
+            map_values=partial(_map, pool, args.workers),
+            report=report,
+        )
+        if args.watch:
+            return _watch(args, process)
+        _items, failed = process({folder: list_audio_files(folder) for folder in args.folders})
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _rule_preset(args) -> RulePreset:
+    settings = load_settings(args.settings)
+    name = args.preset or settings.active_preset
+    preset = settings.rule_presets.get(name)
+    if preset is None:
+        names = ", ".join(sorted(settings.rule_presets))
+        raise UsageError(f'no rule set named "{name}"; saved rule sets: {names}')
+    return preset
+
+
+class _InlinePool:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def _worker_pool(workers: int):
+    if workers <= 1:
+        return _InlinePool()
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def _init_worker() -> None:
+    sys.stdout = sys.stderr
+    # Ctrl+C stops the main process, which then shuts the pool down in order.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _map(pool: ProcessPoolExecutor | None, workers: int, function: Callable, values: list) -> Iterable:
+    if pool is None or len(values) < 2:
+        return map(function, values)
+    # A few chunks per worker keeps them busy without paying a round trip per file.
+    return pool.map(function, values, chunksize=max(1, len(values) // (workers * 4)))
+
+
+def _scan(folder_paths: dict[Path, list[Path]], preset: RulePreset, map_values) -> dict[Path, list[TrackItem]]:
+    options = ScanOptions.from_preset(preset)
+    paths = [path for folder_files in folder_paths.values() for path in folder_files]
+    items = iter(list(map_values(partial(read_track, options=options), paths)))
+    return {folder: [next(items) for _path in folder_files] for folder, folder_files in folder_paths.items()}
+
+
+def _process(
+    folder_paths: dict[Path, list[Path]],
+    preset: RulePreset,
+    actions: BatchActions,
+    dry_run: bool,
+    map_values,
+    report,
+) -> tuple[list[TrackItem], bool]:
+    """Plan and, unless this is a dry run, apply.
+
+    Returns the items of the folders that were applied without errors, and
+    whether anything failed.
+    """
+    folder_items = _scan(folder_paths, preset, map_values)
+    for folder, items in folder_items.items():
+        for summary in actions.apply(items, preset):
+            for name in summary.unmatched:
+                # stdout is redirected to stderr here; the plan goes to out.
+                print(f"{folder / name}: does not match the pattern for {summary.field}")
+        for record in plan_records(folder, items, preset):
+            report(record)
+    failed_folders = set()
+    if not dry_run:
+        for folder, result, error in _apply(folder_items, map_values):
+            if error is not None or result.failed:
+                failed_folders.add(folder)
+            report(_result_record(folder, result, error))
+    done = [item for folder, items in folder_items.items() if folder not in failed_folders for item in items]
+    return done, bool(failed_folders)
+
+
+def _watch(args, process) -> int:
+    failed = False
+    with FolderWatcher(args.folders, settle_seconds=args.settle, poll_interval=args.poll_interval) as watcher:
+        print(f"Watching {len(args.folders)} folder(s) using {watcher.backend}; press Ctrl+C to stop.")
+        try:
+            while True:
+                batches = watcher.poll()
+                if batches:
+                    items, batch_failed = process(batches)
+                    failed = failed or batch_failed
+                    # Renames and tag writes must not come back as new files. Files of a
+                    # folder that failed are left unmarked, so their new names are tried again.
+                    watcher.mark_done(item.path for item in items)
+                watcher.wait()
+        except KeyboardInterrupt:
+            pass
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _apply(folder_items: dict[Path, list[TrackItem]], map_values):
+    """Rename folder by folder, then write tags for every folder on the pool."""
+    renamed = {}
+    errors = {}
+    for folder, items in folder_items.items():
+        try:
+            renamed[folder] = rename_files(folder, items)
+        except ApplyError as error:
+            errors[folder] = error
+    changed = [
+        (folder, item)
+        for folder, items in folder_items.items()
+        if folder not in errors
+        for item in items_with_changes(items)
+    ]
+    results = {folder: ApplyResult(renamed_files=count) for folder, count in renamed.items()}
+    item_results = map_values(write_item_changes, [item for _folder, item in changed])
+    for (folder, _item), item_result in zip(changed, item_results):
+        results[folder].merge(item_result)
+    for folder in folder_items:
+        yield folder, results.get(folder, ApplyResult()), errors.get(folder)
+
+
+def _result_record(folder: Path, result: ApplyResult, error: ApplyError | None) -> dict:
+    record = {"event": "applied", "folder": str(folder), **apply_result_record(result)}
+    if error is not None:
+        record["error"] = f"{error.message} {error.technical_detail}".strip()
+    return record
+
+
+def _report(out: TextIO, jsonl: bool, record: dict) -> None:
+    if jsonl:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        out.write(_format_record(record) + "\n")
+    out.flush()
+
+
+def _format_record(record: dict) -> str:
+    if record["event"] == "plan":
+        parts = []
+        if record["rename_to"]:
+            parts.append(f"rename to {record['rename_to']}")
+        parts.extend(f"set {key} = {value!r}" for key, value in record["tags"].items())
+        parts.extend(f"warning: {warning}" for warning in record["warnings"])
+        return f"{record['path']}: " + "; ".join(parts)
+    line = (
+        f"{record['folder']}: renamed {record['renamed']}, tags saved {record['tagged']}, "
+        f"artwork updated {record['artwork']}"
+    )
+    failures = record.get("skipped", []) + record.get("tag_errors", []) + record.get("artwork_errors", [])
+    if failures:
+        line += f", {len(failures)} failed: {', '.join(failures)}"
+    if "error" in record:
+        line += f", error: {record['error']}"
+    return line
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,3 @@
-import ctypes
 import sys
 import tkinter as tk
 from pathlib import Path
@@ -6,19 +5,37 @@ from tkinter import font as tkfont
 from tkinter import filedialog, ttk
 
 import themed_dialogs as messagebox
-from models import TrackItem
-from rename_rules import extract_index_with_pair
-from services.apply_service import ApplyError, apply_changes as apply_item_changes
-from services.artwork_service import ArtworkError, extract_embedded_artwork, load_artwork_file
-from services.scanner import ScanOptions, propose_filename, scan_folder as scan_audio_folder
-from services.settings_service import AppSettings, RulePreset, load_settings, save_settings
-from tag_service import (
-    TAG_FIELDS,
-    TAG_KEY_BY_LABEL,
-    extract_tag_value_from_filename,
-    title_from_filename,
+from models import REMOVED_FIELD, TrackCollection, TrackItem
+from services.artwork_store import ArtworkStore, format_byte_size
+from services.session import EditError, EditSummary, Session
+from services.settings_service import (
+    AppSettings,
+    ArtworkSettings,
+    RulePreset,
+    SettingsSaver,
+    compile_preset,
+    load_settings,
 )
-from warning_service import get_duplicate_track_ids, get_warnings
+from services.task_service import ResourceBusy, TaskRunner
+from tag_service import NORMALIZE_STEPS, TAG_FIELDS, TAG_KEY_BY_LABEL
+from track_view import TrackView
+from virtual_table import VirtualTable
+from warning_service import ValidationIndex, rule_labels
+# Scanning, applying and artwork services pull in mutagen and Pillow; they are
+# imported where they are first used so the window appears without loading them.
+
+TASK_POLL_MS = 20
+# Saves requested within this window of each other are written once.
+SETTINGS_SAVE_DELAY_MS = 400
+# Filenames listed by name in a report before the rest are only counted.
+FILENAME_REPORT_LIMIT = 10
+LIBRARY_RESULT_LIMIT = 5000
+LIBRARY_MISSING_FIELDS = {field.label: field.key for field in TAG_FIELDS} | {"Track #": "tracknumber"}
+TAG_FILE_TYPES = [("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"), ("All files", "*.*")]
+# Resources held by background tasks: the scanned items, and their proposed filenames.
+TRACKS_RESOURCE = "tracks"
+FILENAMES_RESOURCE = "filenames"
+ARTWORK_RESOURCE = "artwork"
 
 def resource_path(relative_path: str) -> Path:
     if hasattr(sys, "_MEIPASS"):
@@ -28,6 +45,8 @@ def resource_path(relative_path: str) -> Path:
 def _set_windows_app_mode(dark: bool):
     if sys.platform != "win32":
         return
+    import ctypes
+
     try:
         kernel32 = ctypes.WinDLL("kernel32")
         uxtheme = ctypes.WinDLL("uxtheme")
@@ -51,6 +70,8 @@ class MusicFixGUI(tk.Tk):
         super().__init__()
         self.withdraw()
         self.settings = settings
+        self.settings_saver = SettingsSaver()
+        self._settings_save_job = None
         self.title("Music File Manager")
         icon_path = resource_path("assets/app_icon.ico")
         if icon_path.exists():
@@ -68,14 +89,35 @@ class MusicFixGUI(tk.Tk):
         )
 
         self.folder: Path | None = None
-        self.items: list[TrackItem] = []
+        # Whether the tracks were opened from a library search instead of a folder.
+        self.from_library = False
+        self._library_results: list[Path] = []
+        # Groups from the last duplicate search, and the files marked for deletion.
+        self._duplicate_groups = []
+        self._duplicates_marked: set[Path] = set()
+        self.session = Session()
+        # Items and fields edited since the table was last drawn.
+        self._changed_items: dict[int, TrackItem] = {}
+        self._changed_keys: set[str] = set()
+        self._rendered_items: TrackCollection | None = None
+        self.view = TrackView(self._row_values)
+        self.validation = ValidationIndex(rules=self._validation_rules(self.active_rules))
         self.selected_artwork = None
+        self.artwork_store = ArtworkStore()
+        self._thumbnail_loader = None
+        self._artwork_preview_image = None
+        self._artwork_preview_request = 0
+        self.tasks = TaskRunner()
+        self._recompute_task = None
+        self._recompute_again = False
 
         self._build_ui()
         self.apply_theme(self.settings.theme, force_titlebar_refresh=False)
         self.update_idletasks()
         self.deiconify()
         self.after_idle(lambda: self._apply_windows_window_theme(self, self.settings.theme == "Dark"))
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(TASK_POLL_MS, self._poll_tasks)
 
     def _build_ui(self):
         self.columnconfigure(0, weight=1)
@@ -85,11 +127,20 @@ class MusicFixGUI(tk.Tk):
         self._build_file_table()
         self._build_workstations()
 
+        status_bar = ttk.Frame(self)
+        status_bar.grid(row=3, column=0, sticky="ew", padx=10, pady=(0, 8))
+        status_bar.columnconfigure(0, weight=1)
         self.status_label = ttk.Label(
-            self,
+            status_bar,
             text="Choose a folder to begin. Changes remain pending until Apply Changes is pressed.",
         )
-        self.status_label.grid(row=3, column=0, sticky="ew", padx=10, pady=(0, 8))
+        self.status_label.grid(row=0, column=0, sticky="ew")
+        self.task_progress = ttk.Progressbar(status_bar, length=200, mode="determinate")
+        self.task_progress.grid(row=0, column=1, padx=(10, 6))
+        self.task_cancel_button = ttk.Button(status_bar, text="Cancel", command=self.cancel_tasks)
+        self.task_cancel_button.grid(row=0, column=2)
+        self.task_progress.grid_remove()
+        self.task_cancel_button.grid_remove()
 
     def _build_top_bar(self):
         top = ttk.Frame(self, padding=10)
@@ -108,7 +159,20 @@ class MusicFixGUI(tk.Tk):
         table_frame = ttk.Frame(self, padding=(10, 0))
         table_frame.grid(row=1, column=0, sticky="nsew")
         table_frame.columnconfigure(0, weight=1)
-        table_frame.rowconfigure(0, weight=1)
+        table_frame.rowconfigure(1, weight=1)
+
+        filter_bar = ttk.Frame(table_frame)
+        filter_bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 6))
+        filter_bar.columnconfigure(1, weight=1)
+        ttk.Label(filter_bar, text="Filter:").grid(row=0, column=0, padx=(0, 6))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_args: self.apply_filter())
+        ttk.Entry(filter_bar, textvariable=self.filter_var).grid(row=0, column=1, sticky="ew")
+        ttk.Button(filter_bar, text="Clear", command=lambda: self.filter_var.set("")).grid(
+            row=0, column=2, padx=(6, 0)
+        )
+        self.filter_count_label = ttk.Label(filter_bar, text="")
+        self.filter_count_label.grid(row=0, column=3, padx=(10, 0))
 
         columns = (
             "current",
@@ -150,8 +214,10 @@ class MusicFixGUI(tk.Tk):
             "artwork": 90,
             "warnings": 300,
         }
+        self._table_columns = columns
+        self._column_headings = headings
         for column in columns:
-            self.tree.heading(column, text=headings[column])
+            self.tree.heading(column, text=headings[column], command=lambda c=column: self.sort_by_column(c))
             self.tree.column(
                 column,
                 width=widths[column],
@@ -160,11 +226,13 @@ class MusicFixGUI(tk.Tk):
                 anchor="center" if column in {"date", "track", "artwork"} else "w",
             )
 
+        # Only the rows in view exist in the tree; the table maps them to self.items through the view.
+        self.table = VirtualTable(self.tree, lambda row: self._row_values(self.items[self.view.rows[row]]))
         vertical = ttk.Scrollbar(
             table_frame,
             orient="vertical",
             style="App.Vertical.TScrollbar",
-            command=self.tree.yview,
+            command=self.table.yview,
         )
         horizontal = ttk.Scrollbar(
             table_frame,
@@ -172,11 +240,13 @@ class MusicFixGUI(tk.Tk):
             style="App.Horizontal.TScrollbar",
             command=self.tree.xview,
         )
-        self.tree.configure(yscrollcommand=vertical.set, xscrollcommand=horizontal.set)
+        self.table.yscrollcommand = vertical.set
+        self.tree.configure(xscrollcommand=horizontal.set)
+        self.tree.bind("<<TreeviewSelect>>", lambda _event: self._refresh_artwork_preview())
 
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        vertical.grid(row=0, column=1, sticky="ns")
-        horizontal.grid(row=1, column=0, sticky="ew")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        vertical.grid(row=1, column=1, sticky="ns")
+        horizontal.grid(row=2, column=0, sticky="ew")
 
     def _build_workstations(self):
         self.notebook = ttk.Notebook(self)
@@ -186,24 +256,75 @@ class MusicFixGUI(tk.Tk):
         self.tags_tab = ttk.Frame(self.notebook, padding=10)
         self.track_tab = ttk.Frame(self.notebook, padding=10)
         self.album_art_tab = ttk.Frame(self.notebook, padding=10)
+        self.library_tab = ttk.Frame(self.notebook, padding=10)
+        self.duplicates_tab = ttk.Frame(self.notebook, padding=10)
         self.settings_tab = ttk.Frame(self.notebook, padding=10)
 
         self.notebook.add(self.filename_tab, text="Filename Cleanup")
         self.notebook.add(self.tags_tab, text="Tags")
         self.notebook.add(self.track_tab, text="Track Order")
         self.notebook.add(self.album_art_tab, text="Album Art")
+        self.notebook.add(self.library_tab, text="Library")
+        self.notebook.add(self.duplicates_tab, text="Duplicates")
         self.notebook.add(self.settings_tab, text="Settings")
 
         self._equalize_tab_widths()
+        self.notebook.bind("<<NotebookTabChanged>>", lambda _event: self._on_tab_changed())
 
+        # Only the first tab is built before the window is shown; the others are
+        # built on their first visit. Their settings live in variables created
+        # up front, so rule sets can be read and applied before a tab exists.
+        self._create_tab_state()
         self._build_filename_tab()
-        self._build_tags_tab()
-        self._build_track_tab()
-        self._build_album_art_tab()
-        self._build_settings_tab()
+        self._deferred_tabs = {
+            str(self.tags_tab): self._build_tags_tab,
+            str(self.track_tab): self._build_track_tab,
+            str(self.album_art_tab): self._build_album_art_tab,
+            str(self.library_tab): self._build_library_tab,
+            str(self.duplicates_tab): self._build_duplicates_tab,
+            str(self.settings_tab): self._build_settings_tab,
+        }
+
+    def _create_tab_state(self):
+        rules = self.active_rules
+        self.tag_field_var = tk.StringVar(value=TAG_FIELDS[0].label)
+        self.tag_extract_before_var = tk.StringVar(value=rules.tag_extract_before)
+        self.tag_extract_after_var = tk.StringVar(value=rules.tag_extract_after)
+        self.filename_pattern_var = tk.StringVar(value=rules.filename_pattern)
+        self.normalize_step_vars = {
+            step: tk.BooleanVar(value=step in rules.normalize_steps) for step in NORMALIZE_STEPS
+        }
+        self.track_pair_var = tk.StringVar(value=rules.track_markers)
+
+        self.library_query_var = tk.StringVar()
+        self.library_artist_var = tk.StringVar()
+        self.library_missing_var = tk.StringVar()
+
+        self.theme_var = tk.StringVar(value=self.settings.theme)
+        self.preset_name_var = tk.StringVar(value=self.settings.active_preset)
+        self.save_cleanup_var = tk.BooleanVar(value=True)
+        self.save_track_var = tk.BooleanVar(value=True)
+        self.save_tag_extract_var = tk.BooleanVar(value=True)
+        self.save_validation_var = tk.BooleanVar(value=True)
+        artwork_settings = self.settings.artwork
+        self.artwork_normalize_var = tk.BooleanVar(value=artwork_settings.normalize)
+        self.artwork_max_edge_var = tk.IntVar(value=artwork_settings.max_edge)
+        self.artwork_quality_var = tk.IntVar(value=artwork_settings.jpeg_quality)
+        self.artwork_progressive_var = tk.BooleanVar(value=artwork_settings.progressive)
+        enabled_rules = set(rules.validation_rules)
+        self.validation_rule_vars = {
+            name: tk.BooleanVar(value=name in enabled_rules) for name in rule_labels()
+        }
+        self.genre_whitelist_var = tk.StringVar(value=", ".join(rules.genre_whitelist))
+
+    def _on_tab_changed(self):
+        build_tab = self._deferred_tabs.pop(self.notebook.select(), None)
+        if build_tab is not None:
+            build_tab()
+        self._refresh_artwork_preview()
 
     def _equalize_tab_widths(self):
-        labels = ["Filename Cleanup", "Tags", "Track Order", "Album Art", "Settings"]
+        labels = [self.notebook.tab(tab_id, "text") for tab_id in self.notebook.tabs()]
         tab_font = tkfont.nametofont("TkDefaultFont")
         widest = max(tab_font.measure(label) for label in labels)
         for tab_id, label in zip(self.notebook.tabs(), labels):
@@ -259,7 +380,6 @@ class MusicFixGUI(tk.Tk):
 
     def _build_tags_tab(self):
         ttk.Label(self.tags_tab, text="Field:").grid(row=0, column=0, sticky="w")
-        self.tag_field_var = tk.StringVar(value=TAG_FIELDS[0].label)
         self.tag_field_combo = ttk.Combobox(
             self.tags_tab,
             textvariable=self.tag_field_var,
@@ -303,12 +423,14 @@ class MusicFixGUI(tk.Tk):
             row=5, column=0, columnspan=2, sticky="w"
         )
         ttk.Label(self.tags_tab, text="Text before:").grid(row=6, column=0, sticky="e", pady=(6, 0))
-        self.tag_extract_before_entry = ttk.Entry(self.tags_tab, width=16)
-        self.tag_extract_before_entry.insert(0, self.active_rules.tag_extract_before)
+        self.tag_extract_before_entry = ttk.Entry(
+            self.tags_tab, width=16, textvariable=self.tag_extract_before_var
+        )
         self.tag_extract_before_entry.grid(row=6, column=1, sticky="w", padx=6, pady=(6, 0))
         ttk.Label(self.tags_tab, text="Text after:").grid(row=6, column=2, sticky="e", pady=(6, 0))
-        self.tag_extract_after_entry = ttk.Entry(self.tags_tab, width=16)
-        self.tag_extract_after_entry.insert(0, self.active_rules.tag_extract_after)
+        self.tag_extract_after_entry = ttk.Entry(
+            self.tags_tab, width=16, textvariable=self.tag_extract_after_var
+        )
         self.tag_extract_after_entry.grid(row=6, column=3, sticky="w", padx=6, pady=(6, 0))
         ttk.Button(
             self.tags_tab,
@@ -325,6 +447,120 @@ class MusicFixGUI(tk.Tk):
             text="Example: before '[' and after ']' extracts Artist from Song [Artist] 2026.",
         ).grid(row=8, column=0, columnspan=4, sticky="w", pady=(8, 0))
 
+        ttk.Separator(self.tags_tab).grid(row=9, column=0, columnspan=4, sticky="ew", pady=12)
+        ttk.Label(self.tags_tab, text="Extract several fields with a filename pattern").grid(
+            row=10, column=0, columnspan=2, sticky="w"
+        )
+        ttk.Label(self.tags_tab, text="Pattern:").grid(row=11, column=0, sticky="e", pady=(6, 0))
+        ttk.Entry(self.tags_tab, width=42, textvariable=self.filename_pattern_var).grid(
+            row=11, column=1, columnspan=3, sticky="w", padx=6, pady=(6, 0)
+        )
+        ttk.Button(
+            self.tags_tab,
+            text="Extract for Selected",
+            command=self.extract_fields_from_selected_filenames,
+        ).grid(row=12, column=0, sticky="w", pady=(8, 0))
+        ttk.Button(
+            self.tags_tab,
+            text="Extract for All",
+            command=self.extract_fields_from_all_filenames,
+        ).grid(row=12, column=1, sticky="w", padx=6, pady=(8, 0))
+        ttk.Label(
+            self.tags_tab,
+            text="Example: {tracknumber} - {artist} - {title} fills all three from 03 - Artist - Song. "
+            "Use {*} to skip text.",
+        ).grid(row=13, column=0, columnspan=4, sticky="w", pady=(8, 0))
+
+        ttk.Separator(self.tags_tab).grid(row=14, column=0, columnspan=4, sticky="ew", pady=12)
+        ttk.Label(self.tags_tab, text="Normalize tags").grid(row=15, column=0, columnspan=2, sticky="w")
+        steps = ttk.Frame(self.tags_tab)
+        steps.grid(row=16, column=0, columnspan=4, sticky="w", pady=(6, 0))
+        for step, label in NORMALIZE_STEPS.items():
+            ttk.Checkbutton(steps, text=label, variable=self.normalize_step_vars[step]).pack(
+                side="left", padx=(0, 12)
+            )
+        ttk.Button(self.tags_tab, text="Normalize Selected", command=self.normalize_selected_tags).grid(
+            row=17, column=0, sticky="w", pady=(8, 0)
+        )
+        ttk.Button(self.tags_tab, text="Normalize All", command=self.normalize_all_tags).grid(
+            row=17, column=1, sticky="w", padx=6, pady=(8, 0)
+        )
+        ttk.Label(
+            self.tags_tab,
+            text="Genres use the spelling in the genre whitelist, then common spellings such as Hip-Hop and R&B.",
+        ).grid(row=18, column=0, columnspan=4, sticky="w", pady=(8, 0))
+
+        ttk.Separator(self.tags_tab).grid(row=19, column=0, columnspan=4, sticky="ew", pady=12)
+        ttk.Label(self.tags_tab, text="Edit tags in a spreadsheet").grid(row=20, column=0, columnspan=2, sticky="w")
+        ttk.Button(self.tags_tab, text="Export Tags...", command=self.export_tags).grid(
+            row=21, column=0, sticky="w", pady=(8, 0)
+        )
+        ttk.Button(self.tags_tab, text="Import Tags...", command=self.import_tags).grid(
+            row=21, column=1, sticky="w", padx=6, pady=(8, 0)
+        )
+        ttk.Label(
+            self.tags_tab,
+            text="Export the shown tracks to CSV or JSONL, edit the tag columns and import the file as pending edits.",
+        ).grid(row=22, column=0, columnspan=4, sticky="w", pady=(8, 0))
+
+    def _build_library_tab(self):
+        ttk.Label(self.library_tab, text="Search:").grid(row=0, column=0, sticky="w")
+        query_entry = ttk.Entry(self.library_tab, width=36, textvariable=self.library_query_var)
+        query_entry.grid(row=0, column=1, sticky="w", padx=(6, 18))
+        query_entry.bind("<Return>", lambda _event: self.search_library())
+        ttk.Label(self.library_tab, text="Artist:").grid(row=0, column=2, sticky="w")
+        artist_entry = ttk.Entry(self.library_tab, width=24, textvariable=self.library_artist_var)
+        artist_entry.grid(row=0, column=3, sticky="w", padx=6)
+        artist_entry.bind("<Return>", lambda _event: self.search_library())
+        ttk.Label(self.library_tab, text="Missing:").grid(row=1, column=0, sticky="w", pady=(8, 0))
+        ttk.Combobox(
+            self.library_tab,
+            textvariable=self.library_missing_var,
+            values=["", *LIBRARY_MISSING_FIELDS],
+            state="readonly",
+            width=22,
+        ).grid(row=1, column=1, sticky="w", padx=(6, 18), pady=(8, 0))
+        ttk.Button(self.library_tab, text="Search", command=self.search_library).grid(
+            row=2, column=0, sticky="w", pady=(10, 0)
+        )
+        ttk.Button(self.library_tab, text="Open Results", command=self.open_library_results).grid(
+            row=2, column=1, sticky="w", padx=6, pady=(10, 0)
+        )
+        self.library_result_label = ttk.Label(
+            self.library_tab,
+            text="Every folder you open is added to the library. Search it by title, artist, album, genre or filename.",
+        )
+        self.library_result_label.grid(row=3, column=0, columnspan=4, sticky="w", pady=(10, 0))
+
+    def _build_duplicates_tab(self):
+        ttk.Button(self.duplicates_tab, text="Find Duplicates", command=self.find_duplicates).grid(
+            row=0, column=0, sticky="w"
+        )
+        ttk.Button(self.duplicates_tab, text="Keep / Delete Selected", command=self.toggle_duplicate_marks).grid(
+            row=0, column=1, sticky="w", padx=6
+        )
+        ttk.Button(self.duplicates_tab, text="Delete Marked Files", command=self.delete_marked_duplicates).grid(
+            row=0, column=2, sticky="w", padx=6
+        )
+        self.duplicates_label = ttk.Label(
+            self.duplicates_tab,
+            text="Finds the shown tracks whose audio is identical, even when their tags or artwork differ.",
+        )
+        self.duplicates_label.grid(row=1, column=0, columnspan=4, sticky="w", pady=(8, 0))
+        self.duplicates_tree = ttk.Treeview(
+            self.duplicates_tab, columns=("action", "folder"), show="tree headings", height=6, selectmode="extended"
+        )
+        self.duplicates_tree.heading("#0", text="File")
+        self.duplicates_tree.heading("action", text="Action")
+        self.duplicates_tree.heading("folder", text="Folder")
+        self.duplicates_tree.column("#0", width=420)
+        self.duplicates_tree.column("action", width=80, stretch=False)
+        self.duplicates_tree.column("folder", width=420)
+        self.duplicates_tree.grid(row=2, column=0, columnspan=4, sticky="ew", pady=(8, 0))
+        self.duplicates_tree.bind("<Double-1>", lambda _event: self.toggle_duplicate_marks())
+        self.duplicates_tab.columnconfigure(3, weight=1)
+        self._refresh_duplicates_tree()
+
     def _build_track_tab(self):
         ttk.Button(self.track_tab, text="Move Up", command=lambda: self.move_selected(-1)).grid(row=0, column=0)
         ttk.Button(self.track_tab, text="Move Down", command=lambda: self.move_selected(1)).grid(
@@ -342,12 +578,11 @@ class MusicFixGUI(tk.Tk):
         ).grid(row=0, column=3)
 
         ttk.Label(self.track_tab, text="Extract markers:").grid(row=1, column=0, sticky="e", pady=(12, 0))
-        self.track_pair = ttk.Entry(self.track_tab, width=6)
+        self.track_pair = ttk.Entry(self.track_tab, width=6, textvariable=self.track_pair_var)
         self.track_pair.config(
             validate="key",
             validatecommand=(self.register(lambda value: len(value) <= 2), "%P"),
         )
-        self.track_pair.insert(0, self.active_rules.track_markers)
         self.track_pair.grid(row=1, column=1, sticky="w", pady=(12, 0))
         ttk.Button(
             self.track_tab,
@@ -377,7 +612,9 @@ class MusicFixGUI(tk.Tk):
             text="Choose a JPG or PNG. Artwork edits remain pending until Apply Changes.",
         ).grid(row=0, column=0, columnspan=4, sticky="w")
         self.artwork_file_label = ttk.Label(self.album_art_tab, text="No image selected")
-        self.artwork_file_label.grid(row=1, column=0, columnspan=4, sticky="w", pady=(8, 10))
+        self.artwork_file_label.grid(row=1, column=0, columnspan=2, sticky="w", pady=(8, 10))
+        self.artwork_size_label = ttk.Label(self.album_art_tab, text="")
+        self.artwork_size_label.grid(row=1, column=2, columnspan=2, sticky="w", padx=6, pady=(8, 10))
 
         ttk.Button(
             self.album_art_tab,
@@ -420,10 +657,22 @@ class MusicFixGUI(tk.Tk):
             text="Reset All Artwork Edits",
             command=self.reset_artwork_for_all,
         ).grid(row=5, column=1, sticky="w", padx=6, pady=(8, 0))
+        self.artwork_memory_label = ttk.Label(self.album_art_tab, text="")
+        self.artwork_memory_label.grid(row=6, column=0, columnspan=4, sticky="w", pady=(10, 0))
+
+        self.artwork_preview_label = ttk.Label(
+            self.album_art_tab,
+            text="No track selected",
+            compound="top",
+            anchor="center",
+            justify="center",
+            width=30,
+        )
+        self.artwork_preview_label.grid(row=0, column=4, rowspan=7, sticky="n", padx=(24, 0))
+        self._refresh_artwork_memory()
 
     def _build_settings_tab(self):
         ttk.Label(self.settings_tab, text="Theme:").grid(row=0, column=0, sticky="w")
-        self.theme_var = tk.StringVar(value=self.settings.theme)
         theme_combo = ttk.Combobox(
             self.settings_tab,
             textvariable=self.theme_var,
@@ -438,7 +687,6 @@ class MusicFixGUI(tk.Tk):
         )
 
         ttk.Label(self.settings_tab, text="Rule set:").grid(row=1, column=0, sticky="w", pady=(10, 0))
-        self.preset_name_var = tk.StringVar(value=self.settings.active_preset)
         self.preset_combo = ttk.Combobox(
             self.settings_tab,
             textvariable=self.preset_name_var,
@@ -455,9 +703,6 @@ class MusicFixGUI(tk.Tk):
         ttk.Label(self.settings_tab, text="Save categories:").grid(row=2, column=0, sticky="nw", pady=(10, 0))
         categories = ttk.Frame(self.settings_tab)
         categories.grid(row=2, column=1, columnspan=3, sticky="w", pady=(10, 0))
-        self.save_cleanup_var = tk.BooleanVar(value=True)
-        self.save_track_var = tk.BooleanVar(value=True)
-        self.save_tag_extract_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(categories, text="Filename Cleanup", variable=self.save_cleanup_var).pack(
             side="left"
         )
@@ -467,6 +712,9 @@ class MusicFixGUI(tk.Tk):
         ttk.Checkbutton(categories, text="Tag Extraction", variable=self.save_tag_extract_var).pack(
             side="left", padx=(12, 0)
         )
+        ttk.Checkbutton(categories, text="Validation", variable=self.save_validation_var).pack(
+            side="left", padx=(12, 0)
+        )
 
         ttk.Button(self.settings_tab, text="Save Rule Set", command=self.save_current_settings).grid(
             row=3, column=0, sticky="w", pady=(10, 0)
@@ -486,6 +734,57 @@ class MusicFixGUI(tk.Tk):
             text="Theme is saved separately and never changes when loading a rule set.",
         ).grid(row=6, column=0, columnspan=4, sticky="w", pady=(4, 0))
 
+        ttk.Separator(self.settings_tab).grid(row=7, column=0, columnspan=4, sticky="ew", pady=10)
+        ttk.Checkbutton(
+            self.settings_tab,
+            text="Resize and recompress artwork before embedding",
+            variable=self.artwork_normalize_var,
+        ).grid(row=8, column=0, columnspan=4, sticky="w")
+        artwork_options = ttk.Frame(self.settings_tab)
+        artwork_options.grid(row=9, column=0, columnspan=4, sticky="w", pady=(6, 0))
+        ttk.Label(artwork_options, text="Max edge (px):").pack(side="left")
+        ttk.Spinbox(
+            artwork_options,
+            from_=100,
+            to=5000,
+            increment=100,
+            width=6,
+            textvariable=self.artwork_max_edge_var,
+        ).pack(side="left", padx=(4, 12))
+        ttk.Label(artwork_options, text="JPEG quality:").pack(side="left")
+        ttk.Spinbox(
+            artwork_options,
+            from_=1,
+            to=95,
+            width=4,
+            textvariable=self.artwork_quality_var,
+        ).pack(side="left", padx=(4, 12))
+        ttk.Checkbutton(
+            artwork_options,
+            text="Progressive",
+            variable=self.artwork_progressive_var,
+        ).pack(side="left")
+        ttk.Button(self.settings_tab, text="Save Artwork Settings", command=self.save_artwork_settings).grid(
+            row=10, column=0, sticky="w", pady=(8, 0)
+        )
+
+        ttk.Separator(self.settings_tab).grid(row=11, column=0, columnspan=4, sticky="ew", pady=10)
+        ttk.Label(self.settings_tab, text="Validation checks:").grid(row=12, column=0, sticky="nw")
+        checks = ttk.Frame(self.settings_tab)
+        checks.grid(row=12, column=1, columnspan=3, sticky="w")
+        for index, (name, label) in enumerate(rule_labels().items()):
+            ttk.Checkbutton(
+                checks,
+                text=label,
+                variable=self.validation_rule_vars[name],
+                command=self._apply_validation_rules,
+            ).grid(row=index // 3, column=index % 3, sticky="w", padx=(0, 12))
+        ttk.Label(self.settings_tab, text="Genre whitelist:").grid(row=13, column=0, sticky="w", pady=(8, 0))
+        self.genre_whitelist_entry = ttk.Entry(self.settings_tab, width=60, textvariable=self.genre_whitelist_var)
+        self.genre_whitelist_entry.grid(row=13, column=1, columnspan=3, sticky="w", padx=6, pady=(8, 0))
+        self.genre_whitelist_entry.bind("<Return>", lambda _event: self._apply_validation_rules())
+        self.genre_whitelist_entry.bind("<FocusOut>", lambda _event: self._apply_validation_rules())
+
     def apply_theme(self, theme_name: str, force_titlebar_refresh: bool = True):
         dark = theme_name == "Dark"
         self.style.theme_use("clam")
@@ -549,6 +848,7 @@ class MusicFixGUI(tk.Tk):
             background=[("selected", accent)],
             foreground=[("selected", "#ffffff")],
         )
+        self.table.set_selection_colors(accent, "#ffffff")
         self.style.configure("TNotebook", background=background, borderwidth=1)
         self.style.configure(
             "TNotebook.Tab",
@@ -606,6 +906,7 @@ class MusicFixGUI(tk.Tk):
     def _apply_windows_window_theme(self, window: tk.Misc, dark: bool):
         if sys.platform != "win32":
             return
+        import ctypes
 
         _set_windows_app_mode(dark)
 
@@ -730,6 +1031,7 @@ class MusicFixGUI(tk.Tk):
                 self.save_cleanup_var.get(),
                 self.save_track_var.get(),
                 self.save_tag_extract_var.get(),
+                self.save_validation_var.get(),
             )
         ):
             messagebox.showinfo("Rule set", "Choose at least one rule category to save.")
@@ -748,10 +1050,15 @@ class MusicFixGUI(tk.Tk):
         if self.save_tag_extract_var.get():
             preset.tag_extract_before = current.tag_extract_before
             preset.tag_extract_after = current.tag_extract_after
+            preset.filename_pattern = current.filename_pattern
+            preset.normalize_steps = current.normalize_steps
+        if self.save_validation_var.get():
+            preset.validation_rules = current.validation_rules
+            preset.genre_whitelist = current.genre_whitelist
         self.settings.active_preset = preset_name
         self.active_rules = preset
         try:
-            save_settings(self.settings)
+            self._save_settings()
         except OSError as error:
             messagebox.showerror("Settings error", f"Could not save the rule set.\n\n{error}")
             return
@@ -760,12 +1067,44 @@ class MusicFixGUI(tk.Tk):
     def save_theme_setting(self):
         self.settings.theme = self.theme_var.get()
         try:
-            save_settings(self.settings)
+            self._save_settings()
         except OSError as error:
             messagebox.showerror("Settings error", f"Could not save the theme.\n\n{error}")
             return
         messagebox.showinfo("Theme", f'{self.settings.theme} theme saved.')
 
+    def save_artwork_settings(self):
+        artwork_settings = self._current_artwork_settings()
+        if artwork_settings is None:
+            return
+        self.settings.artwork = artwork_settings
+        try:
+            self._save_settings()
+        except OSError as error:
+            messagebox.showerror("Settings error", f"Could not save the artwork settings.\n\n{error}")
+            return
+        messagebox.showinfo("Artwork", "Artwork settings saved.")
+
+    def _current_artwork_settings(self) -> ArtworkSettings | None:
+        try:
+            max_edge = int(self.artwork_max_edge_var.get())
+            jpeg_quality = int(self.artwork_quality_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showwarning("Artwork settings", "Max edge and JPEG quality must be whole numbers.")
+            return None
+        if max_edge < 1 or not 1 <= jpeg_quality <= 95:
+            messagebox.showwarning(
+                "Artwork settings",
+                "Max edge must be at least 1 pixel and JPEG quality between 1 and 95.",
+            )
+            return None
+        return ArtworkSettings(
+            normalize=bool(self.artwork_normalize_var.get()),
+            max_edge=max_edge,
+            jpeg_quality=jpeg_quality,
+            progressive=bool(self.artwork_progressive_var.get()),
+        )
+
     def create_rule_preset(self):
         preset_name = messagebox.askstring(
             "New rule set",
@@ -791,7 +1130,7 @@ class MusicFixGUI(tk.Tk):
         self.preset_name_var.set(preset_name)
         self._refresh_preset_names()
         try:
-            save_settings(self.settings)
+            self._save_settings()
         except OSError as error:
             del self.settings.rule_presets[preset_name]
             self.settings.active_preset = previous_name
@@ -812,11 +1151,8 @@ class MusicFixGUI(tk.Tk):
         self._apply_rule_preset(preset)
         self.settings.active_preset = preset_name
         self.active_rules = preset
-        try:
-            save_settings(self.settings)
-        except OSError as error:
-            messagebox.showerror("Settings error", f"Could not save the active rule set.\n\n{error}")
-            return
+        # Stepping through the rule set list saves once, after the last selection.
+        self._save_settings_later()
         self.recompute_proposed_names()
 
     def delete_rule_preset(self):
@@ -838,12 +1174,33 @@ class MusicFixGUI(tk.Tk):
         self.preset_name_var.set(self.settings.active_preset)
         self._refresh_preset_names()
         try:
-            save_settings(self.settings)
+            self._save_settings()
         except OSError as error:
             messagebox.showerror("Settings error", f"Could not delete the rule set.\n\n{error}")
             return
         self.recompute_proposed_names()
 
+    def _save_settings(self):
+        """Write the settings now, along with any save that was waiting; raises OSError."""
+        if self._settings_save_job is not None:
+            self.after_cancel(self._settings_save_job)
+            self._settings_save_job = None
+        self.settings_saver.request(self.settings)
+        self.settings_saver.flush()
+
+    def _save_settings_later(self):
+        self.settings_saver.request(self.settings)
+        if self._settings_save_job is not None:
+            self.after_cancel(self._settings_save_job)
+        self._settings_save_job = self.after(SETTINGS_SAVE_DELAY_MS, self._flush_settings)
+
+    def _flush_settings(self):
+        self._settings_save_job = None
+        try:
+            self.settings_saver.flush()
+        except OSError as error:
+            messagebox.showerror("Settings error", f"Could not save the settings.\n\n{error}")
+
     def _refresh_preset_names(self):
         self.preset_combo.configure(values=sorted(self.settings.rule_presets))
 
@@ -853,9 +1210,17 @@ class MusicFixGUI(tk.Tk):
             smart_spaces=bool(self.smart_spaces_var.get()),
             remove_between_enabled=bool(self.between_enabled.get()),
             delimiter_pair=self.between_pair.get(),
-            track_markers=self.track_pair.get(),
-            tag_extract_before=self.tag_extract_before_entry.get(),
-            tag_extract_after=self.tag_extract_after_entry.get(),
+            track_markers=self.track_pair_var.get(),
+            tag_extract_before=self.tag_extract_before_var.get(),
+            tag_extract_after=self.tag_extract_after_var.get(),
+            filename_pattern=self.filename_pattern_var.get(),
+            normalize_steps=[step for step, variable in self.normalize_step_vars.items() if variable.get()],
+            validation_rules=[
+                name for name, variable in self.validation_rule_vars.items() if variable.get()
+            ],
+            genre_whitelist=[
+                genre.strip() for genre in self.genre_whitelist_var.get().split(",") if genre.strip()
+            ],
         )
 
     def _apply_rule_preset(self, preset: RulePreset):
@@ -866,12 +1231,25 @@ class MusicFixGUI(tk.Tk):
         self.between_enabled.set(preset.remove_between_enabled)
         self.between_pair.delete(0, "end")
         self.between_pair.insert(0, preset.delimiter_pair)
-        self.track_pair.delete(0, "end")
-        self.track_pair.insert(0, preset.track_markers)
-        self.tag_extract_before_entry.delete(0, "end")
-        self.tag_extract_before_entry.insert(0, preset.tag_extract_before)
-        self.tag_extract_after_entry.delete(0, "end")
-        self.tag_extract_after_entry.insert(0, preset.tag_extract_after)
+        self.track_pair_var.set(preset.track_markers)
+        self.tag_extract_before_var.set(preset.tag_extract_before)
+        self.tag_extract_after_var.set(preset.tag_extract_after)
+        self.filename_pattern_var.set(preset.filename_pattern)
+        for step, variable in self.normalize_step_vars.items():
+            variable.set(step in preset.normalize_steps)
+        for name, variable in self.validation_rule_vars.items():
+            variable.set(name in preset.validation_rules)
+        self.genre_whitelist_var.set(", ".join(preset.genre_whitelist))
+        self._apply_validation_rules()
+
+    @staticmethod
+    def _validation_rules(preset: RulePreset):
+        return compile_preset(preset).build_validation_rules()
+
+    def _apply_validation_rules(self):
+        self.validation.set_rules(self._validation_rules(self._current_rule_preset()))
+        self._update_view(lambda: self.view.update(self.items))
+        self._refresh_tree()
 
     def reset_settings_defaults(self):
         defaults = AppSettings()
@@ -882,55 +1260,474 @@ class MusicFixGUI(tk.Tk):
         self.recompute_proposed_names()
 
     def choose_folder(self):
+        if self._tasks_busy(TRACKS_RESOURCE):
+            return
         path = filedialog.askdirectory()
         if not path:
             return
         self.folder = Path(path)
+        self.from_library = False
         self.folder_label.config(text=str(self.folder))
         self.selected_artwork = None
         self.scan_folder()
 
     def scan_folder(self):
+        if self.from_library:
+            # Item paths follow the renames made by Apply Changes.
+            self._open_library_paths([item.path for item in self.items])
+            return
         if not self.folder:
             messagebox.showwarning("No folder", "Choose a folder first.")
             return
 
-        self.items = scan_audio_folder(self.folder, self._scan_options())
+        from services.library_service import LIBRARY_PATH, scan_indexed_folder
+
+        folder = self.folder
+        options = self._scan_options()
+        self._start_task(
+            "Scanning",
+            lambda context: scan_indexed_folder(folder, options, context.progress, LIBRARY_PATH),
+            (TRACKS_RESOURCE,),
+            on_done=lambda items: self._scan_finished(items, options),
+            on_cancelled=lambda: self.status_label.config(text="Scan cancelled."),
+        )
 
+    def _scan_finished(self, items: list[TrackItem], options):
+        self._set_items(items)
         self._refresh_tree()
         self.status_label.config(text=f"Loaded {len(self.items)} audio file(s).")
+        if options != self._scan_options():
+            # The filename rules were edited while the folder was being read.
+            self.recompute_proposed_names()
 
-    def _refresh_tree(self):
-        selected = set(self.tree.selection())
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        duplicate_track_ids = get_duplicate_track_ids(self.items)
-        for index, item in enumerate(self.items):
-            iid = str(index)
-            self.tree.insert(
-                "",
-                "end",
-                iid=iid,
-                values=(
-                    item.filename,
-                    item.proposed_filename,
-                    item.effective_tag("title"),
-                    item.effective_tag("artist"),
-                    item.effective_tag("albumartist"),
-                    item.effective_tag("album"),
-                    item.effective_tag("date"),
-                    item.effective_tag("genre"),
-                    item.effective_tag("tracknumber"),
-                    item.effective_artwork_status(),
-                    "; ".join(get_warnings(item, duplicate_track_ids)),
-                ),
+    def search_library(self):
+        from services.library_service import LIBRARY_PATH, LibraryError, LibraryIndex
+
+        artist = self.library_artist_var.get().strip()
+        missing = LIBRARY_MISSING_FIELDS.get(self.library_missing_var.get())
+        try:
+            with LibraryIndex(LIBRARY_PATH) as library:
+                tracks = library.search(
+                    self.library_query_var.get(),
+                    {"artist": artist} if artist else None,
+                    [missing] if missing else (),
+                    limit=LIBRARY_RESULT_LIMIT + 1,
+                )
+        except LibraryError as error:
+            messagebox.showerror("Library error", str(error))
+            return
+        self._library_results = [track.path for track in tracks[:LIBRARY_RESULT_LIMIT]]
+        if len(tracks) > LIBRARY_RESULT_LIMIT:
+            text = f"More than {LIBRARY_RESULT_LIMIT} tracks found; Open Results opens the first ones."
+        else:
+            text = f"{len(tracks)} track(s) found."
+        self.library_result_label.config(text=text)
+
+    def open_library_results(self):
+        if not self._library_results:
+            messagebox.showinfo("Library", "Search the library first; no tracks are found yet.")
+            return
+        if self._tasks_busy(TRACKS_RESOURCE):
+            return
+        self._open_library_paths(self._library_results)
+
+    def _open_library_paths(self, paths: list[Path]):
+        from services.library_service import LIBRARY_PATH, LibraryIndex
+
+        paths = list(paths)
+        options = self._scan_options()
+
+        def load(context):
+            with LibraryIndex(LIBRARY_PATH) as library:
+                return library.load_items(paths, options, context.progress)
+
+        self._start_task(
+            "Opening tracks",
+            load,
+            (TRACKS_RESOURCE,),
+            on_done=lambda result: self._library_tracks_opened(*result, options),
+            on_error=lambda error: messagebox.showerror("Library error", str(error)),
+            on_cancelled=lambda: self.status_label.config(text="Opening tracks cancelled."),
+        )
+
+    def _library_tracks_opened(self, items: list[TrackItem], missing: list[Path], options):
+        self.folder = None
+        self.from_library = True
+        self.selected_artwork = None
+        self.folder_label.config(text=f"Library search: {len(items)} track(s) from several folders")
+        self._scan_finished(items, options)
+        if missing:
+            self.status_label.config(
+                text=f"Loaded {len(items)} audio file(s); {len(missing)} no longer exist and left the library."
             )
-            if iid in selected:
-                self.tree.selection_add(iid)
+
+    def find_duplicates(self):
+        items = self._visible_items()
+        if not items:
+            return
+        from services.duplicate_service import find_duplicates
+
+        paths = [item.path for item in items]
+        self._start_task(
+            "Finding duplicates",
+            lambda context: find_duplicates(paths, context.progress),
+            (TRACKS_RESOURCE,),
+            on_done=self._duplicates_found,
+            on_error=lambda error: messagebox.showerror("Duplicates", f"Could not compare the files.\n\n{error}"),
+            on_cancelled=lambda: self.status_label.config(text="Duplicate search cancelled."),
+        )
+
+    def _duplicates_found(self, groups):
+        self._duplicate_groups = groups
+        # Every copy but the suggested one is marked, e.g. the "- Copy" files.
+        self._duplicates_marked = {
+            path for group in groups for path in group.paths if path != group.suggested_keep()
+        }
+        self._refresh_duplicates_tree()
+        self.status_label.config(text=f"Found {len(groups)} group(s) of duplicate files.")
+
+    def _refresh_duplicates_tree(self):
+        tree = self.duplicates_tree
+        tree.delete(*tree.get_children())
+        for index, group in enumerate(self._duplicate_groups):
+            group_id = tree.insert(
+                "", "end", iid=f"group-{index}", text=f"{len(group.paths)} copies", values=("", ""), open=True
+            )
+            for path in group.paths:
+                action = "Delete" if path in self._duplicates_marked else "Keep"
+                tree.insert(group_id, "end", iid=str(path), text=path.name, values=(action, str(path.parent)))
+        marked = len(self._duplicates_marked)
+        if self._duplicate_groups:
+            text = f"{len(self._duplicate_groups)} group(s); {marked} file(s) marked for deletion."
+        else:
+            text = "No duplicates found yet. Find Duplicates compares the shown tracks."
+        self.duplicates_label.config(text=text)
+
+    def toggle_duplicate_marks(self):
+        groups = {path: group for group in self._duplicate_groups for path in group.paths}
+        refused = []
+        for iid in self.duplicates_tree.selection():
+            path = Path(iid)
+            group = groups.get(path)
+            if group is None:
+                continue
+            if path in self._duplicates_marked:
+                self._duplicates_marked.discard(path)
+            elif sum(other not in self._duplicates_marked for other in group.paths) > 1:
+                self._duplicates_marked.add(path)
+            else:
+                refused.append(path.name)
+        self._refresh_duplicates_tree()
+        if refused:
+            messagebox.showinfo(
+                "Duplicates", "Each group keeps at least one file, so these stay marked Keep:\n\n" + "\n".join(refused)
+            )
+
+    def delete_marked_duplicates(self):
+        if not self._duplicates_marked:
+            messagebox.showinfo("Duplicates", "No files are marked for deletion.")
+            return
+        if self._tasks_busy(TRACKS_RESOURCE):
+            return
+        if not messagebox.askyesno(
+            "Delete duplicates",
+            f"Permanently delete {len(self._duplicates_marked)} file(s)? This cannot be undone.",
+        ):
+            return
+        from services.duplicate_service import delete_duplicates
+        from services.library_service import LIBRARY_PATH, forget_paths
+
+        groups = self._duplicate_groups
+        marked = set(self._duplicates_marked)
+
+        def delete(context):
+            deleted, errors = delete_duplicates(groups, marked, context.progress)
+            forget_paths(deleted, LIBRARY_PATH)
+            return deleted, errors
+
+        self._start_task(
+            "Deleting duplicates",
+            delete,
+            (TRACKS_RESOURCE, FILENAMES_RESOURCE),
+            on_done=lambda result: self._duplicates_deleted(*result),
+            on_error=lambda error: messagebox.showerror("Delete duplicates", f"Could not delete the files.\n\n{error}"),
+            on_cancelled=lambda: self.status_label.config(
+                text="Deleting duplicates cancelled. Find Duplicates again to see what is left."
+            ),
+        )
+
+    def _duplicates_deleted(self, deleted: list[Path], errors: list[str]):
+        self._clear_duplicates()
+        # Only the deleted tracks leave the table; the others keep their pending edits.
+        removed = self.session.remove_paths(deleted)
+        self.validation.remove(removed)
+        self._rendered_items = None
+        self._refresh_tree()
+        self.status_label.config(text=f"Deleted {len(deleted)} duplicate file(s).")
+        message = f"Deleted {len(deleted)} file(s)."
+        if errors:
+            message += "\n\n" + "\n".join(errors[:FILENAME_REPORT_LIMIT])
+            if len(errors) > FILENAME_REPORT_LIMIT:
+                message += f"\n...and {len(errors) - FILENAME_REPORT_LIMIT} more"
+        messagebox.showinfo("Delete duplicates", message)
+
+    def _clear_duplicates(self):
+        """Forget the last duplicate search, whose paths no longer describe the table."""
+        self._duplicate_groups = []
+        self._duplicates_marked = set()
+        if str(self.duplicates_tab) not in self._deferred_tabs:
+            self._refresh_duplicates_tree()
+
+    def _start_task(
+        self,
+        name: str,
+        function,
+        resources=(),
+        on_done=None,
+        on_error=None,
+        on_cancelled=None,
+        show_progress=True,
+    ):
+        """Run function(context) on the task pool; callbacks run on the Tk main loop."""
+        try:
+            task = self.tasks.submit(
+                name,
+                function,
+                resources,
+                on_done=on_done,
+                on_error=on_error,
+                on_progress=(lambda done, total, _message: self._show_task_progress(name, done, total))
+                if show_progress
+                else None,
+                on_cancelled=on_cancelled,
+            )
+        except ResourceBusy as busy:
+            messagebox.showinfo("Please wait", f"{busy.holder.name} is still running. Try again when it finishes.")
+            return None
+        if show_progress:
+            self.status_label.config(text=f"{name}...")
+        self._refresh_task_status()
+        return task
+
+    def _tasks_busy(self, *resources: str) -> bool:
+        for resource in resources:
+            holder = self.tasks.holder(resource)
+            if holder is not None:
+                messagebox.showinfo("Please wait", f"{holder.name} is still running. Try again when it finishes.")
+                return True
+        return False
+
+    def _poll_tasks(self):
+        if self.tasks.poll():
+            self._refresh_task_status()
+        self.after(TASK_POLL_MS, self._poll_tasks)
+
+    def _show_task_progress(self, name: str, done: int, total: int):
+        self.task_progress.configure(maximum=max(total, 1), value=done)
+        self.status_label.config(text=f"{name}... {done} of {total}")
+
+    def _refresh_task_status(self):
+        # Tasks that report progress are the ones the user started and can cancel.
+        if any(task.on_progress for task in self.tasks.running()):
+            self.task_progress.grid()
+            self.task_cancel_button.grid()
+        else:
+            self.task_progress.configure(value=0)
+            self.task_progress.grid_remove()
+            self.task_cancel_button.grid_remove()
+
+    def cancel_tasks(self):
+        for task in self.tasks.running():
+            if task.on_progress:
+                task.cancel()
+
+    def _thumbnails(self):
+        if self._thumbnail_loader is None:
+            from services.thumbnail_service import ThumbnailLoader
+
+            self._thumbnail_loader = ThumbnailLoader()
+        return self._thumbnail_loader
+
+    def _on_close(self):
+        if self._settings_save_job is not None:
+            self.after_cancel(self._settings_save_job)
+            self._flush_settings()
+        self.tasks.shutdown()
+        if self._thumbnail_loader is not None:
+            self._thumbnail_loader.shutdown()
+        self.destroy()
+
+    @property
+    def items(self) -> TrackCollection:
+        return self.session.items
+
+    def _set_items(self, items: list[TrackItem]):
+        # Large folder scans already arrive as a TrackTable; see scan_folder.
+        self.session.load(items).subscribe(self._on_item_changed)
+        self._clear_duplicates()
+        self._changed_items.clear()
+        self._changed_keys.clear()
+        self.validation.reset(self.items)
+
+    def _on_item_changed(self, item: TrackItem, field_name: str, _old, _new):
+        if field_name == REMOVED_FIELD:
+            # Removals are re-validated together by their caller.
+            self._changed_items.pop(id(item), None)
+            return
+        self._changed_items[id(item)] = item
+        self._changed_keys.add(field_name)
+
+    def _refresh_tree(self):
+        """Bring the table up to date after re-validating the items edited since the last redraw.
+
+        Only the visible rows are rendered, and only those whose values changed are rewritten.
+        """
+        changed = list(self._changed_items.values())
+        if changed:
+            changed.extend(self.validation.update(changed, self._changed_keys))
+            self._changed_items = {}
+            self._changed_keys = set()
+        if self._rendered_items is not self.items:
+            self.view.reset(self.items)
+            self.table.set_row_count(len(self.view.rows))
+            self._rendered_items = self.items
+            self._refresh_filter_count()
+        elif changed:
+            self._update_view(lambda: self.view.update(changed))
+        self.table.refresh()
+        self._refresh_artwork_memory()
+        self._refresh_artwork_preview()
+
+    def _update_view(self, update):
+        """Run update() on the view and keep the same items selected in the table."""
+        selection = self.table.selection
+        rows = self.view.rows
+        selected = {id(self.items[rows[row]]) for row in selection.indices}
+        cursor = None if selection.cursor is None else id(self.items[rows[selection.cursor]])
+        update()
+        rows = self.view.rows
+        positions = {id(self.items[index]): row for row, index in enumerate(rows)}
+        self.table.set_row_count(len(rows))
+        selection.set((positions[key] for key in selected if key in positions), positions.get(cursor))
+        self._refresh_filter_count()
+
+    def _refresh_filter_count(self):
+        if self.view.is_filtered:
+            self.filter_count_label.config(text=f"Showing {len(self.view.rows)} of {len(self.items)}")
+        else:
+            self.filter_count_label.config(text="")
+
+    def _visible_items(self) -> list[TrackItem]:
+        if self._tasks_busy(TRACKS_RESOURCE):
+            return []
+        return [self.items[index] for index in self.view.rows]
+
+    def apply_filter(self):
+        self._update_view(lambda: self.view.set_filter(self.filter_var.get()))
+        self.table.refresh()
+        self._refresh_artwork_preview()
+
+    def sort_by_column(self, column: str):
+        # Each click cycles ascending, descending, then back to track order.
+        index = self._table_columns.index(column)
+        if self.view.sort_column != index:
+            sort_column, descending = index, False
+        elif not self.view.descending:
+            sort_column, descending = index, True
+        else:
+            sort_column, descending = None, False
+        self._update_view(lambda: self.view.set_sort(sort_column, descending))
+        for name, heading in self._column_headings.items():
+            if sort_column is not None and name == column:
+                heading += " \u25bc" if descending else " \u25b2"
+            self.tree.heading(name, text=heading)
+        self.table.refresh()
+
+    def _row_values(self, item: TrackItem) -> tuple[str, ...]:
+        return (
+            item.filename,
+            item.proposed_filename,
+            item.effective_tag("title"),
+            item.effective_tag("artist"),
+            item.effective_tag("albumartist"),
+            item.effective_tag("album"),
+            item.effective_tag("date"),
+            item.effective_tag("genre"),
+            item.effective_tag("tracknumber"),
+            item.effective_artwork_status(),
+            "; ".join(self.validation.warnings(item)),
+        )
+
+    def _refresh_artwork_preview(self):
+        # Thumbnails are only decoded for the selected row while the Album Art tab is open.
+        if self.notebook.select() != str(self.album_art_tab):
+            return
+        self._artwork_preview_request += 1
+        items = self._selected_items(show_message=False)
+        if not items:
+            self._show_artwork_preview(None, "No track selected")
+            return
+
+        item = items[0]
+        caption = item.filename
+        if len(items) > 1:
+            caption += f"\n(+{len(items) - 1} more selected)"
+        status = item.effective_artwork_status()
+        if status == "None":
+            self._show_artwork_preview(None, f"{caption}\nNo artwork")
+            return
+        if status == "Remove":
+            self._show_artwork_preview(None, f"{caption}\nArtwork will be removed")
+            return
+
+        caption += "\nPending artwork" if status == "Pending" else "\nEmbedded artwork"
+        artwork = item.pending_artwork if item.artwork_change_pending else None
+        future = self._thumbnails().request(item.path, artwork)
+        self._poll_artwork_preview(future, self._artwork_preview_request, caption)
+
+    def _poll_artwork_preview(self, future, request: int, caption: str):
+        if request != self._artwork_preview_request:
+            return
+        if not future.done():
+            self.after(30, lambda: self._poll_artwork_preview(future, request, caption))
+            return
+        thumbnail = future.result() if future.exception() is None else None
+        if thumbnail is None:
+            self._show_artwork_preview(None, caption + "\n(preview unavailable)")
+            return
+        self._show_artwork_preview(thumbnail, caption)
+
+    def _show_artwork_preview(self, thumbnail: bytes | None, caption: str):
+        if thumbnail is None:
+            self._artwork_preview_image = None
+            self.artwork_preview_label.config(image="", text=caption)
+            return
+        import base64
+
+        image = tk.PhotoImage(data=base64.b64encode(thumbnail).decode("ascii"))
+        self._artwork_preview_image = image
+        self.artwork_preview_label.config(image=image, text=caption)
+
+    def _refresh_artwork_memory(self):
+        if str(self.album_art_tab) in self._deferred_tabs:
+            return
+        count = len(self.artwork_store)
+        if not count:
+            self.artwork_memory_label.config(text="")
+            return
+        self.artwork_memory_label.config(
+            text=f"Artwork in memory: {count} image(s), "
+            f"{format_byte_size(self.artwork_store.memory_usage())}"
+        )
 
     def _selected_items(self, show_message=True) -> list[TrackItem]:
-        selected = [self.items[int(iid)] for iid in self.tree.selection()]
+        # Items are read and renamed by scan and apply tasks; edits wait until they finish.
+        if self.tasks.holder(TRACKS_RESOURCE) is not None:
+            if show_message:
+                self._tasks_busy(TRACKS_RESOURCE)
+            return []
+        rows = self.view.rows
+        selected = [self.items[rows[row]] for row in self.table.selected_indices()]
         if not selected and show_message:
             messagebox.showinfo("No selection", "Select one or more tracks first.")
         return selected
@@ -942,179 +1739,235 @@ class MusicFixGUI(tk.Tk):
         self._apply_tag(self._selected_items(), self.tag_value_entry.get())
 
     def apply_tag_to_all(self):
-        self._apply_tag(self.items, self.tag_value_entry.get())
+        self._apply_tag(self._visible_items(), self.tag_value_entry.get())
 
-    def _apply_tag(self, items: list[TrackItem], value: str):
-        if not items:
-            return
-        value = value.strip()
-        if not value:
-            messagebox.showwarning("Empty value", "Enter a value, or use Erase to remove the tag.")
-            return
-        key = self._selected_tag_key()
-        for item in items:
-            item.set_pending_tag(key, value)
+    def _edit(self, edit) -> EditSummary | None:
+        """Run a session edit and redraw the changed rows, or show why it was refused."""
+        try:
+            summary = edit()
+        except EditError as error:
+            messagebox.showwarning(error.title, error.message)
+            return None
         self._refresh_tree()
+        return summary
+
+    def _apply_tag(self, items: list[TrackItem], value: str):
+        if items:
+            self._edit(lambda: self.session.set_tag(self._selected_tag_key(), value, items))
 
     def erase_tag_from_selected(self):
         self._erase_tag(self._selected_items())
 
     def erase_tag_from_all(self):
-        self._erase_tag(self.items)
+        self._erase_tag(self._visible_items())
 
     def _erase_tag(self, items: list[TrackItem]):
-        if not items:
-            return
-        key = self._selected_tag_key()
-        for item in items:
-            item.erase_tag(key)
-        self._refresh_tree()
+        if items:
+            self._edit(lambda: self.session.erase_tag(self._selected_tag_key(), items))
 
     def reset_tag_for_selected(self):
         self._reset_tag(self._selected_items())
 
     def reset_tag_for_all(self):
-        self._reset_tag(self.items)
+        self._reset_tag(self._visible_items())
 
     def _reset_tag(self, items: list[TrackItem]):
-        if not items:
-            return
-        key = self._selected_tag_key()
-        for item in items:
-            item.reset_pending_tag(key)
-        self._refresh_tree()
+        if items:
+            self._edit(lambda: self.session.reset_tag(self._selected_tag_key(), items))
 
     def extract_titles_from_filenames(self):
-        for item in self.items:
-            item.set_pending_tag("title", title_from_filename(item.proposed_filename))
-        self._refresh_tree()
+        items = self._visible_items()
+        if not items:
+            return
+        summary = self._edit(lambda: self.session.titles_from_filenames(items))
+        if summary is None:
+            return
         messagebox.showinfo(
             "Extract Title",
-            f"Set titles from the proposed filenames for {len(self.items)} file(s).",
+            f"Set titles from the proposed filenames for {summary.applied} file(s).",
         )
 
     def extract_tag_from_selected_filenames(self):
         self._extract_tag_from_filenames(self._selected_items())
 
     def extract_tag_from_all_filenames(self):
-        self._extract_tag_from_filenames(self.items)
+        self._extract_tag_from_filenames(self._visible_items())
 
     def _extract_tag_from_filenames(self, items: list[TrackItem]):
         if not items:
             return
-        text_before = self.tag_extract_before_entry.get()
-        text_after = self.tag_extract_after_entry.get()
-        if not text_before and not text_after:
-            messagebox.showwarning(
-                "Extraction boundaries required",
-                "Enter text that appears before or after the value you want to extract.",
+        summary = self._edit(
+            lambda: self.session.extract_tag_from_filenames(
+                self._selected_tag_key(),
+                self.tag_extract_before_var.get(),
+                self.tag_extract_after_var.get(),
+                items,
             )
-            return
-
-        key = self._selected_tag_key()
-        changed = 0
-        for item in items:
-            value = extract_tag_value_from_filename(
-                item.proposed_filename,
-                text_before,
-                text_after,
+        )
+        if summary is not None:
+            messagebox.showinfo(
+                "Extract Tag",
+                f"Extracted {self.tag_field_var.get()} for {summary.applied} file(s).",
             )
-            if value is not None:
-                item.set_pending_tag(key, value)
-                changed += 1
 
-        self._refresh_tree()
-        messagebox.showinfo(
-            "Extract Tag",
-            f"Extracted {self.tag_field_var.get()} for {changed} file(s).",
+    def extract_fields_from_selected_filenames(self):
+        self._extract_fields_from_filenames(self._selected_items())
+
+    def extract_fields_from_all_filenames(self):
+        self._extract_fields_from_filenames(self._visible_items())
+
+    def _extract_fields_from_filenames(self, items: list[TrackItem]):
+        if not items:
+            return
+        summary = self._edit(
+            lambda: self.session.extract_fields_from_filenames(self.filename_pattern_var.get(), items)
+        )
+        if summary is None:
+            return
+        message = f"Extracted {summary.field} for {summary.applied} file(s)."
+        if summary.unmatched:
+            shown = "\n".join(summary.unmatched[:FILENAME_REPORT_LIMIT])
+            more = len(summary.unmatched) - FILENAME_REPORT_LIMIT
+            message += f"\n\n{len(summary.unmatched)} file(s) did not match the pattern:\n{shown}"
+            if more > 0:
+                message += f"\n...and {more} more"
+        messagebox.showinfo("Extract Fields", message)
+
+    def normalize_selected_tags(self):
+        self._normalize_tags(self._selected_items())
+
+    def normalize_all_tags(self):
+        self._normalize_tags(self._visible_items())
+
+    def _normalize_tags(self, items: list[TrackItem]):
+        if not items:
+            return
+        normalizer = compile_preset(self._current_rule_preset()).tag_normalizer
+        summaries = self._edit(lambda: self.session.normalize_tags(normalizer, items))
+        if summaries is None:
+            return
+        labels = {field.key: field.label for field in TAG_FIELDS}
+        changed = [f"{labels[summary.field]}: {summary.changed}" for summary in summaries if summary.changed]
+        message = "Changed values per field:\n" + "\n".join(changed) if changed else "Every tag is already normalized."
+        messagebox.showinfo("Normalize Tags", message)
+
+    def export_tags(self):
+        items = self._visible_items()
+        if not items or self._tasks_busy(TRACKS_RESOURCE):
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Tags",
+            defaultextension=".csv",
+            filetypes=TAG_FILE_TYPES,
+        )
+        if not path:
+            return
+        from services.export_service import export_tracks
+
+        warnings = self.validation.warnings
+        self._start_task(
+            "Exporting tags",
+            lambda context: export_tracks(items, Path(path), warnings, fingerprints=True, progress=context.progress),
+            (TRACKS_RESOURCE,),
+            on_done=lambda count: self.status_label.config(text=f"Exported {count} track(s) to {Path(path).name}."),
+            on_error=lambda error: messagebox.showerror("Export error", f"Could not export the tags.\n\n{error}"),
+            on_cancelled=lambda: self.status_label.config(text="Export cancelled."),
         )
 
-    def move_selected(self, direction: int):
-        selected = self.tree.selection()
-        if not selected:
+    def import_tags(self):
+        items = self._visible_items()
+        if not items or self._tasks_busy(TRACKS_RESOURCE):
             return
+        path = filedialog.askopenfilename(title="Import Tags", filetypes=TAG_FILE_TYPES)
+        if not path:
+            return
+        summary = self._edit(lambda: self.session.import_tags(Path(path), items))
+        if summary is None:
+            return
+        message = f"Changed tags of {summary.changed} file(s); {summary.unchanged} already matched."
+        if summary.skipped:
+            shown = "\n".join(summary.unmatched[:FILENAME_REPORT_LIMIT])
+            message += f"\n\n{summary.skipped} row(s) matched no shown track:\n{shown}"
+            if summary.skipped > FILENAME_REPORT_LIMIT:
+                message += f"\n...and {summary.skipped - FILENAME_REPORT_LIMIT} more"
+        messagebox.showinfo("Import Tags", message)
 
-        indices = sorted(int(iid) for iid in selected)
-        if direction < 0:
-            for index in indices:
-                if index > 0:
-                    self.items[index - 1], self.items[index] = self.items[index], self.items[index - 1]
-        else:
-            for index in reversed(indices):
-                if index < len(self.items) - 1:
-                    self.items[index + 1], self.items[index] = self.items[index], self.items[index + 1]
+    def move_selected(self, direction: int):
+        indices = self.table.selected_indices()
+        if not indices or self._tasks_busy(TRACKS_RESOURCE):
+            return
+        if self.view.is_sorted:
+            messagebox.showinfo(
+                "Sorted table",
+                "Tracks can only be moved in track order. Click the sorted column heading until its arrow disappears.",
+            )
+            return
 
-        self._refresh_tree()
-        self.tree.selection_set(
-            [str(max(0, min(len(self.items) - 1, index + direction))) for index in indices]
-        )
+        if direction > 0:
+            indices.reverse()
+        # Rows map to item positions; swapping two shown items keeps the set of shown positions.
+        rows = self.view.rows
+        # A selected row stuck at the edge also holds back the selected rows behind it.
+        limit = -1 if direction < 0 else len(rows)
+        moved = []
+        for row in indices:
+            target = row + direction
+            if target == limit:
+                limit = row
+                moved.append(row)
+                continue
+            first, second = rows[row], rows[target]
+            self.items.swap(first, second)
+            moved.append(target)
+        self.table.select(moved, cursor=min(moved) if direction < 0 else max(moved))
 
     def apply_order_as_track_numbers(self):
-        for index, item in enumerate(self.items, start=1):
-            item.set_pending_tag("tracknumber", f"{index:02d}")
-        self._refresh_tree()
+        self._number_tracks(self._visible_items())
+
+    def _number_tracks(self, items: list[TrackItem]):
+        self._edit(lambda: self.session.number_tracks(items))
 
     def renumber_duplicates_by_table_order(self):
-        if not get_duplicate_track_ids(self.items):
+        if not self.validation.duplicate_track_ids():
             messagebox.showinfo("No duplicates", "No duplicate track numbers were found.")
             return
         if not messagebox.askyesno(
             "Renumber tracks",
-            "To guarantee unique track numbers, all tracks will be numbered using the current table order. Continue?",
+            "To guarantee unique track numbers, all tracks will be numbered in track order, "
+            "including tracks hidden by the filter. Continue?",
         ):
             return
-        self.apply_order_as_track_numbers()
-
-    def extract_track_from_titles(self):
-        pair = self.track_pair.get().strip()
-        if len(pair) != 2:
-            messagebox.showwarning(
-                "Invalid extract markers",
-                "Extract markers must be exactly 2 characters, such as [], %%, or ''.",
-            )
+        if self._tasks_busy(TRACKS_RESOURCE):
             return
+        self._number_tracks(list(self.items))
 
-        changed = 0
-        for item in self.items:
-            if item.effective_tag("tracknumber"):
-                continue
-            title = Path(item.proposed_filename).stem
-            track_number = extract_index_with_pair(title, pair)
-            if track_number is not None:
-                item.set_pending_tag("tracknumber", f"{track_number:02d}")
-                changed += 1
-
-        self._refresh_tree()
-        messagebox.showinfo("Extract Track #", f"Set track numbers for {changed} file(s).")
+    def extract_track_from_titles(self):
+        summary = self._edit(
+            lambda: self.session.track_numbers_from_filenames(self.track_pair_var.get(), self._visible_items())
+        )
+        if summary is not None:
+            messagebox.showinfo("Extract Track #", f"Set track numbers for {summary.applied} file(s).")
 
     def set_track_selected(self):
         value = self.track_value_entry.get().strip()
         if not value:
             messagebox.showwarning("Empty value", "Enter a track number first.")
             return
-        for item in self._selected_items():
-            item.set_pending_tag("tracknumber", value)
-        self._refresh_tree()
+        self._edit(lambda: self.session.set_tag("tracknumber", value, self._selected_items()))
 
     def erase_track_selected(self):
-        for item in self._selected_items():
-            item.erase_tag("tracknumber")
-        self._refresh_tree()
+        self._edit(lambda: self.session.erase_tag("tracknumber", self._selected_items()))
 
     def clear_track_selected(self):
-        for item in self._selected_items():
-            item.reset_pending_tag("tracknumber")
-        self._refresh_tree()
+        self._edit(lambda: self.session.reset_tag("tracknumber", self._selected_items()))
 
     def clear_track_all(self):
-        for item in self.items:
-            item.reset_pending_tag("tracknumber")
-        self._refresh_tree()
+        self._edit(lambda: self.session.reset_tag("tracknumber", self._visible_items()))
 
     def clear_all_changes(self):
-        for item in self.items:
-            item.clear_pending_tags()
-            item.reset_pending_artwork()
+        if self._tasks_busy(TRACKS_RESOURCE):
+            return
+        self.session.clear_changes()
         self.recompute_proposed_names()
 
     def _choose_artwork(self):
@@ -1124,14 +1977,20 @@ class MusicFixGUI(tk.Tk):
         )
         if not path:
             return None
+        from services.artwork_service import ArtworkError, load_artwork_file
+
         try:
-            artwork = load_artwork_file(Path(path))
+            artwork = load_artwork_file(Path(path), self.artwork_store)
         except (ArtworkError, OSError) as error:
             messagebox.showerror("Artwork error", str(error))
             return None
+        embedded = self._artwork_to_embed(artwork)
+        if embedded is None:
+            # An image that cannot be resized is not kept as the selection.
+            return None
         self.artwork_file_label.config(text=f"Selected image: {artwork.source_name}")
         self.selected_artwork = artwork
-        return artwork
+        return embedded
 
     def use_artwork_from_selected_track(self):
         items = self._selected_items()
@@ -1142,19 +2001,63 @@ class MusicFixGUI(tk.Tk):
             return
 
         source = items[0]
-        artwork = source.pending_artwork if source.artwork_change_pending else extract_embedded_artwork(source.path)
+        if source.artwork_change_pending:
+            self._use_source_artwork(source, source.pending_artwork)
+            return
+        from services.artwork_service import extract_embedded_artwork
+
+        path = source.path
+        store = self.artwork_store
+        self._start_task(
+            "Reading artwork",
+            lambda _context: extract_embedded_artwork(path, store),
+            (ARTWORK_RESOURCE,),
+            on_done=lambda artwork: self._use_source_artwork(source, artwork),
+            show_progress=False,
+        )
+
+    def _use_source_artwork(self, source: TrackItem, artwork):
         if artwork is None:
             messagebox.showinfo("No artwork", "The selected track does not contain embedded artwork.")
             return
 
         self.selected_artwork = artwork
         self.artwork_file_label.config(text=f"Selected image: embedded artwork from {source.filename}")
+        self._artwork_to_embed(artwork)
 
     def _get_selected_artwork(self):
         if self.selected_artwork is not None:
-            return self.selected_artwork
+            return self._artwork_to_embed(self.selected_artwork)
         return self._choose_artwork()
 
+    def _artwork_to_embed(self, artwork):
+        """Return the image that will be written, showing its size before and after."""
+        embedded = artwork
+        if self.artwork_normalize_var.get():
+            from services.artwork_service import ArtworkError, normalize_artwork
+
+            artwork_settings = self._current_artwork_settings()
+            if artwork_settings is None:
+                return None
+            try:
+                embedded = normalize_artwork(
+                    artwork,
+                    self.artwork_store,
+                    artwork_settings.max_edge,
+                    artwork_settings.jpeg_quality,
+                    artwork_settings.progressive,
+                )
+            except ArtworkError as error:
+                messagebox.showerror("Artwork error", str(error))
+                return None
+
+        size_text = f"Size: {format_byte_size(len(artwork.data))}"
+        if embedded is not artwork:
+            size_text += f" \u2192 {format_byte_size(len(embedded.data))} after resizing"
+        self.artwork_size_label.config(text=size_text)
+        self._refresh_artwork_memory()
+        return embedded
+
     def set_artwork_for_selected(self):
         items = self._selected_items()
         if not items:
@@ -1162,9 +2065,7 @@ class MusicFixGUI(tk.Tk):
         artwork = self._get_selected_artwork()
         if artwork is None:
             return
-        for item in items:
-            item.set_pending_artwork(artwork)
-        self._refresh_tree()
+        self._edit(lambda: self.session.set_artwork(artwork, items))
 
     def set_artwork_for_all(self):
         if not self.items:
@@ -1172,49 +2073,76 @@ class MusicFixGUI(tk.Tk):
         artwork = self._get_selected_artwork()
         if artwork is None:
             return
-        for item in self.items:
-            item.set_pending_artwork(artwork)
-        self._refresh_tree()
+        self._edit(lambda: self.session.set_artwork(artwork, self._visible_items()))
 
     def remove_artwork_from_selected(self):
-        for item in self._selected_items():
-            item.erase_artwork()
-        self._refresh_tree()
+        self._edit(lambda: self.session.remove_artwork(self._selected_items()))
 
     def remove_artwork_from_all(self):
-        for item in self.items:
-            item.erase_artwork()
-        self._refresh_tree()
+        self._edit(lambda: self.session.remove_artwork(self._visible_items()))
 
     def reset_artwork_for_selected(self):
-        for item in self._selected_items():
-            item.reset_pending_artwork()
-        self._refresh_tree()
+        self._edit(lambda: self.session.reset_artwork(self._selected_items()))
 
     def reset_artwork_for_all(self):
-        for item in self.items:
-            item.reset_pending_artwork()
-        self._refresh_tree()
+        self._edit(lambda: self.session.reset_artwork(self._visible_items()))
 
     def _scan_options(self):
-        return ScanOptions(
-            remove_rules=self.remove_text.get("1.0", "end").splitlines(),
-            smart_spaces=bool(self.smart_spaces_var.get()),
-            remove_between_enabled=bool(self.between_enabled.get()),
-            delimiter_pair=self.between_pair.get(),
-        )
+        from services.scanner import ScanOptions
+
+        return ScanOptions.from_preset(self._current_rule_preset())
 
     def recompute_proposed_names(self):
+        """Recompute proposed filenames off the main loop, coalescing rapid edits to the rules."""
+        if self._recompute_task is not None:
+            self._recompute_task.cancel()
+            self._recompute_again = True
+            return
+        if self.tasks.holder(FILENAMES_RESOURCE) is not None:
+            # Apply is running; the rescan that follows it uses the current rules.
+            return
+        items = self.items
+        if not items:
+            return
+        from services.scanner import propose_filename
+
+        filenames = [item.filename for item in items]
         options = self._scan_options()
-        for item in self.items:
-            item.proposed_filename, item.validation_warnings = propose_filename(item.filename, options)
+
+        def propose_all(context):
+            proposals = []
+            for index, filename in enumerate(filenames):
+                if index % 500 == 0:
+                    context.token.raise_if_cancelled()
+                proposals.append(propose_filename(filename, options))
+            return proposals
+
+        self._recompute_task = self._start_task(
+            "Updating proposed filenames",
+            propose_all,
+            (FILENAMES_RESOURCE,),
+            on_done=lambda proposals: self._recompute_finished(items, proposals),
+            on_cancelled=lambda: self._recompute_finished(items, None),
+            show_progress=False,
+        )
+
+    def _recompute_finished(self, items: TrackCollection, proposals):
+        self._recompute_task = None
+        if self._recompute_again:
+            self._recompute_again = False
+            self.recompute_proposed_names()
+            return
+        if proposals is None or items is not self.items:
+            return
+        for item, proposal in zip(items, proposals):
+            item.set_proposed_filename(*proposal)
         self._refresh_tree()
 
     def apply_changes(self):
-        if not self.folder or not self.items:
+        if not self.items:
             return
 
-        duplicate_track_ids = get_duplicate_track_ids(self.items)
+        duplicate_track_ids = self.validation.duplicate_track_ids()
         if duplicate_track_ids:
             duplicate_list = ", ".join(
                 sorted(
@@ -1224,7 +2152,7 @@ class MusicFixGUI(tk.Tk):
             )
             messagebox.showwarning(
                 "Duplicate track numbers",
-                "Two or more tracks share the same track number.\n\n"
+                "Two or more tracks in the same folder share the same track number.\n\n"
                 f"Duplicate track numbers: {duplicate_list}\n\n"
                 "Correct them in the Track Order tab before applying changes.",
             )
@@ -1233,13 +2161,36 @@ class MusicFixGUI(tk.Tk):
         if not messagebox.askyesno("Apply", "This will rename files and write tags. Continue?"):
             return
 
-        try:
-            result = apply_item_changes(self.folder, self.items)
-        except ApplyError as error:
-            detail = f"\n\nTechnical detail: {error.technical_detail}" if error.technical_detail else ""
-            messagebox.showerror("Apply failed", error.message + detail)
-            return
+        from services.apply_service import apply_changes as apply_item_changes
+
+        # Renames would leave the duplicate groups pointing at old paths.
+        self._clear_duplicates()
+        folder = self.folder
+        items = list(self.items)
+        old_paths = [item.path for item in items]
+
+        def apply(context):
+            if folder is not None:
+                return apply_item_changes(folder, items, context.progress)
+            from services.apply_service import apply_changes_by_folder
+            from services.library_service import LIBRARY_PATH, forget_paths
+
+            try:
+                return apply_changes_by_folder(items, context.progress)
+            finally:
+                # Library tracks are reopened by path, so renamed files drop their old rows.
+                forget_paths([old for old, item in zip(old_paths, items) if item.path != old], LIBRARY_PATH)
+
+        self._start_task(
+            "Applying changes",
+            apply,
+            (TRACKS_RESOURCE, FILENAMES_RESOURCE),
+            on_done=self._apply_finished,
+            on_error=self._apply_failed,
+            on_cancelled=self._apply_cancelled,
+        )
 
+    def _apply_finished(self, result):
         self.scan_folder()
         message = (
             f"Changes applied.\n\nRenamed: {result.renamed_files}\n"
@@ -1255,6 +2206,21 @@ class MusicFixGUI(tk.Tk):
             message += f"\n\n{len(result.artwork_errors)} file(s) failed while saving artwork."
         messagebox.showinfo("Apply Changes", message)
 
+    def _apply_failed(self, error: Exception):
+        from services.apply_service import ApplyError
+
+        if isinstance(error, ApplyError):
+            detail = f"\n\nTechnical detail: {error.technical_detail}" if error.technical_detail else ""
+            messagebox.showerror("Apply failed", error.message + detail)
+        else:
+            messagebox.showerror("Apply failed", f"{type(error).__name__}: {error}")
+            self.scan_folder()
+
+    def _apply_cancelled(self):
+        # Files written before the cancel keep their changes; rescan to show what is on disk.
+        self.scan_folder()
+        messagebox.showinfo("Apply Changes", "Apply was cancelled. Files already written keep their changes.")
+
     def show_remove_rules_help(self):
         messagebox.showinfo(
             "Filename Cleanup Help",
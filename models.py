@@ -1,16 +1,50 @@
-from dataclasses import dataclass, field
+import sys
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
 
+# Values that repeat across every track of an album are interned so a large scan
+# holds one string object per distinct value instead of one per track.
+INTERNED_TAG_KEYS = frozenset({"albumartist", "artist", "album", "date", "genre"})
+
+
+def intern_tag_values(tags: dict[str, str]) -> dict[str, str]:
+    return {
+        key: sys.intern(value) if key in INTERNED_TAG_KEYS else value
+        for key, value in tags.items()
+    }
+
+
 @dataclass(frozen=True)
 class ArtworkData:
     data: bytes
     mime: str
     source_name: str = ""
+    # Content hash set by ArtworkStore, empty otherwise. It keys the store, the resized-artwork
+    # cache and the thumbnail cache; writing artwork to files does not use it.
+    digest: str = ""
+
+
+# Field names used in change events besides tag keys.
+FILENAME_FIELD = "filename"
+ARTWORK_FIELD = "artwork"
+# Sent by TrackCollection.remove() for each item it drops.
+REMOVED_FIELD = "removed"
+
+# Called as listener(item, field, old, new) after a field changes.
+ChangeListener = Callable[["TrackItem", str, object, object], None]
+
+
+class _ChangeTracking:
+    """Edit bookkeeping kept out of the dataclass fields, so fields(), asdict(),
+    replace() and copies never carry it over."""
+
+    __slots__ = ("_dirty", "_listener")
 
 
-@dataclass
-class TrackItem:
+@dataclass(slots=True)
+class TrackItem(_ChangeTracking):
     path: Path
     filename: str
     ext: str
@@ -25,36 +59,171 @@ class TrackItem:
     pending_artwork: ArtworkData | None = None
     artwork_change_pending: bool = False
 
+    def __post_init__(self):
+        # Fields changed since the last mark_clean(); None while clean.
+        self._dirty = None
+        self._listener = None
+
+    def __copy__(self) -> "TrackItem":
+        return replace(self)
+
     def effective_tag(self, key: str) -> str:
         if key in self.pending_tags:
             return self.pending_tags[key]
         return self.tags.get(key, "")
 
-    def set_pending_tag(self, key: str, value: str) -> None:
-        self.pending_tags[key] = value
+    # The edit methods return whether the item changed.
 
-    def erase_tag(self, key: str) -> None:
-        self.pending_tags[key] = ""
+    def set_pending_tag(self, key: str, value: str) -> bool:
+        # Hot path for bulk edits: effective_tag() and _changed() are inlined.
+        pending = self.pending_tags
+        old = pending[key] if key in pending else self.tags.get(key, "")
+        pending[key] = value
+        if old == value:
+            return False
+        dirty = self._dirty
+        if dirty is None:
+            self._dirty = {key}
+        else:
+            dirty.add(key)
+        if self._listener is not None:
+            self._listener(self, key, old, value)
+        return True
 
-    def reset_pending_tag(self, key: str) -> None:
-        self.pending_tags.pop(key, None)
+    def erase_tag(self, key: str) -> bool:
+        return self.set_pending_tag(key, "")
 
-    def clear_pending_tags(self) -> None:
-        self.pending_tags.clear()
+    def reset_pending_tag(self, key: str) -> bool:
+        if key not in self.pending_tags:
+            return False
+        old = self.pending_tags.pop(key)
+        new = self.tags.get(key, "")
+        if old == new:
+            return False
+        self._changed(key, old, new)
+        return True
 
-    def set_pending_artwork(self, artwork: ArtworkData) -> None:
-        self.pending_artwork = artwork
-        self.artwork_change_pending = True
+    def clear_pending_tags(self) -> bool:
+        changed = False
+        for key in list(self.pending_tags):
+            changed = self.reset_pending_tag(key) or changed
+        return changed
+
+    def set_pending_artwork(self, artwork: ArtworkData) -> bool:
+        return self._set_artwork_state(artwork, True)
+
+    def erase_artwork(self) -> bool:
+        return self._set_artwork_state(None, True)
+
+    def reset_pending_artwork(self) -> bool:
+        return self._set_artwork_state(None, False)
+
+    def set_proposed_filename(self, proposed_filename: str, validation_warnings: list[str]) -> None:
+        old = self.proposed_filename
+        changed = old != proposed_filename or self.validation_warnings != validation_warnings
+        self.proposed_filename = proposed_filename
+        self.validation_warnings = validation_warnings
+        if changed:
+            self._changed(FILENAME_FIELD, old, proposed_filename)
+
+    @property
+    def dirty_fields(self) -> frozenset[str]:
+        return frozenset(self._dirty or ())
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty is not None
 
-    def erase_artwork(self) -> None:
-        self.pending_artwork = None
-        self.artwork_change_pending = True
+    def mark_clean(self) -> None:
+        self._dirty = None
 
-    def reset_pending_artwork(self) -> None:
-        self.pending_artwork = None
-        self.artwork_change_pending = False
+    def _set_artwork_state(self, artwork: ArtworkData | None, change_pending: bool) -> bool:
+        if self.pending_artwork is artwork and self.artwork_change_pending == change_pending:
+            return False
+        old = self.effective_artwork_status()
+        self.pending_artwork = artwork
+        self.artwork_change_pending = change_pending
+        # Artwork events carry the status shown in the table.
+        self._changed(ARTWORK_FIELD, old, self.effective_artwork_status())
+        return True
+
+    def _changed(self, field_name: str, old, new) -> None:
+        if self._dirty is None:
+            self._dirty = {field_name}
+        else:
+            self._dirty.add(field_name)
+        if self._listener is not None:
+            self._listener(self, field_name, old, new)
 
     def effective_artwork_status(self) -> str:
         if self.artwork_change_pending:
             return "Pending" if self.pending_artwork is not None else "Remove"
         return "Embedded" if self.artwork_present else "None"
+
+
+class TrackCollection:
+    """The ordered items of a scan, forwarding their change events.
+
+    Subscribers are called as callback(item, field, old, new) for every change
+    to an item in the collection. Fields are tag keys, FILENAME_FIELD,
+    ARTWORK_FIELD or REMOVED_FIELD. Reordering items does not emit events.
+    """
+
+    def __init__(self, items: Iterable[TrackItem] = ()):
+        self._items: list[TrackItem] = []
+        self._subscribers: list[ChangeListener] = []
+        for item in items:
+            self.append(item)
+
+    def subscribe(self, callback: ChangeListener) -> None:
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: ChangeListener) -> None:
+        self._subscribers.remove(callback)
+
+    def append(self, item: TrackItem) -> None:
+        item._listener = self._item_changed
+        self._items.append(item)
+
+    def remove(self, items: Iterable[TrackItem]) -> list[TrackItem]:
+        """Drop items, e.g. deleted files; returns the ones that were in the collection.
+
+        Each dropped item is reported once with REMOVED_FIELD.
+        """
+        doomed = {id(item) for item in items}
+        removed = [item for item in self._items if id(item) in doomed]
+        self._items = [item for item in self._items if id(item) not in doomed]
+        for item in removed:
+            item._listener = None
+            self._item_changed(item, REMOVED_FIELD, None, None)
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __setitem__(self, index: int, item: TrackItem) -> None:
+        """Replace the item at index; the replaced item stops reporting to the collection."""
+        self._items[index]._listener = None
+        item._listener = self._item_changed
+        self._items[index] = item
+
+    def swap(self, first: int, second: int) -> None:
+        items = self._items
+        items[first], items[second] = items[second], items[first]
+
+    def dirty_items(self) -> list[TrackItem]:
+        return [item for item in self._items if item.is_dirty]
+
+    def mark_clean(self) -> None:
+        for item in self._items:
+            item.mark_clean()
+
+    def _item_changed(self, item: TrackItem, field_name: str, old, new) -> None:
+        for callback in self._subscribers:
+            callback(item, field_name, old, new)
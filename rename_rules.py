@@ -1,8 +1,11 @@
 import re
 
 
+_WHITESPACE = re.compile(r"\s+")
+
+
 def clean_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    return _WHITESPACE.sub(" ", s).strip()
 
 
 def safe_filename(name: str) -> str:
@@ -55,21 +58,31 @@ def build_fuzzy_pattern(literal: str) -> re.Pattern:
     return re.compile(esc, flags=re.IGNORECASE)
 
 
-def apply_remove_rules(name_no_ext: str, rules: list[str], smart_spaces: bool) -> str:
-    s = name_no_ext
+def compile_remove_rules(rules: list[str], smart_spaces: bool) -> tuple[re.Pattern | str, ...]:
+    """Prepare remove rules once: fuzzy patterns with smart spacing, plain text otherwise."""
+    compiled = []
     for rule in rules:
         rule = rule.strip()
-        if not rule:
-            continue
-        if smart_spaces:
-            pat = build_fuzzy_pattern(rule)
-            s = pat.sub("", s)
-        else:
+        if rule:
+            compiled.append(build_fuzzy_pattern(rule) if smart_spaces else rule)
+    return tuple(compiled)
+
+
+def apply_compiled_remove_rules(name_no_ext: str, rules: tuple[re.Pattern | str, ...]) -> str:
+    s = name_no_ext
+    for rule in rules:
+        if isinstance(rule, str):
             s = s.replace(rule, "")
+        else:
+            s = rule.sub("", s)
         s = clean_spaces(s)
     return s
 
 
+def apply_remove_rules(name_no_ext: str, rules: list[str], smart_spaces: bool) -> str:
+    return apply_compiled_remove_rules(name_no_ext, compile_remove_rules(rules, smart_spaces))
+
+
 def remove_between_delims(s: str, left: str, right: str) -> str:
     """
     Removes text between delimiters INCLUDING delimiters.
@@ -0,0 +1,415 @@
+"""Run scan, propose and apply jobs for other machines over local HTTP.
+
+    python -m server --root DIR [--root DIR ...] [--host 127.0.0.1] [--port 8765] [--workers 2]
+
+The server has no authentication, so only folders inside a --root can be
+changed. Web pages cannot reach it either: POST bodies must be sent as
+application/json, requests from a browser Origin other than this machine
+are refused, and the Host header must be an IP address or localhost, which
+stops DNS rebinding.
+
+POST /rpc takes JSON-RPC 2.0 calls. scan, propose and apply queue a job and
+return {"job": ID}; status, result, cancel and jobs look after it, and presets
+lists the saved rule sets. GET /jobs/ID/events streams the job's status, one
+JSON object per line, until it finishes. At most --workers jobs run at once,
+and jobs on the same folder run one after another.
+"""
+
+import argparse
+import inspect
+import ipaddress
+import json
+import re
+import sys
+from collections.abc import Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from models import TrackItem
+from services.apply_service import ApplyResult, items_with_changes, rename_files, write_item_changes
+from services.batch_service import BatchActions, apply_result_record, plan_records, resolve_tag_key, track_record
+from services.job_service import CANCELLED, DONE, FAILED, FINISHED_STATES, JobContext, JobNotFound, JobQueue
+from services.scanner import ScanOptions, list_audio_files, read_track
+from services.session import EditError
+from services.settings_service import SETTINGS_PATH, RulePreset, load_settings
+
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+JOB_NOT_FOUND = -32001
+JOB_NOT_FINISHED = -32002
+JOB_FAILED = -32003
+
+# A status line is sent at least this often while a job is quiet, so clients
+# can tell a long file from a dropped connection.
+EVENT_KEEPALIVE_SECONDS = 15.0
+MAX_REQUEST_BYTES = 1024 * 1024
+
+_EVENTS_PATH = re.compile(r"^/jobs/([^/]+)/events$")
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str, data=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class BatchRpc:
+    """The JSON-RPC methods, each taking named or positional params.
+
+    Only folders inside roots can be scanned or changed; with no roots, none can.
+    """
+
+    def __init__(self, jobs: JobQueue, settings_path: Path = SETTINGS_PATH, roots: Iterable[Path] = ()):
+        self.jobs = jobs
+        self.settings_path = settings_path
+        self.roots = [root.resolve() for root in roots]
+        self._methods = {
+            "scan": self.scan,
+            "propose": self.propose,
+            "apply": self.apply,
+            "status": self.status,
+            "result": self.result,
+            "cancel": self.cancel,
+            "jobs": self.list_jobs,
+            "presets": self.presets,
+        }
+
+    def handle(self, body: bytes) -> dict | list | None:
+        """The response to a request body; None when it held only notifications."""
+        try:
+            request = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            return _error_response(None, RpcError(PARSE_ERROR, f"Parse error: {error}"))
+        if isinstance(request, list):
+            if not request:
+                return _error_response(None, RpcError(INVALID_REQUEST, "Empty batch"))
+            responses = [response for response in map(self._handle_one, request) if response is not None]
+            return responses or None
+        return self._handle_one(request)
+
+    def _handle_one(self, request) -> dict | None:
+        if not isinstance(request, dict):
+            return _error_response(None, RpcError(INVALID_REQUEST, "Invalid request"))
+        request_id = request.get("id")
+        try:
+            if request.get("jsonrpc") != "2.0" or not isinstance(request.get("method"), str):
+                raise RpcError(INVALID_REQUEST, "Invalid request")
+            result = self.call(request["method"], request.get("params", {}))
+        except RpcError as error:
+            return _error_response(request_id, error)
+        except Exception as error:
+            return _error_response(request_id, RpcError(INTERNAL_ERROR, f"{type(error).__name__}: {error}"))
+        if "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "result": result, "id": request_id}
+
+    def call(self, method: str, params):
+        function = self._methods.get(method)
+        if function is None:
+            raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+        if not isinstance(params, (dict, list)):
+            raise RpcError(INVALID_PARAMS, "params must be an object or an array")
+        args, kwargs = (params, {}) if isinstance(params, list) else ((), params)
+        try:
+            inspect.signature(function).bind(*args, **kwargs)
+        except TypeError as error:
+            raise RpcError(INVALID_PARAMS, str(error)) from None
+        return function(*args, **kwargs)
+
+    def scan(self, folder: str, preset: str | None = None) -> dict:
+        folder_path = self._folder(folder)
+        rule_preset = self._preset(preset)
+
+        def run(context: JobContext) -> dict:
+            items = _read_folder(folder_path, rule_preset, context)
+            return {"folder": str(folder_path), "tracks": [track_record(item) for item in items]}
+
+        return {"job": self.jobs.submit("scan", run, key=str(folder_path)).id}
+
+    def propose(
+        self,
+        folder: str,
+        preset: str | None = None,
+        titles: bool = False,
+        track_numbers: bool = False,
+        extract_tag: str | None = None,
+        keep_names: bool = False,
+        fields: bool = False,
+        normalize: bool = False,
+    ) -> dict:
+        return self._submit_plan(
+            "propose", folder, preset, titles, track_numbers, extract_tag, keep_names, fields, normalize
+        )
+
+    def apply(
+        self,
+        folder: str,
+        preset: str | None = None,
+        titles: bool = False,
+        track_numbers: bool = False,
+        extract_tag: str | None = None,
+        keep_names: bool = False,
+        fields: bool = False,
+        normalize: bool = False,
+    ) -> dict:
+        return self._submit_plan(
+            "apply", folder, preset, titles, track_numbers, extract_tag, keep_names, fields, normalize
+        )
+
+    def status(self, job: str) -> dict:
+        return self._job(job).status()
+
+    def result(self, job: str):
+        found = self._job(job)
+        if found.state == DONE:
+            return found.result
+        if found.state in (FAILED, CANCELLED):
+            raise RpcError(JOB_FAILED, f"Job {job} {found.state}", found.status())
+        raise RpcError(JOB_NOT_FINISHED, f"Job {job} has not finished", found.status())
+
+    def cancel(self, job: str) -> dict:
+        return self.jobs.cancel(self._job(job).id).status()
+
+    def list_jobs(self) -> list[dict]:
+        return [job.status() for job in self.jobs.jobs()]
+
+    def presets(self) -> dict:
+        settings = load_settings(self.settings_path)
+        return {"active": settings.active_preset, "names": sorted(settings.rule_presets)}
+
+    def _submit_plan(
+        self, method, folder, preset, titles, track_numbers, extract_tag, keep_names, fields, normalize
+    ) -> dict:
+        folder_path = self._folder(folder)
+        rule_preset = self._preset(preset)
+        try:
+            actions = BatchActions(
+                keep_names=_flag("keep_names", keep_names),
+                titles=_flag("titles", titles),
+                track_numbers=_flag("track_numbers", track_numbers),
+                tag_key=None if extract_tag is None else resolve_tag_key(str(extract_tag)),
+                fields=_flag("fields", fields),
+                normalize=_flag("normalize", normalize),
+            )
+            actions.check(rule_preset)
+        except EditError as error:
+            raise RpcError(INVALID_PARAMS, error.message) from None
+
+        def run(context: JobContext) -> dict:
+            items = _read_folder(folder_path, rule_preset, context)
+            summaries = actions.apply(items, rule_preset)
+            result = {"folder": str(folder_path), "plan": plan_records(folder_path, items, rule_preset)}
+            unmatched = [str(folder_path / name) for summary in summaries for name in summary.unmatched]
+            if unmatched:
+                result["unmatched"] = unmatched
+            if method == "apply":
+                result["applied"] = apply_result_record(_write_folder(folder_path, items, context))
+            return result
+
+        return {"job": self.jobs.submit(method, run, key=str(folder_path)).id}
+
+    def _folder(self, folder) -> Path:
+        if not isinstance(folder, str):
+            raise RpcError(INVALID_PARAMS, "folder must be a string")
+        path = Path(folder).resolve()
+        if not any(path.is_relative_to(root) for root in self.roots):
+            raise RpcError(INVALID_PARAMS, f"{folder} is outside the folders this server may change")
+        if not path.is_dir():
+            raise RpcError(INVALID_PARAMS, f"{folder} is not a folder")
+        return path
+
+    def _preset(self, name) -> RulePreset:
+        settings = load_settings(self.settings_path)
+        preset = settings.rule_presets.get(name or settings.active_preset)
+        if preset is None:
+            raise RpcError(INVALID_PARAMS, f'No rule set named "{name}"', sorted(settings.rule_presets))
+        return preset
+
+    def _job(self, job_id):
+        try:
+            return self.jobs.get(str(job_id))
+        except JobNotFound:
+            raise RpcError(JOB_NOT_FOUND, f"No job {job_id}") from None
+
+
+def _read_folder(folder: Path, preset: RulePreset, context: JobContext) -> list[TrackItem]:
+    options = ScanOptions.from_preset(preset)
+    paths = list_audio_files(folder)
+    items = []
+    for done, path in enumerate(paths):
+        context.progress(done, len(paths), "Reading")
+        items.append(read_track(path, options))
+    return items
+
+
+def _write_folder(folder: Path, items: list[TrackItem], context: JobContext) -> ApplyResult:
+    context.progress(0, 0, "Renaming")
+    result = ApplyResult(renamed_files=rename_files(folder, items))
+    changed = items_with_changes(items)
+    for done, item in enumerate(changed):
+        context.progress(done, len(changed), "Writing")
+        result.merge(write_item_changes(item))
+    return result
+
+
+def _error_response(request_id, error: RpcError) -> dict:
+    body = {"code": error.code, "message": error.message}
+    if error.data is not None:
+        body["data"] = error.data
+    return {"jsonrpc": "2.0", "error": body, "id": request_id}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "JobServer"
+
+    def do_POST(self):
+        if not self._trusted_request():
+            return
+        if self.path != "/rpc":
+            self._send_json(404, {"error": "not found"})
+            return
+        content_type = (self.headers.get("Content-Type") or "").split(";", 1)[0].strip().lower()
+        if content_type != "application/json":
+            # text/plain and form posts are what a web page can send without asking first.
+            self._send_json(415, {"error": "send the request as application/json"})
+            return
+        length = self.headers.get("Content-Length") or "0"
+        if not length.isdigit() or int(length) > MAX_REQUEST_BYTES:
+            self._send_json(400, {"error": f"Content-Length must be a number up to {MAX_REQUEST_BYTES}"})
+            return
+        response = self.server.rpc.handle(self.rfile.read(int(length)))
+        if response is None:
+            self.send_response(204)
+            self.end_headers()
+            return
+        self._send_json(200, response)
+
+    def do_GET(self):
+        if not self._trusted_request():
+            return
+        match = _EVENTS_PATH.match(self.path)
+        if match is None:
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            job = self.server.jobs.get(match.group(1))
+        except JobNotFound:
+            self._send_json(404, {"error": f"no job {match.group(1)}"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        version = -1
+        try:
+            while True:
+                # Progress between two lines is coalesced; each line is the latest status.
+                version, status = self.server.jobs.wait(job, version, EVENT_KEEPALIVE_SECONDS)
+                self.wfile.write(json.dumps(status, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+                if status["state"] in FINISHED_STATES:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def _trusted_request(self) -> bool:
+        """Refuse requests a web page could make; answers 403 and returns False for those."""
+        host = urlsplit(f"//{self.headers.get('Host') or ''}").hostname or ""
+        origin = self.headers.get("Origin")
+        if not (is_loopback(host) or _is_ip_address(host)):
+            self._send_json(403, {"error": "the Host header must be an IP address or localhost"})
+            return False
+        if origin is not None and not is_loopback(urlsplit(origin).hostname or ""):
+            self._send_json(403, {"error": "requests from web pages are not accepted"})
+            return False
+        return True
+
+    def _send_json(self, code: int, body) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class JobServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], rpc: BatchRpc, verbose: bool = False):
+        super().__init__(address, _Handler)
+        self.rpc = rpc
+        self.jobs = rpc.jobs
+        self.verbose = verbose
+
+
+def _flag(name: str, value) -> bool:
+    # bool("false") is True, so only JSON true and false are accepted.
+    if not isinstance(value, bool):
+        raise RpcError(INVALID_PARAMS, f"{name} must be true or false")
+    return value
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m server", description="Serve batch jobs over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: this machine only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="jobs that may run at once")
+    parser.add_argument("--settings", type=Path, default=SETTINGS_PATH, help="settings file with the rule sets")
+    parser.add_argument(
+        "--root",
+        type=Path,
+        action="append",
+        required=True,
+        help="only change folders inside ROOT; required, and may be given more than once",
+    )
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    jobs = JobQueue(max_workers=max(1, args.workers))
+    server = JobServer((args.host, args.port), BatchRpc(jobs, args.settings, args.root), args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port}/rpc; press Ctrl+C to stop.", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
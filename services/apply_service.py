@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -10,6 +11,9 @@ from tag_service import apply_pending_tags
 
 @dataclass
 class ApplyResult:
+    """Counts of one apply. Files without pending tag or artwork changes are
+    never opened, so tagged_files and skipped_files only cover files that had changes."""
+
     renamed_files: int = 0
     tagged_files: int = 0
     skipped_files: list[str] = field(default_factory=list)
@@ -17,6 +21,18 @@ class ApplyResult:
     artwork_files: int = 0
     artwork_errors: list[str] = field(default_factory=list)
 
+    @property
+    def failed(self) -> bool:
+        return bool(self.skipped_files or self.tag_errors or self.artwork_errors)
+
+    def merge(self, other: "ApplyResult") -> None:
+        self.renamed_files += other.renamed_files
+        self.tagged_files += other.tagged_files
+        self.skipped_files.extend(other.skipped_files)
+        self.tag_errors.extend(other.tag_errors)
+        self.artwork_files += other.artwork_files
+        self.artwork_errors.extend(other.artwork_errors)
+
 
 class ApplyError(Exception):
     def __init__(self, message: str, technical_detail: str = ""):
@@ -25,42 +41,92 @@ class ApplyError(Exception):
         self.technical_detail = technical_detail
 
 
-def apply_changes(folder: Path, items: list[TrackItem]) -> ApplyResult:
+def apply_changes(
+    folder: Path,
+    items: list[TrackItem],
+    progress: Callable[[int, int], None] | None = None,
+) -> ApplyResult:
+    """Rename files, then write pending tags and artwork.
+
+    Only files with pending tag or artwork changes are opened and saved;
+    the rest are at most renamed. progress(done, total) is called before
+    each file that has pending changes.
+    """
+    result = ApplyResult(renamed_files=rename_files(folder, items))
+    changed_items = items_with_changes(items)
+    for done, item in enumerate(changed_items):
+        if progress is not None:
+            progress(done, len(changed_items))
+        result.merge(write_item_changes(item))
+    return result
+
+
+def apply_changes_by_folder(
+    items: list[TrackItem],
+    progress: Callable[[int, int], None] | None = None,
+) -> ApplyResult:
+    """apply_changes for items from several folders, such as library search results.
+
+    progress counts the files with pending changes across every folder.
+    """
+    folders: dict[Path, list[TrackItem]] = {}
+    for item in items:
+        folders.setdefault(item.path.parent, []).append(item)
+    total = len(items_with_changes(items))
+    done = 0
     result = ApplyResult()
+    for folder, folder_items in folders.items():
+        folder_progress = None
+        if progress is not None:
+            folder_progress = lambda folder_done, _folder_total, offset=done: progress(offset + folder_done, total)
+        result.merge(apply_changes(folder, folder_items, folder_progress))
+        done += len(items_with_changes(folder_items))
+    return result
+
+
+def rename_files(folder: Path, items: list[TrackItem]) -> int:
+    """Rename items to their proposed filenames; returns the number of files renamed."""
     operations = plan_renames(folder, items)
     try:
         execute_renames(operations)
-        result.renamed_files = len(operations)
     except Exception as error:
         raise ApplyError(
             "A file could not be renamed. A file with that name may already exist, "
             "or it may be open in another program.",
             str(error),
         ) from error
+    return len(operations)
 
-    for item in items:
-        if item.path.suffix.lower() == ".mp3":
-            ensure_id3_header(str(item.path))
-
-        audio, error = load_audio(str(item.path))
-        if audio is None:
-            result.skipped_files.append(item.filename)
-            if error:
-                print(f"[apply load_audio] {item.filename}: {error}")
-            continue
-
-        try:
-            apply_pending_tags(audio, item)
-            audio.save()
-            result.tagged_files += 1
-        except Exception as error:
-            result.tag_errors.append(item.filename)
-            print(f"[tag save failed] {item.filename}: {type(error).__name__}: {error}")
-
-        try:
-            if apply_artwork_change(item):
-                result.artwork_files += 1
-        except Exception as error:
-            result.artwork_errors.append(item.filename)
-            print(f"[artwork save failed] {item.filename}: {type(error).__name__}: {error}")
+
+def items_with_changes(items: list[TrackItem]) -> list[TrackItem]:
+    return [item for item in items if item.pending_tags or item.artwork_change_pending]
+
+
+def write_item_changes(item: TrackItem) -> ApplyResult:
+    """Write one item's pending tags and artwork; the result counts only this file."""
+    result = ApplyResult()
+    if item.path.suffix.lower() == ".mp3":
+        ensure_id3_header(str(item.path))
+
+    audio, error = load_audio(str(item.path), easy=False)
+    if audio is None:
+        result.skipped_files.append(item.filename)
+        if error:
+            print(f"[apply load_audio] {item.filename}: {error}")
+        return result
+
+    try:
+        apply_pending_tags(audio, item)
+        audio.save()
+        result.tagged_files += 1
+    except Exception as error:
+        result.tag_errors.append(item.filename)
+        print(f"[tag save failed] {item.filename}: {type(error).__name__}: {error}")
+
+    try:
+        if apply_artwork_change(item):
+            result.artwork_files += 1
+    except Exception as error:
+        result.artwork_errors.append(item.filename)
+        print(f"[artwork save failed] {item.filename}: {type(error).__name__}: {error}")
     return result
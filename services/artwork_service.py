@@ -1,10 +1,8 @@
+from io import BytesIO
 from pathlib import Path
 
-from mutagen.flac import FLAC, Picture
-from mutagen.id3 import APIC, ID3, ID3NoHeaderError
-from mutagen.mp4 import MP4, MP4Cover
-
 from models import ArtworkData, TrackItem
+from services.artwork_store import ArtworkStore, artwork_digest
 
 
 SUPPORTED_IMAGE_EXTS = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
@@ -15,42 +13,116 @@ class ArtworkError(Exception):
     pass
 
 
-def load_artwork_file(path: Path) -> ArtworkData:
+def load_artwork_file(path: Path, store: ArtworkStore | None = None) -> ArtworkData:
     mime = SUPPORTED_IMAGE_EXTS.get(path.suffix.lower())
     if mime is None:
         raise ArtworkError("Choose a JPG or PNG image.")
-    return ArtworkData(data=path.read_bytes(), mime=mime, source_name=path.name)
+    return _make_artwork(path.read_bytes(), mime, path.name, store)
+
+
+def normalize_artwork(
+    artwork: ArtworkData,
+    store: ArtworkStore,
+    max_edge: int,
+    jpeg_quality: int = 90,
+    progressive: bool = True,
+) -> ArtworkData:
+    """Downscale and recompress artwork to JPEG once per distinct source image.
+
+    The original is returned when re-encoding would not make it smaller.
+    """
+    source_digest = artwork.digest or artwork_digest(artwork.data)
+    key = (source_digest, max_edge, jpeg_quality, progressive)
+    cached = store.get_derived(key)
+    if cached is not None:
+        return cached
+
+    try:
+        from PIL import Image
+    except ImportError as error:
+        raise ArtworkError("Pillow is required to resize artwork.") from error
+
+    try:
+        with Image.open(BytesIO(artwork.data)) as image:
+            image.load()
+            resized = bool(max_edge) and max(image.size) > max_edge
+            if resized:
+                image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            if image.mode != "RGB":
+                image = _flatten_to_rgb(image)
+            output = BytesIO()
+            image.save(
+                output,
+                format="JPEG",
+                quality=jpeg_quality,
+                optimize=True,
+                progressive=progressive,
+            )
+    except (Image.DecompressionBombError, Image.UnidentifiedImageError, OSError, ValueError) as error:
+        raise ArtworkError(f"The image could not be resized: {error}") from error
+
+    data = output.getvalue()
+    if not resized and len(data) >= len(artwork.data):
+        normalized = artwork
+    else:
+        normalized = store.add(data, "image/jpeg", artwork.source_name)
+    if normalized.digest:
+        store.remember_derived(key, normalized)
+    return normalized
+
+
+def _flatten_to_rgb(image):
+    from PIL import Image
+
+    if image.mode in {"RGBA", "LA"} or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
 
 
 def has_embedded_artwork(path: Path) -> bool:
     return extract_embedded_artwork(path) is not None
 
 
-def extract_embedded_artwork(path: Path) -> ArtworkData | None:
+def extract_embedded_artwork(path: Path, store: ArtworkStore | None = None) -> ArtworkData | None:
     ext = path.suffix.lower()
     try:
         if ext == ".mp3":
+            from mutagen.id3 import ID3
+
             pictures = ID3(path).getall("APIC")
             if pictures:
                 picture = next((frame for frame in pictures if frame.type == 3), pictures[0])
-                return ArtworkData(picture.data, picture.mime or "image/jpeg", path.name)
+                return _make_artwork(picture.data, picture.mime or "image/jpeg", path.name, store)
         if ext == ".flac":
+            from mutagen.flac import FLAC
+
             pictures = FLAC(path).pictures
             if pictures:
                 picture = next((frame for frame in pictures if frame.type == 3), pictures[0])
-                return ArtworkData(picture.data, picture.mime or "image/jpeg", path.name)
+                return _make_artwork(picture.data, picture.mime or "image/jpeg", path.name, store)
         if ext in {".m4a", ".mp4"}:
+            from mutagen.mp4 import MP4, MP4Cover
+
             audio = MP4(path)
             covers = audio.tags.get("covr") if audio.tags else None
             if covers:
                 cover = covers[0]
                 mime = "image/png" if cover.imageformat == MP4Cover.FORMAT_PNG else "image/jpeg"
-                return ArtworkData(bytes(cover), mime, path.name)
+                return _make_artwork(bytes(cover), mime, path.name, store)
     except Exception:
         return None
     return None
 
 
+def _make_artwork(data: bytes, mime: str, source_name: str, store: ArtworkStore | None) -> ArtworkData:
+    if store is None:
+        return ArtworkData(data, mime, source_name)
+    return store.add(data, mime, source_name)
+
+
 def apply_artwork_change(item: TrackItem) -> bool:
     if not item.artwork_change_pending:
         return False
@@ -69,6 +141,8 @@ def apply_artwork_change(item: TrackItem) -> bool:
 
 
 def _apply_mp3_artwork(path: Path, artwork: ArtworkData | None) -> None:
+    from mutagen.id3 import APIC, ID3, ID3NoHeaderError
+
     try:
         tags = ID3(path)
     except ID3NoHeaderError:
@@ -81,6 +155,8 @@ def _apply_mp3_artwork(path: Path, artwork: ArtworkData | None) -> None:
 
 
 def _apply_flac_artwork(path: Path, artwork: ArtworkData | None) -> None:
+    from mutagen.flac import FLAC, Picture
+
     audio = FLAC(path)
     audio.clear_pictures()
     if artwork is not None:
@@ -94,6 +170,8 @@ def _apply_flac_artwork(path: Path, artwork: ArtworkData | None) -> None:
 
 
 def _apply_mp4_artwork(path: Path, artwork: ArtworkData | None) -> None:
+    from mutagen.mp4 import MP4, MP4Cover
+
     audio = MP4(path)
     if audio.tags is None:
         audio.add_tags()
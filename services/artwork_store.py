@@ -0,0 +1,77 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from weakref import WeakValueDictionary
+
+from models import ArtworkData
+
+
+# Resized images remembered per source image and options, least recently used first out.
+DERIVED_CACHE_SIZE = 256
+
+
+def artwork_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def format_byte_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class ArtworkStore:
+    """Shares one image buffer per distinct content hash.
+
+    Entries are held weakly, so an image is released as soon as no track or
+    selection references it anymore. The store is shared with worker threads,
+    so every access goes through a lock.
+    """
+
+    def __init__(self, max_derived: int = DERIVED_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._artwork: WeakValueDictionary[str, ArtworkData] = WeakValueDictionary()
+        # (source digest, options) -> digest of the derived image, e.g. a resized cover.
+        self._derived: OrderedDict[tuple, str] = OrderedDict()
+        self.max_derived = max_derived
+
+    def add(self, data: bytes, mime: str, source_name: str = "") -> ArtworkData:
+        digest = artwork_digest(data)
+        with self._lock:
+            existing = self._artwork.get(digest)
+            if existing is not None:
+                if existing.mime == mime and existing.source_name == source_name:
+                    return existing
+                data = existing.data
+            artwork = ArtworkData(data, mime, source_name, digest)
+            self._artwork[digest] = artwork
+        return artwork
+
+    def get(self, digest: str) -> ArtworkData | None:
+        with self._lock:
+            return self._artwork.get(digest)
+
+    def get_derived(self, key: tuple) -> ArtworkData | None:
+        with self._lock:
+            digest = self._derived.get(key)
+            if digest is None:
+                return None
+            self._derived.move_to_end(key)
+            return self._artwork.get(digest)
+
+    def remember_derived(self, key: tuple, artwork: ArtworkData) -> None:
+        with self._lock:
+            self._derived[key] = artwork.digest
+            self._derived.move_to_end(key)
+            while len(self._derived) > self.max_derived:
+                self._derived.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._artwork)
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(len(artwork.data) for artwork in list(self._artwork.values()))
@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from models import TrackItem
+from services.apply_service import ApplyResult
+from services.rename_service import plan_renames
+from services.session import EditError, EditSummary, Session
+from services.settings_service import RulePreset, compile_preset
+from tag_service import TAG_FIELDS, TAG_KEY_BY_LABEL
+from warning_service import ValidationIndex
+
+
+def resolve_tag_key(field: str) -> str:
+    """A tag key from either its key ("albumartist") or its label ("Album Artist")."""
+    keys = {tag_field.key for tag_field in TAG_FIELDS}
+    key = field if field in keys else TAG_KEY_BY_LABEL.get(field)
+    if key is None:
+        raise EditError("Unknown tag field", f"Unknown tag field {field!r}; use one of {', '.join(sorted(keys))}.")
+    return key
+
+
+@dataclass(frozen=True)
+class BatchActions:
+    """The Tags and Track Order tab edits to make on every scanned item."""
+
+    keep_names: bool = False
+    titles: bool = False
+    track_numbers: bool = False
+    # Set from the text between the rule set's extraction boundaries.
+    tag_key: str | None = None
+    # Set every field of the rule set's filename pattern.
+    fields: bool = False
+    # Run the rule set's tag normalization after the other edits.
+    normalize: bool = False
+
+    def check(self, preset: RulePreset) -> None:
+        """Raise EditError if the rule set cannot support these actions."""
+        self.apply([], preset)
+
+    def apply(self, items: list[TrackItem], preset: RulePreset) -> list[EditSummary]:
+        session = Session(items)
+        summaries = []
+        if self.keep_names:
+            for item in items:
+                item.set_proposed_filename(item.filename, item.validation_warnings)
+        if self.titles:
+            summaries.append(session.titles_from_filenames())
+        if self.fields:
+            summaries.append(session.extract_fields_from_filenames(preset.filename_pattern))
+        if self.tag_key is not None:
+            summaries.append(
+                session.extract_tag_from_filenames(self.tag_key, preset.tag_extract_before, preset.tag_extract_after)
+            )
+        if self.track_numbers:
+            summaries.append(session.track_numbers_from_filenames(preset.track_markers))
+        if self.normalize:
+            summaries.extend(session.normalize_tags(compile_preset(preset).tag_normalizer))
+        return summaries
+
+
+def plan_records(folder: Path, items: list[TrackItem], preset: RulePreset) -> list[dict]:
+    """One record per item that would be renamed, retagged or has warnings."""
+    validation = ValidationIndex(items, compile_preset(preset).build_validation_rules())
+    destinations = {id(operation.item): operation.destination.name for operation in plan_renames(folder, items)}
+    records = []
+    for item in items:
+        destination = destinations.get(id(item))
+        warnings = validation.warnings(item)
+        if destination is None and not item.pending_tags and not warnings:
+            continue
+        records.append(
+            {
+                "event": "plan",
+                "path": str(item.path),
+                "rename_to": destination,
+                "tags": dict(item.pending_tags),
+                "warnings": warnings,
+            }
+        )
+    return records
+
+
+def track_record(item: TrackItem) -> dict:
+    """A compact JSON-ready view of an item; empty and default fields are left out."""
+    record = {"path": str(item.path)}
+    if item.proposed_filename != item.filename:
+        record["proposed"] = item.proposed_filename
+    if item.tags:
+        record["tags"] = dict(item.tags)
+    if item.pending_tags:
+        record["pending"] = dict(item.pending_tags)
+    status = item.effective_artwork_status()
+    if status != "None":
+        record["artwork"] = status
+    if item.validation_warnings:
+        record["warnings"] = item.validation_warnings
+    if not item.audio_ok:
+        record["error"] = item.read_error or "unreadable"
+    return record
+
+
+def apply_result_record(result: ApplyResult) -> dict:
+    """Counts always; the failed file lists only when not empty."""
+    record = {
+        "renamed": result.renamed_files,
+        "tagged": result.tagged_files,
+        "artwork": result.artwork_files,
+    }
+    for key, names in (
+        ("skipped", result.skipped_files),
+        ("tag_errors", result.tag_errors),
+        ("artwork_errors", result.artwork_errors),
+    ):
+        if names:
+            record[key] = names
+    return record
@@ -0,0 +1,271 @@
+import hashlib
+import os
+import struct
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+
+# Reads while hashing, and how much of the audio is hashed to tell apart
+# files whose audio has the same length.
+READ_CHUNK = 1024 * 1024
+QUICK_HASH_BYTES = 64 * 1024
+ID3V1_SIZE = 128
+APE_FOOTER_SIZE = 32
+
+
+@dataclass(frozen=True)
+class DuplicateGroup:
+    """Files with the same audio, whatever their tags and artwork."""
+
+    paths: tuple[Path, ...]
+    audio_size: int
+
+    def suggested_keep(self) -> Path:
+        """The file to keep by default: the shortest name, e.g. not the "- Copy" one."""
+        return min(self.paths, key=lambda path: (len(path.name), path.name.casefold()))
+
+
+def audio_regions(path: Path) -> list[tuple[int, int]]:
+    """(start, end) byte ranges of the audio in path, leaving out tags and cover art.
+
+    ID3v2/ID3v1/APEv2 tags, FLAC metadata blocks, MP4 atoms other than mdat
+    and WAVE/AIFF chunks other than the sample data are skipped. Other
+    formats, such as Ogg, are taken whole.
+    """
+    size = path.stat().st_size
+    with path.open("rb") as file:
+        start = _skip_id3v2(file, size)
+        file.seek(start)
+        magic = file.read(12)
+        if magic[:4] == b"fLaC":
+            return [(_skip_flac_metadata(file, start + 4, size), size)]
+        if magic[4:8] == b"ftyp":
+            return _mp4_media_data(file, start, size)
+        if magic[:4] == b"RIFF" and magic[8:12] == b"WAVE":
+            return _iff_chunk(file, start + 12, size, b"data", "<I") or [(start, size)]
+        if magic[:4] == b"FORM" and magic[8:12] in (b"AIFF", b"AIFC"):
+            return _iff_chunk(file, start + 12, size, b"SSND", ">I") or [(start, size)]
+        return [(start, _trailing_tags_start(file, start, size))]
+
+
+def audio_hash(path: Path, limit: int | None = None) -> str:
+    """Hash of the audio regions, or of their first limit bytes."""
+    digest = hashlib.blake2b(digest_size=20)
+    remaining = limit
+    with path.open("rb") as file:
+        for start, end in audio_regions(path):
+            file.seek(start)
+            left = end - start
+            while left > 0 and remaining != 0:
+                want = min(READ_CHUNK, left) if remaining is None else min(READ_CHUNK, left, remaining)
+                chunk = file.read(want)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                left -= len(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def audio_size(path: Path) -> int:
+    return sum(end - start for start, end in audio_regions(path))
+
+
+def find_duplicates(
+    paths: Iterable[Path],
+    progress: Callable[[int, int], None] | None = None,
+    workers: int | None = None,
+) -> list[DuplicateGroup]:
+    """Groups of files whose audio is identical.
+
+    Files are first grouped by audio size, which only reads their headers;
+    files with a unique size are never hashed. The rest are compared by a
+    hash of their first QUICK_HASH_BYTES of audio, and only files that
+    still collide are hashed in full. The reads run on a thread pool.
+    progress(done, total) is called as each stage's files finish.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = list(dict.fromkeys(paths))
+    executor = ThreadPoolExecutor(
+        max_workers=workers or min(8, (os.cpu_count() or 1) + 2), thread_name_prefix="duplicates"
+    )
+    try:
+        sizes = dict(zip(paths, _run_stage(executor, _audio_size_or_none, paths, progress)))
+        candidates = _colliding(sizes)
+        quick = _hash_stage(executor, candidates, QUICK_HASH_BYTES, progress)
+        # Audio no longer than the quick hash has already been hashed in full.
+        found = [group for group in quick if sizes[group[0]] <= QUICK_HASH_BYTES]
+        found += _hash_stage(executor, [group for group in quick if sizes[group[0]] > QUICK_HASH_BYTES], None, progress)
+    finally:
+        # A cancelled search does not wait for the files still queued.
+        executor.shutdown(wait=True, cancel_futures=True)
+    groups = [DuplicateGroup(tuple(group), sizes[group[0]]) for group in found]
+    return sorted(groups, key=lambda group: str(group.paths[0]).casefold())
+
+
+def delete_duplicates(
+    groups: Iterable[DuplicateGroup],
+    marked: set[Path],
+    progress: Callable[[int, int], None] | None = None,
+) -> tuple[list[Path], list[str]]:
+    """Delete the marked files of each group, unless that would leave the group without a copy.
+
+    Each file is hashed again first and only deleted while its audio still
+    matches a kept copy, so files replaced or renamed since the search are
+    left alone. Returns the deleted paths and one message per group or file
+    that was left alone.
+    """
+    groups = list(groups)
+    deleted = []
+    errors = []
+    for done, group in enumerate(groups):
+        if progress is not None:
+            progress(done, len(groups))
+        doomed = [path for path in group.paths if path in marked]
+        if not doomed:
+            continue
+        kept = [path for path in group.paths if path not in marked]
+        if not kept:
+            errors.append(f"{group.suggested_keep().name}: every copy was marked, so none were deleted.")
+            continue
+        expected = _audio_hash_or_none(kept[0], None)
+        if expected is None:
+            errors.append(f"{kept[0].name}: the kept copy can no longer be read, so none were deleted.")
+            continue
+        for path in doomed:
+            if _audio_hash_or_none(path, None) != expected:
+                errors.append(f"{path.name}: no longer matches {kept[0].name}, so it was kept.")
+                continue
+            try:
+                path.unlink()
+            except OSError as error:
+                errors.append(f"{path.name}: {error}")
+            else:
+                deleted.append(path)
+    return deleted, errors
+
+
+def _hash_stage(executor, candidates: list[list[Path]], limit: int | None, progress) -> list[list[Path]]:
+    """candidates split further by the hash of their first limit bytes of audio."""
+    paths = [path for group in candidates for path in group]
+    group_of = {path: index for index, group in enumerate(candidates) for path in group}
+    hashes = _run_stage(executor, lambda path: _audio_hash_or_none(path, limit), paths, progress)
+    return _colliding(
+        {path: (group_of[path], digest) if digest is not None else None for path, digest in zip(paths, hashes)}
+    )
+
+
+def _run_stage(executor, function, paths: list[Path], progress) -> list:
+    results = []
+    for done, result in enumerate(executor.map(function, paths)):
+        if progress is not None:
+            progress(done, len(paths))
+        results.append(result)
+    return results
+
+
+def _colliding(keys: dict[Path, object]) -> list[list[Path]]:
+    """Paths sharing a key with another path, in their original order; None keys are left out."""
+    by_key: dict[object, list[Path]] = {}
+    for path, key in keys.items():
+        if key is not None:
+            by_key.setdefault(key, []).append(path)
+    return [group for group in by_key.values() if len(group) > 1]
+
+
+def _audio_size_or_none(path: Path) -> int | None:
+    try:
+        return audio_size(path)
+    except OSError:
+        return None
+
+
+def _audio_hash_or_none(path: Path, limit: int | None) -> str | None:
+    try:
+        return audio_hash(path, limit)
+    except OSError:
+        return None
+
+
+def _skip_id3v2(file, size: int) -> int:
+    """Offset after the ID3v2 tags at the start of the file, if any."""
+    offset = 0
+    while offset + 10 <= size:
+        file.seek(offset)
+        header = file.read(10)
+        if header[:3] != b"ID3" or any(byte & 0x80 for byte in header[6:10]):
+            break
+        tag_size = _syncsafe(header[6:10]) + 10
+        if header[5] & 0x10:
+            tag_size += 10  # footer
+        offset += tag_size
+    return min(offset, size)
+
+
+def _trailing_tags_start(file, start: int, end: int) -> int:
+    """End of the audio once ID3v1 and APEv2 tags at the end of the file are left out."""
+    if end - start >= ID3V1_SIZE:
+        file.seek(end - ID3V1_SIZE)
+        if file.read(3) == b"TAG":
+            end -= ID3V1_SIZE
+    if end - start >= APE_FOOTER_SIZE:
+        file.seek(end - APE_FOOTER_SIZE)
+        footer = file.read(APE_FOOTER_SIZE)
+        if footer[:8] == b"APETAGEX":
+            tag_size, _items, flags = struct.unpack("<III", footer[12:24])
+            # The size covers the items and footer; a header may come before them.
+            tag_size += APE_FOOTER_SIZE if flags & 0x80000000 else 0
+            if tag_size <= end - start:
+                end -= tag_size
+    return end
+
+
+def _skip_flac_metadata(file, offset: int, size: int) -> int:
+    while offset + 4 <= size:
+        file.seek(offset)
+        header = file.read(4)
+        offset += 4 + int.from_bytes(header[1:4], "big")
+        if header[0] & 0x80:
+            break
+    return min(offset, size)
+
+
+def _mp4_media_data(file, offset: int, size: int) -> list[tuple[int, int]]:
+    """The contents of the top-level mdat atoms; tags and artwork live in moov."""
+    regions = []
+    while offset + 8 <= size:
+        file.seek(offset)
+        atom_size, atom_type = struct.unpack(">I4s", file.read(8))
+        header = 8
+        if atom_size == 1:
+            atom_size = struct.unpack(">Q", file.read(8))[0]
+            header = 16
+        elif atom_size == 0:
+            atom_size = size - offset
+        if atom_size < header:
+            break
+        if atom_type == b"mdat":
+            regions.append((offset + header, min(offset + atom_size, size)))
+        offset += atom_size
+    return regions or [(0, size)]
+
+
+def _iff_chunk(file, offset: int, size: int, wanted: bytes, size_format: str) -> list[tuple[int, int]]:
+    while offset + 8 <= size:
+        file.seek(offset)
+        chunk_id = file.read(4)
+        (chunk_size,) = struct.unpack(size_format, file.read(4))
+        if chunk_id == wanted:
+            return [(offset + 8, min(offset + 8 + chunk_size, size))]
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return []
+
+
+def _syncsafe(data: bytes) -> int:
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
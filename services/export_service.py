@@ -0,0 +1,263 @@
+import csv
+import hashlib
+import json
+import os
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from models import TrackItem
+from tag_service import SCANNED_TAG_KEYS, TAG_KEY_BY_LABEL
+
+
+CSV_COLUMNS = ("path", "fingerprint", *SCANNED_TAG_KEYS, "artwork", "warnings")
+# Tag columns may be named by key or by label, e.g. "albumartist" or "Album Artist".
+IMPORT_TAG_COLUMNS = {key: key for key in SCANNED_TAG_KEYS} | {
+    label.casefold(): key for label, key in TAG_KEY_BY_LABEL.items()
+}
+WARNING_SEPARATOR = "; "
+# Bytes hashed from the start, middle and end of a file for its fingerprint.
+FINGERPRINT_BLOCK = 64 * 1024
+PROGRESS_EVERY = 100
+
+
+class TagFileError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class TagRow:
+    line: int
+    path: str
+    fingerprint: str
+    # Only the tags the row sets; "" erases a tag.
+    tags: dict[str, str]
+
+
+def file_format(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise TagFileError(f"{path.name}: use a .csv or .jsonl file.")
+
+
+def file_fingerprint(path: Path) -> str:
+    """The file's size and a hash of its start, middle and end, as "size:hash"."""
+    size = path.stat().st_size
+    digest = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+    with path.open("rb") as file:
+        for offset in sorted({0, max(0, size // 2 - FINGERPRINT_BLOCK // 2), max(0, size - FINGERPRINT_BLOCK)}):
+            file.seek(offset)
+            digest.update(file.read(FINGERPRINT_BLOCK))
+    return f"{size}:{digest.hexdigest()}"
+
+
+def track_export_record(
+    item: TrackItem,
+    warnings: Callable[[TrackItem], list[str]] | None = None,
+    fingerprint: bool = False,
+) -> dict:
+    """Path, effective tags, artwork status and warnings of an item."""
+    try:
+        item_fingerprint = file_fingerprint(item.path) if fingerprint else ""
+    except OSError:
+        item_fingerprint = ""
+    return {
+        "path": str(item.path),
+        "fingerprint": item_fingerprint,
+        "tags": {key: item.effective_tag(key) for key in SCANNED_TAG_KEYS},
+        "artwork": item.effective_artwork_status(),
+        "warnings": list(item.validation_warnings if warnings is None else warnings(item)),
+    }
+
+
+def export_tracks(
+    items: Iterable[TrackItem],
+    path: Path,
+    warnings: Callable[[TrackItem], list[str]] | None = None,
+    fingerprints: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+) -> int:
+    """Write one row per item to a .csv or .jsonl file, one at a time; returns the rows written.
+
+    warnings(item) supplies the warning column, by default the filename
+    warnings. Fingerprints let an import find files that have since moved,
+    at the cost of reading part of every file.
+    """
+    file_type = file_format(path)
+    items = list(items)
+    with path.open("w", encoding="utf-8-sig" if file_type == "csv" else "utf-8", newline="") as file:
+        if file_type == "csv":
+            writer = csv.writer(file)
+            writer.writerow(CSV_COLUMNS)
+        for done, item in enumerate(items):
+            if progress is not None and done % PROGRESS_EVERY == 0:
+                progress(done, len(items))
+            record = track_export_record(item, warnings, fingerprints)
+            if file_type == "csv":
+                writer.writerow(
+                    (
+                        record["path"],
+                        record["fingerprint"],
+                        *record["tags"].values(),
+                        record["artwork"],
+                        WARNING_SEPARATOR.join(record["warnings"]),
+                    )
+                )
+            else:
+                if not record["fingerprint"]:
+                    del record["fingerprint"]
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(items)
+
+
+def read_tag_rows(path: Path) -> Iterator[TagRow]:
+    """Rows of an exported, possibly edited, .csv or .jsonl file, read one at a time.
+
+    Raises TagFileError before the first row if the file cannot be used.
+    Rows without a usable path or fingerprint are returned with both empty.
+    """
+    file_type = file_format(path)
+    try:
+        file = path.open("r", encoding="utf-8-sig", newline="")
+    except OSError as error:
+        raise TagFileError(f"Could not open {path.name}: {error}") from None
+    if file_type == "csv":
+        return _read_csv_rows(file, path.name)
+    return _read_jsonl_rows(file)
+
+
+def _read_csv_rows(file, name: str) -> Iterator[TagRow]:
+    reader = csv.reader(file)
+    try:
+        header = next(reader, None)
+    except (csv.Error, UnicodeDecodeError) as error:
+        file.close()
+        raise TagFileError(f"{name}: {error}") from None
+    columns = [column.strip().casefold() for column in header or ()]
+    if "path" not in columns and "fingerprint" not in columns:
+        file.close()
+        raise TagFileError(f"{name} needs a path or fingerprint column.")
+    path_index = columns.index("path") if "path" in columns else None
+    fingerprint_index = columns.index("fingerprint") if "fingerprint" in columns else None
+    tag_indices = [
+        (index, IMPORT_TAG_COLUMNS[column]) for index, column in enumerate(columns) if column in IMPORT_TAG_COLUMNS
+    ]
+    return _csv_rows(file, reader, path_index, fingerprint_index, tag_indices)
+
+
+def _csv_rows(file, reader, path_index, fingerprint_index, tag_indices) -> Iterator[TagRow]:
+    with file:
+        try:
+            for row in reader:
+                if not any(row):
+                    continue
+                # Short rows, e.g. trailing empty cells dropped by an editor, leave those tags alone.
+                yield TagRow(
+                    reader.line_num,
+                    _cell(row, path_index),
+                    _cell(row, fingerprint_index),
+                    {key: row[index].strip() for index, key in tag_indices if index < len(row)},
+                )
+        except (csv.Error, UnicodeDecodeError) as error:
+            raise TagFileError(f"Line {reader.line_num}: {error}") from None
+
+
+def _cell(row: list[str], index: int | None) -> str:
+    return row[index].strip() if index is not None and index < len(row) else ""
+
+
+def _read_jsonl_rows(file) -> Iterator[TagRow]:
+    with file:
+        try:
+            yield from _jsonl_rows(file)
+        except UnicodeDecodeError as error:
+            raise TagFileError(str(error)) from None
+
+
+def _jsonl_rows(file) -> Iterator[TagRow]:
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        if not isinstance(record, dict):
+            yield TagRow(line_number, "", "", {})
+            continue
+        tags = record.get("tags")
+        yield TagRow(
+            line_number,
+            _text(record.get("path")),
+            _text(record.get("fingerprint")),
+            {
+                IMPORT_TAG_COLUMNS[key.casefold()]: value.strip()
+                for key, value in (tags.items() if isinstance(tags, dict) else ())
+                if isinstance(key, str) and key.casefold() in IMPORT_TAG_COLUMNS and isinstance(value, str)
+            },
+        )
+
+
+def _text(value) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _path_key(path: str | Path) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class TrackMatcher:
+    """Finds the item a row describes: by path, else by content fingerprint.
+
+    Fingerprints are only worked out for items with the same file size as
+    the row's, and each at most once.
+    """
+
+    def __init__(self, items: Iterable[TrackItem]):
+        self._items = list(items)
+        # Exported paths are written exactly as the items hold them; other
+        # spellings are only normalized once an exact lookup misses.
+        self._by_path = {str(item.path): item for item in self._items}
+        self._by_path_key: dict[str, TrackItem] | None = None
+        self._by_size: dict[int, list[TrackItem]] | None = None
+        self._fingerprints: dict[int, str] = {}
+
+    def find(self, row: TagRow) -> TrackItem | None:
+        item = self._find_path(row.path) if row.path else None
+        if item is None and row.fingerprint:
+            item = self._find_fingerprint(row.fingerprint)
+        return item
+
+    def _find_path(self, path: str) -> TrackItem | None:
+        item = self._by_path.get(path)
+        if item is None:
+            if self._by_path_key is None:
+                self._by_path_key = {_path_key(item.path): item for item in self._items}
+            item = self._by_path_key.get(_path_key(path))
+        return item
+
+    def _find_fingerprint(self, fingerprint: str) -> TrackItem | None:
+        size, _separator, _digest = fingerprint.partition(":")
+        if not size.isdigit():
+            return None
+        if self._by_size is None:
+            self._by_size = {}
+            for item in self._items:
+                try:
+                    self._by_size.setdefault(item.path.stat().st_size, []).append(item)
+                except OSError:
+                    pass
+        for item in self._by_size.get(int(size), ()):
+            known = self._fingerprints.get(id(item))
+            if known is None:
+                try:
+                    known = file_fingerprint(item.path)
+                except OSError:
+                    known = ""
+                self._fingerprints[id(item)] = known
+            if known == fingerprint:
+                return item
+        return None
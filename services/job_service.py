@@ -0,0 +1,181 @@
+import itertools
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from services.task_service import CancellationToken, TaskCancelled
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = frozenset({DONE, FAILED, CANCELLED})
+
+
+class JobNotFound(Exception):
+    pass
+
+
+@dataclass(eq=False)
+class Job:
+    id: str
+    method: str
+    # Jobs sharing a key, such as a folder, run one at a time in submission order.
+    key: str = ""
+    state: str = QUEUED
+    done: int = 0
+    total: int = 0
+    message: str = ""
+    result: object = None
+    error: str = ""
+    token: CancellationToken = field(default_factory=CancellationToken)
+    # Bumped on every change so watchers can wait for the next one.
+    version: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def status(self) -> dict:
+        status = {"id": self.id, "method": self.method, "state": self.state}
+        if self.total:
+            status.update(done=self.done, total=self.total)
+        if self.message:
+            status["message"] = self.message
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+class JobContext:
+    """Given to a job function on its worker thread."""
+
+    def __init__(self, queue: "JobQueue", job: Job):
+        self._queue = queue
+        self._job = job
+
+    def progress(self, done: int, total: int, message: str = "") -> None:
+        """Report progress; also the point where a cancelled job stops."""
+        self._job.token.raise_if_cancelled()
+        self._queue._update(self._job, done=done, total=total, message=message)
+
+
+class JobQueue:
+    """Runs submitted jobs, at most max_workers at a time, keeping their status and results.
+
+    Jobs start in submission order, except that a job waits while another job
+    with the same key runs. Finished jobs are kept for status and results
+    until keep_finished more jobs have finished.
+    """
+
+    def __init__(self, max_workers: int = 2, keep_finished: int = 200):
+        self.max_workers = max_workers
+        self.keep_finished = keep_finished
+        self._jobs: dict[str, Job] = {}
+        self._queued: list[tuple[Job, Callable[[JobContext], object]]] = []
+        self._running_keys: set[str] = set()
+        self._running = 0
+        self._finished: list[str] = []
+        self._changed = threading.Condition()
+        self._ids = itertools.count(1)
+        self._executor = None
+
+    def submit(self, method: str, function: Callable[[JobContext], object], key: str = "") -> Job:
+        with self._changed:
+            job = Job(str(next(self._ids)), method, key)
+            self._jobs[job.id] = job
+            self._queued.append((job, function))
+            self._start_ready()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._changed:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    def jobs(self) -> list[Job]:
+        with self._changed:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        job.token.cancel()
+        with self._changed:
+            if job.state == QUEUED:
+                self._queued = [entry for entry in self._queued if entry[0] is not job]
+                self._finish(job, CANCELLED)
+        return job
+
+    def wait(self, job: Job, seen_version: int, timeout: float | None = None) -> tuple[int, dict]:
+        """Block until the job changes after seen_version, finishes or timeout passes.
+
+        Returns the job's version and status as of that moment.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: job.version != seen_version or job.finished, timeout)
+            return job.version, job.status()
+
+    def shutdown(self) -> None:
+        with self._changed:
+            for job, _function in self._queued:
+                self._finish(job, CANCELLED)
+            self._queued = []
+            for job in self._jobs.values():
+                job.token.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _start_ready(self) -> None:
+        # Called with the condition held.
+        for entry in list(self._queued):
+            if self._running >= self.max_workers:
+                return
+            job, function = entry
+            if job.key and job.key in self._running_keys:
+                continue
+            self._queued.remove(entry)
+            self._running += 1
+            if job.key:
+                self._running_keys.add(job.key)
+            self._update(job, state=RUNNING)
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            self._executor.submit(self._run, job, function)
+
+    def _run(self, job: Job, function: Callable[[JobContext], object]) -> None:
+        try:
+            job.token.raise_if_cancelled()
+            result = function(JobContext(self, job))
+        except TaskCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as error:
+            self._finish(job, FAILED, error=f"{type(error).__name__}: {error}")
+        else:
+            self._finish(job, DONE, result=result)
+        finally:
+            with self._changed:
+                self._running -= 1
+                self._running_keys.discard(job.key)
+                self._start_ready()
+
+    def _update(self, job: Job, **changes) -> None:
+        with self._changed:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._changed.notify_all()
+
+    def _finish(self, job: Job, state: str, **changes) -> None:
+        with self._changed:
+            if job.finished:
+                return
+            self._update(job, state=state, **changes)
+            self._finished.append(job.id)
+            while len(self._finished) > self.keep_finished:
+                self._jobs.pop(self._finished.pop(0), None)
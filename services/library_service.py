@@ -0,0 +1,308 @@
+import re
+import sqlite3
+import sys
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from audio_utils import first_contributing_artist
+from models import TrackItem, intern_tag_values
+from services.scanner import ScanOptions, TrackDetails, propose_filename, read_track_details, scan_folder
+from services.settings_service import SETTINGS_PATH
+from tag_service import SCANNED_TAG_KEYS
+from track_table import TrackTable
+
+
+LIBRARY_PATH = SETTINGS_PATH.with_name("library.sqlite3")
+SCHEMA_VERSION = 1
+# Rows written between commits while a folder is read.
+COMMIT_EVERY = 500
+FTS_COLUMNS = ("filename", "title", "artist", "albumartist", "album", "genre")
+DETAIL_COLUMNS = ("mtime_ns", "size", "duration", "bitrate", "sample_rate", "channels", "artwork_digest")
+TRACK_COLUMNS = ("path", "folder", "filename", "audio_ok", "read_error", *SCANNED_TAG_KEYS, *DETAIL_COLUMNS)
+
+_SCHEMA = f"""
+CREATE TABLE tracks (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    folder TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    audio_ok INTEGER NOT NULL,
+    read_error TEXT,
+    {", ".join(f"{key} TEXT NOT NULL DEFAULT '' COLLATE NOCASE" for key in SCANNED_TAG_KEYS)},
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    bitrate INTEGER NOT NULL DEFAULT 0,
+    sample_rate INTEGER NOT NULL DEFAULT 0,
+    channels INTEGER NOT NULL DEFAULT 0,
+    artwork_digest TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX tracks_folder ON tracks(folder);
+CREATE INDEX tracks_artist ON tracks(artist);
+CREATE INDEX tracks_albumartist ON tracks(albumartist);
+CREATE INDEX tracks_album ON tracks(album);
+CREATE INDEX tracks_genre ON tracks(genre);
+CREATE INDEX tracks_date ON tracks(date);
+CREATE VIRTUAL TABLE tracks_fts USING fts5(
+    {", ".join(FTS_COLUMNS)}, content='tracks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER tracks_insert AFTER INSERT ON tracks BEGIN
+    INSERT INTO tracks_fts(rowid, {", ".join(FTS_COLUMNS)})
+    VALUES (new.id, {", ".join(f"new.{column}" for column in FTS_COLUMNS)});
+END;
+CREATE TRIGGER tracks_delete AFTER DELETE ON tracks BEGIN
+    INSERT INTO tracks_fts(tracks_fts, rowid, {", ".join(FTS_COLUMNS)})
+    VALUES ('delete', old.id, {", ".join(f"old.{column}" for column in FTS_COLUMNS)});
+END;
+CREATE TRIGGER tracks_update AFTER UPDATE ON tracks BEGIN
+    INSERT INTO tracks_fts(tracks_fts, rowid, {", ".join(FTS_COLUMNS)})
+    VALUES ('delete', old.id, {", ".join(f"old.{column}" for column in FTS_COLUMNS)});
+    INSERT INTO tracks_fts(rowid, {", ".join(FTS_COLUMNS)})
+    VALUES (new.id, {", ".join(f"new.{column}" for column in FTS_COLUMNS)});
+END;
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+_UPSERT = (
+    f"INSERT INTO tracks ({', '.join(TRACK_COLUMNS)}) VALUES ({', '.join('?' for _ in TRACK_COLUMNS)}) "
+    f"ON CONFLICT(path) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in TRACK_COLUMNS[1:])}"
+)
+_WORD = re.compile(r"\w+")
+
+
+class LibraryError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class LibraryTrack:
+    path: Path
+    tags: dict[str, str]
+    duration: float
+    artwork_digest: str
+
+
+def fts_query(text: str) -> str:
+    """Every word of text as a quoted prefix term, e.g. "kan"* "west"*."""
+    return " ".join(f'"{word}"*' for word in _WORD.findall(text))
+
+
+class LibraryIndex:
+    """A SQLite index of every scanned track: path, tags, audio details and artwork hash.
+
+    A track's row is reused while the file's modification time and size are
+    unchanged, so scanning a known folder or opening search results only
+    reads the files that changed. Use as a context manager, which commits
+    and closes; each thread opens its own index.
+    """
+
+    def __init__(self, path: Path = LIBRARY_PATH):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(path, timeout=10)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._create_schema(version)
+        except (OSError, sqlite3.Error) as error:
+            raise LibraryError(f"Could not open the library index: {error}") from None
+        self._pending_writes = 0
+
+    def __enter__(self) -> "LibraryIndex":
+        return self
+
+    def __exit__(self, error_type, _error, _traceback) -> None:
+        try:
+            if error_type is None:
+                self._connection.commit()
+                self._connection.execute("PRAGMA optimize")
+        finally:
+            self._connection.close()
+
+    def read_track(self, path: Path, options: ScanOptions) -> TrackItem:
+        """The track from its row if the file is unchanged, otherwise read from the file and stored."""
+        row = self._connection.execute("SELECT * FROM tracks WHERE path = ?", (str(path),)).fetchone()
+        try:
+            stat = path.stat()
+        except OSError:
+            stat = None
+        if row is not None and stat is not None and row["mtime_ns"] == stat.st_mtime_ns and row["size"] == stat.st_size:
+            return self._item_from_row(row, options)
+        item, details = read_track_details(path, options)
+        self.store(item, details)
+        return item
+
+    def store(self, item: TrackItem, details: TrackDetails) -> None:
+        tags = [item.tags.get(key, "") for key in SCANNED_TAG_KEYS]
+        self._connection.execute(
+            _UPSERT,
+            (
+                str(item.path),
+                str(item.path.parent),
+                item.filename,
+                int(item.audio_ok),
+                item.read_error,
+                *tags,
+                *(getattr(details, column) for column in DETAIL_COLUMNS),
+            ),
+        )
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_EVERY:
+            self.commit()
+
+    def forget(self, paths: Iterable[Path]) -> None:
+        self._connection.executemany("DELETE FROM tracks WHERE path = ?", ((str(path),) for path in paths))
+
+    def forget_missing(self, folder: Path, present: Iterable[Path]) -> None:
+        """Drop the rows of files in folder that are not in present."""
+        rows = self._connection.execute("SELECT path FROM tracks WHERE folder = ?", (str(folder),))
+        known = {row[0] for row in rows}
+        self.forget(Path(path) for path in known - {str(path) for path in present})
+
+    def commit(self) -> None:
+        self._connection.commit()
+        self._pending_writes = 0
+
+    def search(
+        self,
+        text: str = "",
+        filters: dict[str, str] | None = None,
+        missing: Iterable[str] = (),
+        limit: int | None = None,
+    ) -> list[LibraryTrack]:
+        """Tracks matching the words of text, every tag in filters and an empty tag for each key in missing.
+
+        Filters and missing take tag keys; an "artist" filter also matches
+        the album artist. Text matches the start of words in the filename,
+        title, artists, album and genre, ignoring case and accents.
+        """
+        clauses = []
+        parameters: list = []
+        query = fts_query(text)
+        if query:
+            clauses.append("id IN (SELECT rowid FROM tracks_fts WHERE tracks_fts MATCH ?)")
+            parameters.append(query)
+        for key, value in (filters or {}).items():
+            self._check_key(key)
+            if key == "artist":
+                clauses.append("(artist = ? OR albumartist = ?)")
+                parameters += [value, value]
+            else:
+                clauses.append(f"{key} = ?")
+                parameters.append(value)
+        for key in missing:
+            self._check_key(key)
+            # Empty values are common, so with filters their index is the
+            # narrower one; the unary + keeps SQLite off the empty-value index.
+            clauses.append(f"{'+' if filters else ''}{key} = ''")
+        sql = "SELECT * FROM tracks"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY folder, filename"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        try:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as error:
+            raise LibraryError(f"Search failed: {error}") from None
+        return [
+            LibraryTrack(
+                Path(row["path"]),
+                {key: row[key] for key in SCANNED_TAG_KEYS if row[key]},
+                row["duration"],
+                row["artwork_digest"],
+            )
+            for row in rows
+        ]
+
+    def load_items(
+        self,
+        paths: Iterable[Path],
+        options: ScanOptions,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> tuple[list[TrackItem], list[Path]]:
+        """The tracks at paths, e.g. search results, and the paths that no longer exist.
+
+        Only files changed since they were indexed are read again.
+        """
+        paths = list(paths)
+        items = []
+        missing = []
+        for done, path in enumerate(paths):
+            if progress is not None:
+                progress(done, len(paths))
+            if path.is_file():
+                items.append(self.read_track(path, options))
+            else:
+                missing.append(path)
+        self.forget(missing)
+        return items, missing
+
+    def track_count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def _create_schema(self, old_version: int) -> None:
+        with self._connection:
+            if old_version:
+                # An index from another version is rebuilt by the next scans.
+                for name in ("tracks_fts", "tracks"):
+                    self._connection.execute(f"DROP TABLE IF EXISTS {name}")
+            self._connection.executescript(_SCHEMA)
+
+    @staticmethod
+    def _check_key(key: str) -> None:
+        if key not in SCANNED_TAG_KEYS:
+            raise LibraryError(f"Unknown tag field {key!r}")
+
+    @staticmethod
+    def _item_from_row(row: sqlite3.Row, options: ScanOptions) -> TrackItem:
+        path = Path(row["path"])
+        audio_ok = bool(row["audio_ok"])
+        # As read_supported_tags gives them: every key for a readable file.
+        tags = intern_tag_values({key: row[key] for key in SCANNED_TAG_KEYS}) if audio_ok else {}
+        proposed, validation_warnings = propose_filename(path.name, options)
+        return TrackItem(
+            path=path,
+            filename=path.name,
+            ext=sys.intern(path.suffix.lower()),
+            proposed_filename=proposed,
+            audio_ok=audio_ok,
+            read_error=row["read_error"],
+            artist_first=sys.intern(first_contributing_artist(tags) or "") if audio_ok else "",
+            tags=tags,
+            validation_warnings=validation_warnings,
+            artwork_present=bool(row["artwork_digest"]),
+        )
+
+
+def scan_indexed_folder(
+    folder: Path,
+    options: ScanOptions,
+    progress: Callable[[int, int], None] | None = None,
+    library_path: Path = LIBRARY_PATH,
+) -> list[TrackItem] | TrackTable:
+    """scan_folder through the library index; a plain scan if the index cannot be opened."""
+    try:
+        library = LibraryIndex(library_path)
+    except LibraryError:
+        return scan_folder(folder, options, progress)
+    try:
+        with library:
+            return scan_folder(folder, options, progress, library)
+    except sqlite3.Error:
+        return scan_folder(folder, options, progress)
+
+
+def forget_paths(paths: Iterable[Path], library_path: Path = LIBRARY_PATH) -> None:
+    """Drop rows, e.g. of files just renamed; the index is left as it was if it cannot be written."""
+    paths = list(paths)
+    if not paths:
+        return
+    try:
+        with LibraryIndex(library_path) as library:
+            library.forget(paths)
+    except (LibraryError, sqlite3.Error):
+        pass
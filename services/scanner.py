@@ -1,11 +1,22 @@
+import sys
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from pathlib import Path
 
 from audio_utils import first_contributing_artist, load_audio
-from models import TrackItem
-from rename_rules import apply_remove_rules, clean_spaces, remove_between_delims, safe_filename
-from services.artwork_service import has_embedded_artwork
+from models import TrackItem, intern_tag_values
+from rename_rules import (
+    apply_compiled_remove_rules,
+    clean_spaces,
+    compile_remove_rules,
+    remove_between_delims,
+    safe_filename,
+)
+from services.artwork_service import extract_embedded_artwork, has_embedded_artwork
+from services.artwork_store import artwork_digest
+from services.settings_service import RulePreset, compile_preset
 from tag_service import read_supported_tags
+from track_table import TRACK_TABLE_MIN_ITEMS, TrackTable
 
 
 AUDIO_EXTS = {".mp3", ".m4a", ".flac", ".ogg", ".opus", ".wav", ".aiff", ".aac"}
@@ -17,15 +28,31 @@ class ScanOptions:
     smart_spaces: bool = True
     remove_between_enabled: bool = False
     delimiter_pair: str = "[]"
+    # Prepared remove_rules, e.g. from a CompiledPreset; compiled here when not given.
+    compiled_remove_rules: tuple | None = field(default=None, compare=False, repr=False)
+
+    def __post_init__(self):
+        if self.compiled_remove_rules is None:
+            object.__setattr__(
+                self,
+                "compiled_remove_rules",
+                compile_remove_rules(self.remove_rules, self.smart_spaces),
+            )
+
+    @classmethod
+    def from_preset(cls, preset: RulePreset) -> "ScanOptions":
+        return cls(
+            remove_rules=preset.remove_rules,
+            smart_spaces=preset.smart_spaces,
+            remove_between_enabled=preset.remove_between_enabled,
+            delimiter_pair=preset.delimiter_pair,
+            compiled_remove_rules=compile_preset(preset).remove_rules,
+        )
 
 
 def propose_filename(filename: str, options: ScanOptions) -> tuple[str, list[str]]:
     path = Path(filename)
-    proposed_base = apply_remove_rules(
-        path.stem,
-        options.remove_rules,
-        smart_spaces=options.smart_spaces,
-    )
+    proposed_base = apply_compiled_remove_rules(path.stem, options.compiled_remove_rules)
     warnings = []
     if options.remove_between_enabled:
         if len(options.delimiter_pair) == 2:
@@ -41,29 +68,94 @@ def propose_filename(filename: str, options: ScanOptions) -> tuple[str, list[str
     return proposed_base + path.suffix.lower(), warnings
 
 
-def scan_folder(folder: Path, options: ScanOptions) -> list[TrackItem]:
-    items = []
-    for path in sorted(folder.iterdir(), key=lambda entry: entry.name.casefold()):
-        ext = path.suffix.lower()
-        if not path.is_file() or ext not in AUDIO_EXTS:
-            continue
-
-        audio, error = load_audio(str(path))
-        tags = read_supported_tags(audio) if audio is not None else {}
-        artist_first = first_contributing_artist(audio) or "" if audio is not None else ""
-        proposed, validation_warnings = propose_filename(path.name, options)
-        items.append(
-            TrackItem(
-                path=path,
-                filename=path.name,
-                ext=ext,
-                proposed_filename=proposed,
-                audio_ok=audio is not None,
-                read_error=error,
-                artist_first=artist_first,
-                tags=tags,
-                validation_warnings=validation_warnings,
-                artwork_present=has_embedded_artwork(path),
-            )
-        )
+def list_audio_files(folder: Path) -> list[Path]:
+    """Audio files directly inside folder, in case-insensitive name order."""
+    return [
+        path
+        for path in sorted(folder.iterdir(), key=lambda entry: entry.name.casefold())
+        if path.suffix.lower() in AUDIO_EXTS and path.is_file()
+    ]
+
+
+@dataclass(frozen=True)
+class TrackDetails:
+    """File and stream facts the library index keeps beside the tags."""
+
+    mtime_ns: int
+    size: int
+    duration: float = 0.0
+    bitrate: int = 0
+    sample_rate: int = 0
+    channels: int = 0
+    artwork_digest: str = ""
+
+
+def read_track(path: Path, options: ScanOptions) -> TrackItem:
+    return _read_track(path, options, details=False)[0]
+
+
+def read_track_details(path: Path, options: ScanOptions) -> tuple[TrackItem, TrackDetails]:
+    """read_track, plus the details; the artwork is hashed instead of only detected."""
+    return _read_track(path, options, details=True)
+
+
+def _read_track(path: Path, options: ScanOptions, details: bool) -> tuple[TrackItem, TrackDetails | None]:
+    stat = path.stat() if details else None
+    ext = path.suffix.lower()
+    audio, error = load_audio(str(path), easy=False)
+    tags = intern_tag_values(read_supported_tags(audio)) if audio is not None else {}
+    artist_first = sys.intern(first_contributing_artist(tags) or "") if audio is not None else ""
+    proposed, validation_warnings = propose_filename(path.name, options)
+    if details:
+        artwork = extract_embedded_artwork(path)
+        artwork_present = artwork is not None
+    else:
+        artwork_present = has_embedded_artwork(path)
+    item = TrackItem(
+        path=path,
+        filename=path.name,
+        ext=sys.intern(ext),
+        proposed_filename=proposed,
+        audio_ok=audio is not None,
+        read_error=error,
+        artist_first=artist_first,
+        tags=tags,
+        validation_warnings=validation_warnings,
+        artwork_present=artwork_present,
+    )
+    if not details:
+        return item, None
+    info = getattr(audio, "info", None)
+    return item, TrackDetails(
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        duration=float(getattr(info, "length", 0) or 0),
+        bitrate=int(getattr(info, "bitrate", 0) or 0),
+        sample_rate=int(getattr(info, "sample_rate", 0) or 0),
+        channels=int(getattr(info, "channels", 0) or 0),
+        artwork_digest=artwork_digest(artwork.data) if artwork is not None else "",
+    )
+
+
+def scan_folder(
+    folder: Path,
+    options: ScanOptions,
+    progress: Callable[[int, int], None] | None = None,
+    library=None,
+) -> list[TrackItem] | TrackTable:
+    """Read every audio file in folder. progress(done, total) is called before each file.
+
+    With a library index, files it holds unchanged are loaded from it
+    instead of being read, and it is brought up to date with the folder.
+    Folders of at least TRACK_TABLE_MIN_ITEMS files are read straight into
+    a TrackTable, so only one TrackItem exists at a time.
+    """
+    paths = list_audio_files(folder)
+    items = TrackTable() if len(paths) >= TRACK_TABLE_MIN_ITEMS else []
+    for done, path in enumerate(paths):
+        if progress is not None:
+            progress(done, len(paths))
+        items.append(read_track(path, options) if library is None else library.read_track(path, options))
+    if library is not None:
+        library.forget_missing(folder, paths)
     return items
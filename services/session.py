@@ -0,0 +1,243 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from models import ARTWORK_FIELD, ArtworkData, TrackCollection, TrackItem
+from rename_rules import extract_index_with_pair
+from services.export_service import TagFileError, TrackMatcher, read_tag_rows
+from tag_service import (
+    FilenamePatternError,
+    TagNormalizer,
+    compile_filename_pattern,
+    extract_tag_value_from_filename,
+    title_from_filename,
+)
+
+
+class EditError(Exception):
+    """An edit was given input it cannot use; nothing was changed."""
+
+    def __init__(self, title: str, message: str):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+
+@dataclass(frozen=True)
+class EditSummary:
+    field: str
+    # Items whose value changed, items that already had it, and items no value
+    # could be derived for (e.g. no match between extraction boundaries).
+    changed: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    # Names of the files whose filename did not fit an extraction.
+    unmatched: tuple[str, ...] = ()
+
+    @property
+    def applied(self) -> int:
+        return self.changed + self.unchanged
+
+
+def _summary(field: str, outcomes: list[bool | None], unmatched: Iterable[str] = ()) -> EditSummary:
+    """Count per-item outcomes: True changed, False unchanged, None skipped."""
+    changed = outcomes.count(True)
+    skipped = outcomes.count(None)
+    return EditSummary(field, changed, len(outcomes) - changed - skipped, skipped, tuple(unmatched))
+
+
+# Unmatched import rows named in the summary; the rest are only counted.
+IMPORT_UNMATCHED_LIMIT = 100
+
+
+class Session:
+    """The tracks being edited and the bulk edits made to them.
+
+    Each edit takes the items to change, such as a table selection, and
+    defaults to every item. It returns an EditSummary, or raises EditError
+    before changing anything.
+    """
+
+    def __init__(self, items: Iterable[TrackItem] = ()):
+        self.items = TrackCollection(items)
+
+    def load(self, items: Iterable[TrackItem]) -> TrackCollection:
+        """Replace the items, e.g. after a scan; returns the new collection."""
+        self.items = TrackCollection(items)
+        return self.items
+
+    def remove_paths(self, paths: Iterable[Path]) -> list[TrackItem]:
+        """Drop the items of files that no longer exist, keeping every other item's pending edits."""
+        paths = set(paths)
+        return self.items.remove([item for item in self.items if item.path in paths])
+
+    def set_tag(self, key: str, value: str, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        value = value.strip()
+        if not value:
+            raise EditError("Empty value", "Enter a value, or use Erase to remove the tag.")
+        return _summary(key, [item.set_pending_tag(key, value) for item in self._targets(items)])
+
+    def erase_tag(self, key: str, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        return _summary(key, [item.erase_tag(key) for item in self._targets(items)])
+
+    def reset_tag(self, key: str, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        return _summary(key, [item.reset_pending_tag(key) for item in self._targets(items)])
+
+    def titles_from_filenames(self, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        return _summary(
+            "title",
+            [
+                item.set_pending_tag("title", title_from_filename(item.proposed_filename))
+                for item in self._targets(items)
+            ],
+        )
+
+    def extract_tag_from_filenames(
+        self,
+        key: str,
+        text_before: str,
+        text_after: str,
+        items: Iterable[TrackItem] | None = None,
+    ) -> EditSummary:
+        if not text_before and not text_after:
+            raise EditError(
+                "Extraction boundaries required",
+                "Enter text that appears before or after the value you want to extract.",
+            )
+        outcomes = []
+        unmatched = []
+        for item in self._targets(items):
+            value = extract_tag_value_from_filename(item.proposed_filename, text_before, text_after)
+            if value is None:
+                unmatched.append(item.filename)
+                outcomes.append(None)
+            else:
+                outcomes.append(item.set_pending_tag(key, value))
+        return _summary(key, outcomes, unmatched)
+
+    def extract_fields_from_filenames(self, pattern: str, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        """Set every field of a pattern such as "{tracknumber} - {artist} - {title}" in one pass."""
+        if not pattern.strip():
+            raise EditError("Filename pattern required", "Enter a pattern such as {tracknumber} - {artist} - {title}.")
+        try:
+            compiled = compile_filename_pattern(pattern)
+        except FilenamePatternError as error:
+            raise EditError("Invalid filename pattern", str(error)) from None
+        outcomes = []
+        unmatched = []
+        for item in self._targets(items):
+            values = compiled.match(item.proposed_filename)
+            if values is None:
+                unmatched.append(item.filename)
+                outcomes.append(None)
+                continue
+            changed = False
+            for key, value in values.items():
+                changed = item.set_pending_tag(key, value) or changed
+            outcomes.append(changed)
+        return _summary(", ".join(compiled.fields), outcomes, unmatched)
+
+    def normalize_tags(self, normalizer: TagNormalizer, items: Iterable[TrackItem] | None = None) -> list[EditSummary]:
+        """Set the normalized form of each tag the normalizer covers; one summary per tag, empty tags skipped."""
+        if not normalizer.steps:
+            raise EditError("No normalization steps", "Choose at least one normalization step.")
+        targets = list(self._targets(items))
+        summaries = []
+        for key in normalizer.keys:
+            outcomes = []
+            for item in targets:
+                value = item.effective_tag(key)
+                if not value:
+                    outcomes.append(None)
+                    continue
+                normalized = normalizer.normalize(key, value)
+                # Unchanged values get no pending edit, so applying does not rewrite them.
+                outcomes.append(normalized != value and item.set_pending_tag(key, normalized))
+            summaries.append(_summary(key, outcomes))
+        return summaries
+
+    def import_tags(self, path: Path, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        """Set the tags in an exported .csv or .jsonl file, matching rows by path or fingerprint.
+
+        Rows are read one at a time. Rows matching no item are counted as
+        skipped. A file that turns out to be unreadable part way keeps the
+        rows before it.
+        """
+        matcher = TrackMatcher(self._targets(items))
+        changed = unchanged = skipped = 0
+        unmatched = []
+        try:
+            for row in read_tag_rows(path):
+                item = matcher.find(row)
+                if item is None:
+                    skipped += 1
+                    if len(unmatched) < IMPORT_UNMATCHED_LIMIT:
+                        unmatched.append(row.path or row.fingerprint or f"line {row.line}")
+                    continue
+                item_changed = False
+                for key, value in row.tags.items():
+                    if item.effective_tag(key) != value:
+                        item_changed = item.set_pending_tag(key, value) or item_changed
+                if item_changed:
+                    changed += 1
+                else:
+                    unchanged += 1
+        except TagFileError as error:
+            raise EditError("Could not import tags", str(error)) from None
+        return EditSummary("tags", changed, unchanged, skipped, tuple(unmatched))
+
+    def number_tracks(self, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        """Number the items 01, 02, ... in the order given."""
+        return _summary(
+            "tracknumber",
+            [
+                item.set_pending_tag("tracknumber", f"{index:02d}")
+                for index, item in enumerate(self._targets(items), start=1)
+            ],
+        )
+
+    def track_numbers_from_filenames(
+        self,
+        markers: str,
+        items: Iterable[TrackItem] | None = None,
+    ) -> EditSummary:
+        """Set missing track numbers from the number between markers, e.g. [03]; tracks that have one are skipped."""
+        markers = markers.strip()
+        if len(markers) != 2:
+            raise EditError(
+                "Invalid extract markers",
+                "Extract markers must be exactly 2 characters, such as [], %%, or ''.",
+            )
+        outcomes = []
+        for item in self._targets(items):
+            if item.effective_tag("tracknumber"):
+                outcomes.append(None)
+                continue
+            track_number = extract_index_with_pair(Path(item.proposed_filename).stem, markers)
+            outcomes.append(
+                None if track_number is None else item.set_pending_tag("tracknumber", f"{track_number:02d}")
+            )
+        return _summary("tracknumber", outcomes)
+
+    def set_artwork(self, artwork: ArtworkData, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        return _summary(ARTWORK_FIELD, [item.set_pending_artwork(artwork) for item in self._targets(items)])
+
+    def remove_artwork(self, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        return _summary(ARTWORK_FIELD, [item.erase_artwork() for item in self._targets(items)])
+
+    def reset_artwork(self, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        return _summary(ARTWORK_FIELD, [item.reset_pending_artwork() for item in self._targets(items)])
+
+    def clear_changes(self, items: Iterable[TrackItem] | None = None) -> EditSummary:
+        """Drop every pending tag and artwork change."""
+        return _summary(
+            "all",
+            [
+                # Both resets must run, so no short-circuit `or`.
+                any((item.clear_pending_tags(), item.reset_pending_artwork()))
+                for item in self._targets(items)
+            ],
+        )
+
+    def _targets(self, items: Iterable[TrackItem] | None) -> Iterable[TrackItem]:
+        return self.items if items is None else items
@@ -1,8 +1,14 @@
+import hashlib
 import json
+import re
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
 import os
 
+from rename_rules import compile_remove_rules
+from tag_service import NORMALIZE_STEPS, TagNormalizer
+from warning_service import DEFAULT_RULE_NAMES, ValidationOptions, ValidationRule, build_rules
+
 APP_NAME = "MusicFileManager"
 
 def get_settings_path() -> Path:
@@ -25,6 +31,19 @@ class RulePreset:
     track_markers: str = "[]"
     tag_extract_before: str = ""
     tag_extract_after: str = ""
+    # e.g. "{tracknumber} - {artist} - {title}"; see tag_service.compile_filename_pattern.
+    filename_pattern: str = ""
+    normalize_steps: list[str] = field(default_factory=lambda: list(NORMALIZE_STEPS))
+    validation_rules: list[str] = field(default_factory=lambda: list(DEFAULT_RULE_NAMES))
+    genre_whitelist: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ArtworkSettings:
+    normalize: bool = False
+    max_edge: int = 1200
+    jpeg_quality: int = 90
+    progressive: bool = True
 
 
 @dataclass
@@ -35,11 +54,55 @@ class AppSettings:
     rule_presets: dict[str, RulePreset] = field(
         default_factory=lambda: {"Default": RulePreset()}
     )
+    artwork: ArtworkSettings = field(default_factory=ArtworkSettings)
 
     def active_rules(self) -> RulePreset:
         return self.rule_presets.get(self.active_preset, self.rule_presets["Default"])
 
 
+@dataclass(frozen=True)
+class CompiledPreset:
+    """What the cleanup and validation code derives from a RulePreset, built once per content."""
+
+    digest: str
+    remove_rules: tuple[re.Pattern | str, ...]
+    validation_rule_names: tuple[str, ...]
+    validation_options: ValidationOptions
+    # Shared so its per-value results carry over between runs of the preset.
+    tag_normalizer: TagNormalizer
+
+    def build_validation_rules(self) -> list[ValidationRule]:
+        # Rules keep per-item state, so every ValidationIndex gets its own instances.
+        return build_rules(self.validation_rule_names, self.validation_options)
+
+
+COMPILED_PRESET_CACHE_SIZE = 512
+_compiled_presets: dict[str, CompiledPreset] = {}
+
+
+def preset_digest(preset: RulePreset) -> str:
+    payload = json.dumps(asdict(preset), sort_keys=True, ensure_ascii=True)
+    return hashlib.blake2b(payload.encode("ascii"), digest_size=16).hexdigest()
+
+
+def compile_preset(preset: RulePreset) -> CompiledPreset:
+    """Compiled form of preset, shared by every preset with the same content."""
+    digest = preset_digest(preset)
+    compiled = _compiled_presets.get(digest)
+    if compiled is None:
+        compiled = CompiledPreset(
+            digest,
+            compile_remove_rules(preset.remove_rules, preset.smart_spaces),
+            tuple(preset.validation_rules),
+            ValidationOptions(genre_whitelist=tuple(preset.genre_whitelist)),
+            TagNormalizer(preset.normalize_steps, preset.genre_whitelist),
+        )
+        if len(_compiled_presets) >= COMPILED_PRESET_CACHE_SIZE:
+            del _compiled_presets[next(iter(_compiled_presets))]
+        _compiled_presets[digest] = compiled
+    return compiled
+
+
 def load_settings(path: Path = SETTINGS_PATH) -> AppSettings:
     if not path.exists():
         return AppSettings()
@@ -73,19 +136,102 @@ def load_settings(path: Path = SETTINGS_PATH) -> AppSettings:
     active_preset = data.get("active_preset", "Default")
     if active_preset not in presets:
         active_preset = "Default"
-    return AppSettings(theme=theme, active_preset=active_preset, rule_presets=presets)
+    artwork = _artwork_settings_from_dict(data.get("artwork"))
+    return AppSettings(
+        theme=theme,
+        active_preset=active_preset,
+        rule_presets=presets,
+        artwork=artwork,
+    )
 
 
 def save_settings(settings: AppSettings, path: Path = SETTINGS_PATH) -> None:
+    _write_atomically(path, _settings_json(settings))
+
+
+class SettingsSaver:
+    """Coalesces saves: request() remembers the settings to write, flush() writes them once.
+
+    A flush whose content matches the last file written by this saver is skipped.
+    """
+
+    def __init__(self, path: Path = SETTINGS_PATH):
+        self.path = path
+        self._pending: AppSettings | None = None
+        self._last_written: str | None = None
+
+    @property
+    def pending(self) -> bool:
+        return self._pending is not None
+
+    def request(self, settings: AppSettings) -> None:
+        self._pending = settings
+
+    def flush(self) -> bool:
+        """Write the requested settings; returns whether the file was written."""
+        settings = self._pending
+        if settings is None:
+            return False
+        text = _settings_json(settings)
+        written = text != self._last_written
+        if written:
+            # A failed write stays pending so the next flush retries it.
+            _write_atomically(self.path, text)
+            self._last_written = text
+        self._pending = None
+        return written
+
+
+def _settings_json(settings: AppSettings) -> str:
+    return json.dumps(asdict(settings), indent=2, ensure_ascii=True) + "\n"
+
+
+def _write_atomically(path: Path, text: str) -> None:
+    # Readers see the old file or the new one, never a partly written one.
+    import tempfile
+
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(
-        json.dumps(asdict(settings), indent=2, ensure_ascii=True) + "\n",
-        encoding="utf-8",
-    )
+    descriptor, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
 
 def _rule_preset_from_dict(data: dict) -> RulePreset:
     defaults = asdict(RulePreset())
     values = {key: data.get(key, default) for key, default in defaults.items()}
-    if not isinstance(values["remove_rules"], list):
-        values["remove_rules"] = defaults["remove_rules"]
+    for key in ("remove_rules", "validation_rules", "genre_whitelist", "normalize_steps"):
+        if not isinstance(values[key], list) or not all(isinstance(value, str) for value in values[key]):
+            values[key] = defaults[key]
+    if not isinstance(values["filename_pattern"], str):
+        values["filename_pattern"] = defaults["filename_pattern"]
+    values["normalize_steps"] = [step for step in values["normalize_steps"] if step in NORMALIZE_STEPS]
     return RulePreset(**values)
+
+
+def _artwork_settings_from_dict(data) -> ArtworkSettings:
+    defaults = ArtworkSettings()
+    if not isinstance(data, dict):
+        return defaults
+    max_edge = data.get("max_edge", defaults.max_edge)
+    # As in the settings tab, which refuses edges below 1.
+    if not isinstance(max_edge, int) or max_edge < 1:
+        max_edge = defaults.max_edge
+    jpeg_quality = data.get("jpeg_quality", defaults.jpeg_quality)
+    if not isinstance(jpeg_quality, int) or not 1 <= jpeg_quality <= 95:
+        jpeg_quality = defaults.jpeg_quality
+    return ArtworkSettings(
+        normalize=bool(data.get("normalize", defaults.normalize)),
+        max_edge=max_edge,
+        jpeg_quality=jpeg_quality,
+        progressive=bool(data.get("progressive", defaults.progressive)),
+    )
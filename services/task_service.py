@@ -0,0 +1,183 @@
+import queue
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task once its cancellation token has been triggered."""
+
+
+class ResourceBusy(Exception):
+    def __init__(self, resource: str, holder: "Task"):
+        super().__init__(f"{resource} is in use by {holder.name}")
+        self.resource = resource
+        self.holder = holder
+
+
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TaskCancelled()
+
+
+@dataclass(eq=False)
+class Task:
+    name: str
+    resources: frozenset[str] = frozenset()
+    token: CancellationToken = field(default_factory=CancellationToken)
+    on_done: Callable[[object], None] | None = None
+    on_error: Callable[[Exception], None] | None = None
+    on_progress: Callable[[int, int, str], None] | None = None
+    on_cancelled: Callable[[], None] | None = None
+    finished: bool = False
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+
+class TaskContext:
+    """Given to a task function on its worker thread."""
+
+    def __init__(self, task: Task, results: queue.SimpleQueue):
+        self._task = task
+        self._results = results
+
+    @property
+    def token(self) -> CancellationToken:
+        return self._task.token
+
+    def progress(self, done: int, total: int, message: str = "") -> None:
+        """Report progress; also the point where a cancelled task stops."""
+        self._task.token.raise_if_cancelled()
+        self._results.put((self._task, "progress", (done, total, message)))
+
+
+class TaskRunner:
+    """Runs blocking work on a worker pool and hands results back on the polling thread.
+
+    submit() starts function(context) on a worker. Results, errors and progress
+    travel through a queue drained by poll(), so every callback runs on the
+    thread that polls - the Tk main loop, via after(). A task holds its named
+    resources until its result has been delivered, and submitting a task that
+    needs a held resource raises ResourceBusy. Worker threads are started by
+    the first submit().
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor = None
+        self._results: queue.SimpleQueue = queue.SimpleQueue()
+        self._holders: dict[str, Task] = {}
+        self._running: list[Task] = []
+
+    def submit(
+        self,
+        name: str,
+        function: Callable[[TaskContext], object],
+        resources: Iterable[str] = (),
+        on_done: Callable[[object], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+        on_progress: Callable[[int, int, str], None] | None = None,
+        on_cancelled: Callable[[], None] | None = None,
+    ) -> Task:
+        resources = frozenset(resources)
+        for resource in resources:
+            holder = self._holders.get(resource)
+            if holder is not None:
+                raise ResourceBusy(resource, holder)
+        task = Task(
+            name,
+            resources,
+            on_done=on_done,
+            on_error=on_error,
+            on_progress=on_progress,
+            on_cancelled=on_cancelled,
+        )
+        for resource in resources:
+            self._holders[resource] = task
+        self._running.append(task)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="task")
+        self._executor.submit(self._run, task, function)
+        return task
+
+    def holder(self, resource: str) -> Task | None:
+        return self._holders.get(resource)
+
+    def running(self) -> list[Task]:
+        return list(self._running)
+
+    def poll(self) -> int:
+        """Deliver queued results and progress; returns the number of messages handled."""
+        messages = []
+        while True:
+            try:
+                messages.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        # Only the latest progress of a task that is still running is worth drawing.
+        latest_progress = {}
+        for index, (task, kind, _payload) in enumerate(messages):
+            if kind == "progress":
+                latest_progress[task] = index
+            else:
+                latest_progress[task] = None
+        for index, (task, kind, payload) in enumerate(messages):
+            if kind == "progress":
+                if latest_progress[task] == index and task.on_progress:
+                    task.on_progress(*payload)
+                continue
+            self._finish(task)
+            if kind == "done":
+                if task.on_done:
+                    task.on_done(payload)
+            elif kind == "cancelled":
+                if task.on_cancelled:
+                    task.on_cancelled()
+            elif task.on_error:
+                task.on_error(payload)
+            else:
+                print(f"[task failed] {task.name}: {type(payload).__name__}: {payload}")
+        return len(messages)
+
+    def cancel_all(self) -> None:
+        for task in self._running:
+            task.cancel()
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task: Task, function: Callable[[TaskContext], object]) -> None:
+        try:
+            task.token.raise_if_cancelled()
+            result = function(TaskContext(task, self._results))
+        except TaskCancelled:
+            self._results.put((task, "cancelled", None))
+        except Exception as error:
+            self._results.put((task, "error", error))
+        else:
+            self._results.put((task, "done", result))
+
+    def _finish(self, task: Task) -> None:
+        # Resources are released before callbacks run, so a callback can start follow-up work.
+        task.finished = True
+        for resource in task.resources:
+            if self._holders.get(resource) is task:
+                del self._holders[resource]
+        if task in self._running:
+            self._running.remove(task)
@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from models import ArtworkData
+from services.artwork_service import extract_embedded_artwork
+from services.artwork_store import artwork_digest
+
+
+THUMBNAIL_SIZE = 160
+# Files whose embedded cover digest is remembered, least recently used first out.
+EMBEDDED_DIGEST_LIMIT = 4096
+
+
+def make_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> bytes:
+    """Decode an image and return a PNG no larger than size x size."""
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        image.draft("RGB", (size, size))
+        image.thumbnail((size, size))
+        if image.mode not in {"RGB", "RGBA"}:
+            image = image.convert("RGBA")
+        output = BytesIO()
+        image.save(output, format="PNG")
+    return output.getvalue()
+
+
+class ThumbnailCache:
+    """Least-recently-used thumbnails keyed by artwork digest, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> bytes | None:
+        with self._lock:
+            thumbnail = self._entries.get(digest)
+            if thumbnail is not None:
+                self._entries.move_to_end(digest)
+            return thumbnail
+
+    def put(self, digest: str, thumbnail: bytes) -> None:
+        with self._lock:
+            previous = self._entries.pop(digest, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[digest] = thumbnail
+            self._size += len(thumbnail)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _digest, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def __contains__(self, digest: str) -> bool:
+        with self._lock:
+            return digest in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def memory_usage(self) -> int:
+        return self._size
+
+
+class ThumbnailLoader:
+    """Extracts and decodes artwork on worker threads, sharing one ThumbnailCache."""
+
+    def __init__(self, cache: ThumbnailCache | None = None, max_workers: int = 2):
+        self.cache = cache or ThumbnailCache()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+        # Embedded covers are remembered by file state so reselecting a row skips extraction.
+        # Worker threads write it, so it is guarded by _lock.
+        self._embedded_digests: OrderedDict[tuple[Path, int], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def request(self, path: Path, artwork: ArtworkData | None = None) -> Future:
+        """Return a future resolving to PNG thumbnail bytes, or None if there is no artwork."""
+        if artwork is not None:
+            digest = artwork.digest or artwork_digest(artwork.data)
+        else:
+            digest = self._known_embedded_digest(path)
+            if digest == "":
+                return _resolved(None)
+        if digest is not None:
+            cached = self.cache.get(digest)
+            if cached is not None:
+                return _resolved(cached)
+        return self._executor.submit(self._load, path, artwork)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _known_embedded_digest(self, path: Path) -> str | None:
+        """Digest of the file's embedded cover, "" if it has none, None if not yet known."""
+        try:
+            key = (path, path.stat().st_mtime_ns)
+        except OSError:
+            return None
+        with self._lock:
+            digest = self._embedded_digests.get(key)
+            if digest is not None:
+                self._embedded_digests.move_to_end(key)
+            return digest
+
+    def _remember_embedded_digest(self, key: tuple[Path, int], digest: str) -> None:
+        with self._lock:
+            self._embedded_digests[key] = digest
+            self._embedded_digests.move_to_end(key)
+            while len(self._embedded_digests) > EMBEDDED_DIGEST_LIMIT:
+                self._embedded_digests.popitem(last=False)
+
+    def _load(self, path: Path, artwork: ArtworkData | None) -> bytes | None:
+        if artwork is None:
+            try:
+                key = (path, path.stat().st_mtime_ns)
+            except OSError:
+                return None
+            artwork = extract_embedded_artwork(path)
+            if artwork is None:
+                self._remember_embedded_digest(key, "")
+                return None
+            digest = artwork_digest(artwork.data)
+            self._remember_embedded_digest(key, digest)
+        else:
+            digest = artwork.digest or artwork_digest(artwork.data)
+        thumbnail = self.cache.get(digest)
+        if thumbnail is None:
+            try:
+                thumbnail = make_thumbnail(artwork.data)
+            except (ImportError, OSError, ValueError):
+                return None
+            self.cache.put(digest, thumbnail)
+        return thumbnail
+
+
+def _resolved(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
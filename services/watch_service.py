@@ -0,0 +1,246 @@
+import os
+import select
+import struct
+import sys
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from services.scanner import AUDIO_EXTS
+
+
+# Directory entry changes only: a file growing in place is followed by stat
+# while it is pending, so its writes never need to wake the watcher.
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_CLOEXEC = 0o2000000
+_IN_NONBLOCK = 0o4000
+_WATCH_MASK = _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+# FAT stores times in 2 second steps, so a folder changed this recently may
+# change again without its mtime moving; it is listed again on the next poll.
+_COARSE_MTIME_NS = 2_000_000_000
+
+
+class _Inotify:
+    """Linux inotify through libc; open() returns None anywhere else."""
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self._fd = fd
+
+    @classmethod
+    def open(cls) -> "_Inotify | None":
+        if not sys.platform.startswith("linux"):
+            return None
+        import ctypes
+
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def add(self, folder: Path) -> int | None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), _WATCH_MASK)
+        return wd if wd >= 0 else None
+
+    def read_changes(self) -> set[int] | None:
+        """Watch descriptors with new events, or None if the kernel queue overflowed."""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    return None
+                changed.add(wd)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+@dataclass
+class _Pending:
+    signature: tuple[int, int]
+    since: float
+
+
+@dataclass
+class _FolderState:
+    stamp: int | None = None
+    known: set[str] = field(default_factory=set)
+    pending: dict[str, _Pending] = field(default_factory=dict)
+
+
+class FolderWatcher:
+    """Reports audio files added to folders once their writes have settled.
+
+    A file is ready when its size and mtime have not changed for settle_seconds.
+    Files present when watching starts are never reported. A folder is listed
+    again only after inotify reports an entry change or, when polling, after its
+    mtime moves, so an idle folder costs nothing (inotify) or one stat per poll.
+    """
+
+    def __init__(
+        self,
+        folders: Iterable[Path],
+        settle_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+        use_inotify: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._folders = {Path(folder): _FolderState() for folder in folders}
+        self._inotify = _Inotify.open() if use_inotify else None
+        self._watches: dict[int, Path] = {}
+        self._polled = set(self._folders)
+        if self._inotify is not None:
+            for folder in self._folders:
+                wd = self._inotify.add(folder)
+                if wd is not None:
+                    self._watches[wd] = folder
+                    self._polled.discard(folder)
+        for folder, state in self._folders.items():
+            state.stamp = _trusted_stamp(folder)
+            state.known = _audio_names(folder)
+
+    @property
+    def backend(self) -> str:
+        if not self._watches:
+            return "polling"
+        return "inotify" if not self._polled else "inotify and polling"
+
+    def poll(self) -> dict[Path, list[Path]]:
+        """Files that became ready since the last poll, grouped by folder."""
+        now = self._clock()
+        changed = self._changed_folders()
+        ready = {}
+        for folder, state in self._folders.items():
+            if folder in changed:
+                self._relist(folder, state, now)
+            if state.pending:
+                paths = self._settled(folder, state, now)
+                if paths:
+                    ready[folder] = paths
+        return ready
+
+    def wait(self) -> None:
+        """Sleep until the next poll is due; with inotify alone, until something changes."""
+        pending = any(state.pending for state in self._folders.values())
+        if self._inotify is None:
+            time.sleep(self.poll_interval)
+            return
+        timeout = self.poll_interval if pending or self._polled else None
+        select.select([self._inotify], [], [], timeout)
+
+    def mark_done(self, paths: Iterable[Path]) -> None:
+        """Remember files written by the caller so their new names are not reported."""
+        for path in paths:
+            state = self._folders.get(path.parent)
+            if state is not None:
+                state.known.add(path.name)
+                state.pending.pop(path.name, None)
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self) -> "FolderWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _changed_folders(self) -> set[Path]:
+        changed = set()
+        if self._inotify is not None:
+            wds = self._inotify.read_changes()
+            if wds is None:
+                changed.update(self._watches.values())
+            else:
+                changed.update(self._watches[wd] for wd in wds if wd in self._watches)
+        for folder in self._polled:
+            state = self._folders[folder]
+            stamp = _folder_stamp(folder)
+            if stamp is None or stamp != state.stamp:
+                changed.add(folder)
+        return changed
+
+    def _relist(self, folder: Path, state: _FolderState, now: float) -> None:
+        state.stamp = _trusted_stamp(folder)
+        names = _audio_names(folder)
+        state.known &= names
+        for name in list(state.pending):
+            if name not in names:
+                del state.pending[name]
+        for name in names - state.known - state.pending.keys():
+            signature = _signature(folder / name)
+            if signature is not None:
+                state.pending[name] = _Pending(signature, now)
+
+    def _settled(self, folder: Path, state: _FolderState, now: float) -> list[Path]:
+        ready = []
+        for name, pending in list(state.pending.items()):
+            signature = _signature(folder / name)
+            if signature is None:
+                del state.pending[name]
+            elif signature != pending.signature:
+                state.pending[name] = _Pending(signature, now)
+            elif signature[0] > 0 and now - pending.since >= self.settle_seconds:
+                del state.pending[name]
+                state.known.add(name)
+                ready.append(folder / name)
+        return sorted(ready, key=lambda path: path.name.casefold())
+
+
+def _folder_stamp(folder: Path) -> int | None:
+    try:
+        return os.stat(folder).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _trusted_stamp(folder: Path) -> int | None:
+    """The folder's mtime, or None while it is too recent to rule out a missed change."""
+    stamp = _folder_stamp(folder)
+    if stamp is not None and time.time_ns() - stamp < _COARSE_MTIME_NS:
+        return None
+    return stamp
+
+
+def _audio_names(folder: Path) -> set[str]:
+    try:
+        with os.scandir(folder) as entries:
+            return {
+                entry.name
+                for entry in entries
+                if os.path.splitext(entry.name)[1].lower() in AUDIO_EXTS and entry.is_file()
+            }
+    except OSError:
+        return set()
+
+
+def _signature(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
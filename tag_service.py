@@ -1,8 +1,13 @@
+import re
+import unicodedata
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
+from functools import cache, lru_cache, partial
 from pathlib import Path
 
-from audio_utils import get_tag, set_tag
+from audio_utils import get_tag
 from models import TrackItem
+from rename_rules import clean_spaces
 
 
 @dataclass(frozen=True)
@@ -23,8 +28,60 @@ TAG_FIELDS = (
 TAG_KEY_BY_LABEL = {field.label: field.key for field in TAG_FIELDS}
 SCANNED_TAG_KEYS = tuple(field.key for field in TAG_FIELDS) + ("tracknumber",)
 
+# Native containers are mapped directly, skipping mutagen's Easy key translation.
+# Vorbis comments already use the scanned key names.
+ID3_FRAME_IDS = {
+    "title": "TIT2",
+    "albumartist": "TPE2",
+    "artist": "TPE1",
+    "album": "TALB",
+    "date": "TDRC",
+    "genre": "TCON",
+    "tracknumber": "TRCK",
+}
+MP4_ATOMS = {
+    "title": "\xa9nam",
+    "albumartist": "aART",
+    "artist": "\xa9ART",
+    "album": "\xa9alb",
+    "date": "\xa9day",
+    "genre": "\xa9gen",
+    "tracknumber": "trkn",
+}
+ID3_FRAME_ITEMS = tuple(ID3_FRAME_IDS.items())
+MP4_ATOM_ITEMS = tuple(MP4_ATOMS.items())
+
+# Frames holding several values are shown joined so no value is silently hidden.
+# Only the fields that commonly hold several values are split again when written,
+# so a title such as "Song; Part 2" stays one value.
+MULTI_VALUE_SEPARATOR = "; "
+MULTI_VALUE_TAG_KEYS = frozenset({"artist", "albumartist", "genre"})
+
+
+class TagValueError(ValueError):
+    """A pending value the file's tag format cannot hold, such as a non-numeric MP4 track number."""
+
+
+@cache
+def _native_tag_handlers() -> tuple:
+    # (tags class, read, set, delete); mutagen is imported on first use.
+    from mutagen._vorbis import VComment
+    from mutagen.id3 import ID3
+    from mutagen.mp4 import MP4Tags
+
+    return (
+        (ID3, _read_id3_tags, _set_id3_tag, _delete_id3_tag),
+        (MP4Tags, _read_mp4_tags, _set_mp4_tag, _delete_mp4_tag),
+        (VComment, _read_vorbis_tags, _set_vorbis_tag, _delete_vorbis_tag),
+    )
+
 
 def read_supported_tags(audio) -> dict[str, str]:
+    tags = getattr(audio, "tags", None)
+    if tags is not None:
+        for tags_class, read_values, _set_value, _delete_value in _native_tag_handlers():
+            if isinstance(tags, tags_class):
+                return read_values(tags)
     return {key: get_tag(audio, key) or "" for key in SCANNED_TAG_KEYS}
 
 
@@ -34,11 +91,120 @@ def delete_tag(audio, key: str) -> None:
 
 
 def apply_pending_tags(audio, item: TrackItem) -> None:
-    for key, value in item.pending_tags.items():
-        if value.strip():
-            set_tag(audio, key, value.strip())
+    if not item.pending_tags:
+        return
+    if getattr(audio, "tags", False) is None:
+        audio.add_tags()
+
+    tags = getattr(audio, "tags", None)
+    for tags_class, _read_values, set_value, delete_value in _native_tag_handlers():
+        if isinstance(tags, tags_class):
+            break
+    else:
+        set_value, delete_value = _set_easy_tag, delete_tag
+        tags = audio
+
+    # Every value is converted before the first write, so a bad one leaves the tags untouched.
+    changes = [(key, _pending_values(key, value)) for key, value in item.pending_tags.items()]
+    if set_value is _set_mp4_tag:
+        changes = [
+            (key, [_parse_mp4_track(text) for text in values] if key == "tracknumber" else values)
+            for key, values in changes
+        ]
+    for key, values in changes:
+        if values:
+            set_value(tags, key, values)
+        else:
+            delete_value(tags, key)
+
+
+def split_values(value: str) -> list:
+    """The values a joined tag value stands for; empty when the tag is erased."""
+    return [text for text in (part.strip() for part in value.split(MULTI_VALUE_SEPARATOR)) if text]
+
+
+def _pending_values(key: str, value: str) -> list:
+    if key in MULTI_VALUE_TAG_KEYS:
+        return split_values(value)
+    return [value] if value.strip() else []
+
+
+def _set_easy_tag(audio, key: str, values: list) -> None:
+    audio[key] = values
+
+
+def _join_values(values) -> str:
+    texts = [text for text in (str(value).strip() for value in values) if text]
+    return MULTI_VALUE_SEPARATOR.join(texts)
+
+
+def _read_id3_tags(tags) -> dict[str, str]:
+    values = {}
+    for key, frame_id in ID3_FRAME_ITEMS:
+        frame = tags.get(frame_id)
+        if frame is None:
+            values[key] = ""
         else:
-            delete_tag(audio, key)
+            values[key] = _join_values(frame.genres if frame_id == "TCON" else frame.text)
+    return values
+
+
+def _read_mp4_tags(tags) -> dict[str, str]:
+    values = {}
+    for key, atom in MP4_ATOM_ITEMS:
+        atom_values = tags.get(atom)
+        if not atom_values:
+            values[key] = ""
+        elif atom == "trkn":
+            values[key] = _join_values(_format_mp4_track(track) for track in atom_values)
+        else:
+            values[key] = _join_values(atom_values)
+    return values
+
+
+def _read_vorbis_tags(tags) -> dict[str, str]:
+    return {key: _join_values(tags.get(key, ())) for key in SCANNED_TAG_KEYS}
+
+
+def _format_mp4_track(track: tuple[int, int]) -> str:
+    number, total = track
+    return f"{number}/{total}" if total else str(number)
+
+
+def _parse_mp4_track(value: str) -> tuple[int, int]:
+    number, _, total = value.partition("/")
+    try:
+        return int(number), int(total) if total.strip() else 0
+    except ValueError:
+        raise TagValueError(f'Track # "{value}" must be a number such as 3 or 3/12 in this file type.') from None
+
+
+def _set_id3_tag(tags, key: str, values: list) -> None:
+    from mutagen.id3 import Frames
+
+    frame_id = ID3_FRAME_IDS[key]
+    tags.setall(frame_id, [Frames[frame_id](encoding=3, text=values)])
+
+
+def _delete_id3_tag(tags, key: str) -> None:
+    tags.delall(ID3_FRAME_IDS[key])
+
+
+def _set_mp4_tag(tags, key: str, values: list) -> None:
+    tags[MP4_ATOMS[key]] = values
+
+
+def _delete_mp4_tag(tags, key: str) -> None:
+    tags.pop(MP4_ATOMS[key], None)
+
+
+def _set_vorbis_tag(tags, key: str, values: list) -> None:
+    tags[key] = values
+
+
+def _delete_vorbis_tag(tags, key: str) -> None:
+    if key in tags:
+        del tags[key]
 
 
 def extract_tag_value_from_filename(
@@ -69,3 +235,225 @@ def extract_tag_value_from_filename(
 
 def title_from_filename(filename: str) -> str:
     return Path(filename).stem.strip()
+
+
+# Filename patterns such as "{tracknumber} - {artist} - {title}". Each {field}
+# captures the text between its neighbours, {*} skips text, {{ and }} are
+# literal braces and a run of spaces matches any run of spaces.
+PATTERN_FIELD_KEYS = (
+    {key: key for key in SCANNED_TAG_KEYS}
+    | {label.casefold(): key for label, key in TAG_KEY_BY_LABEL.items()}
+    | {"track": "tracknumber", "track #": "tracknumber", "year": "date"}
+)
+_PATTERN_TOKEN = re.compile(r"\{\{|\}\}|\{([^{}]*)\}|[{}]")
+_SPACES = re.compile(r"\s+")
+
+
+class FilenamePatternError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class FilenamePattern:
+    source: str
+    regex: re.Pattern
+    fields: tuple[str, ...]
+
+    def match(self, filename: str) -> dict[str, str] | None:
+        """Field values from the filename's stem, or None if it does not fit the pattern."""
+        found = self.regex.fullmatch(Path(filename).stem)
+        if found is None:
+            return None
+        values = {key: value.strip() for key, value in found.groupdict().items()}
+        if not all(values.values()):
+            return None
+        if "tracknumber" in values:
+            values["tracknumber"] = f"{int(values['tracknumber']):02d}"
+        return values
+
+
+@lru_cache(maxsize=128)
+def compile_filename_pattern(pattern: str) -> FilenamePattern:
+    parts = []
+    fields = []
+    after_field = False
+    position = 0
+    for token in _PATTERN_TOKEN.finditer(pattern):
+        literal = pattern[position:token.start()]
+        position = token.end()
+        if literal:
+            parts.append(_literal_regex(literal))
+            after_field = False
+        text = token.group(0)
+        if text in ("{{", "}}"):
+            parts.append(re.escape(text[0]))
+            after_field = False
+            continue
+        name = token.group(1)
+        if name is None:
+            raise FilenamePatternError(f"Unmatched {text!r}; write {text * 2} for a literal brace.")
+        if after_field:
+            raise FilenamePatternError("Put some text, such as ' - ', between two fields.")
+        name = name.strip()
+        if name == "*":
+            parts.append(".+?")
+        else:
+            key = PATTERN_FIELD_KEYS.get(name.casefold())
+            if key is None:
+                raise FilenamePatternError(
+                    f"Unknown field {{{name}}}; use {', '.join('{' + key + '}' for key in SCANNED_TAG_KEYS)} or {{*}}."
+                )
+            if key in fields:
+                raise FilenamePatternError(f"{{{name}}} appears more than once.")
+            fields.append(key)
+            parts.append(rf"(?P<{key}>\d+)" if key == "tracknumber" else rf"(?P<{key}>.+?)")
+        after_field = True
+    if position < len(pattern):
+        parts.append(_literal_regex(pattern[position:]))
+    if not fields:
+        raise FilenamePatternError("Add at least one field, such as {title}.")
+    return FilenamePattern(pattern, re.compile("".join(parts), re.IGNORECASE), tuple(fields))
+
+
+def _literal_regex(text: str) -> str:
+    return r"\s+".join(re.escape(part) for part in _SPACES.split(text))
+
+
+# Tag normalization steps in the order they run, with their labels.
+NORMALIZE_STEPS = {
+    "unicode": "Unicode (NFC)",
+    "spaces": "Collapse spaces",
+    "feat": "Standardize feat.",
+    "title_case": "Title case",
+    "genre": "Canonical genres",
+}
+NORMALIZE_STEP_KEYS = {
+    "unicode": tuple(field.key for field in TAG_FIELDS),
+    "spaces": tuple(field.key for field in TAG_FIELDS),
+    "feat": ("title", "albumartist", "artist"),
+    "title_case": ("title", "albumartist", "artist", "album"),
+    "genre": ("genre",),
+}
+# Lowercase inside a title unless first or last, as in "Back in Black".
+TITLE_CASE_SMALL_WORDS = frozenset(
+    {"a", "an", "and", "as", "at", "but", "by", "feat.", "for", "in", "nor", "of", "on", "or", "the", "to", "vs", "vs."}
+)
+CANONICAL_GENRES = (
+    "Alternative", "Ambient", "Blues", "Classical", "Country", "Dance", "Drum & Bass", "Dubstep",
+    "Electronic", "Folk", "Funk", "Hip-Hop", "House", "Indie", "Jazz", "K-Pop", "Lo-Fi", "Metal",
+    "Pop", "Punk", "R&B", "Rap", "Reggae", "Rock", "Soul", "Soundtrack", "Techno", "Trap",
+)
+# Spellings the folded comparison cannot match, folded.
+GENRE_ALIASES = {"rnb": "R&B", "rhythmandblues": "R&B", "dnb": "Drum & Bass", "drumandbass": "Drum & Bass"}
+NORMALIZE_CACHE_SIZE = 65536
+
+# A credit marker follows an artist or opens a bracket, and comes before a name,
+# so the word in "Feat of Strength" is left alone.
+_FEAT = re.compile(r"(?:(?<=\S\s)|(?<=[(\[]))(?:featuring|feat|ft)\b\.?\s*(?=[^\s)\]])", re.IGNORECASE)
+_WORD = re.compile(r"\S+")
+_FIRST_LETTER = re.compile(r"^(\W*)([^\W\d_])")
+_GENRE_FOLD = re.compile(r"[\W_]+")
+
+
+def normalize_unicode(value: str) -> str:
+    return unicodedata.normalize("NFC", value)
+
+
+def standardize_feat(value: str) -> str:
+    """Write "ft", "Feat", "featuring" and the like as "feat." where they credit a guest."""
+    return _FEAT.sub("feat. ", value).rstrip()
+
+
+def title_case(value: str) -> str:
+    """Capitalize each word, keeping small words lowercase and mixed-case words such as "AC/DC" as they are."""
+    words = list(_WORD.finditer(value))
+    last = len(words) - 1
+
+    def word_case(index: int, word: str, previous: str) -> str:
+        if any(character.isupper() for character in word[1:]):
+            return word
+        core = word.strip("\"'()[]").lower()
+        if core == "feat.":
+            return word.lower()
+        starts_phrase = index in (0, last) or word[0] in "([" or previous.endswith((":", "-", "("))
+        if core in TITLE_CASE_SMALL_WORDS and not starts_phrase:
+            return word.lower()
+        # Each part of a hyphenated word, as in "Jay-Z".
+        return "-".join(
+            _FIRST_LETTER.sub(lambda found: found.group(1) + found.group(2).upper(), part, count=1)
+            for part in word.split("-")
+        )
+
+    parts = []
+    position = 0
+    previous = ""
+    for index, found in enumerate(words):
+        parts.append(value[position:found.start()])
+        parts.append(word_case(index, found.group(0), previous))
+        previous = found.group(0)
+        position = found.end()
+    parts.append(value[position:])
+    return "".join(parts)
+
+
+def _run_chain(chain: tuple[Callable[[str], str], ...], value: str) -> str:
+    for transform in chain:
+        value = transform(value)
+    return value
+
+
+def _fold_genre(genre: str) -> str:
+    return _GENRE_FOLD.sub("", genre.casefold())
+
+
+class TagNormalizer:
+    """Runs the chosen NORMALIZE_STEPS over tag values.
+
+    Each tag key gets the chain of steps that apply to it, and each chain
+    remembers its result for every distinct value, so an album's repeated
+    artist and album names are only worked out once.
+    """
+
+    def __init__(self, steps: Iterable[str] = tuple(NORMALIZE_STEPS), genres: Iterable[str] = ()):
+        chosen = set(steps)
+        unknown = chosen - NORMALIZE_STEPS.keys()
+        if unknown:
+            raise ValueError(f"Unknown normalization step(s): {', '.join(sorted(unknown))}")
+        self.steps = tuple(step for step in NORMALIZE_STEPS if step in chosen)
+        # Whitelisted spellings win over the built-in ones.
+        self._genres = {_fold_genre(genre): genre for genre in CANONICAL_GENRES}
+        self._genres.update(GENRE_ALIASES)
+        self._genres.update((_fold_genre(genre), genre) for genre in genres if _fold_genre(genre))
+        transforms: dict[str, Callable[[str], str]] = {
+            "unicode": normalize_unicode,
+            "spaces": clean_spaces,
+            "feat": standardize_feat,
+            "title_case": title_case,
+            "genre": self.canonical_genre,
+        }
+        chains: dict[str, tuple[Callable[[str], str], ...]] = {}
+        for step in self.steps:
+            for key in NORMALIZE_STEP_KEYS[step]:
+                chains[key] = chains.get(key, ()) + (transforms[step],)
+        self._chains = chains
+        # Keys with the same chain, e.g. artist and albumartist, share results.
+        self._normalizers: dict[tuple, Callable[[str], str]] = {
+            chain: lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(partial(_run_chain, chain)) for chain in chains.values()
+        }
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        """The tag keys at least one step changes, in TAG_FIELDS order."""
+        return tuple(field.key for field in TAG_FIELDS if field.key in self._chains)
+
+    def normalize(self, key: str, value: str) -> str:
+        chain = self._chains.get(key)
+        if chain is None or not value:
+            return value
+        return self._normalizers[chain](value)
+
+    def canonical_genre(self, value: str) -> str:
+        """Known genres in their canonical spelling, e.g. "hip hop" as "Hip-Hop"; others unchanged."""
+        return MULTI_VALUE_SEPARATOR.join(
+            self._genres.get(_fold_genre(genre), genre.strip()) for genre in value.split(MULTI_VALUE_SEPARATOR.strip())
+        )
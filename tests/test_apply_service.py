@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import TrackItem
+from services.apply_service import apply_changes, apply_changes_by_folder
+
+
+class ApplyServiceTests(unittest.TestCase):
+    def test_items_without_pending_changes_are_not_opened(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = Path(temp_dir)
+            path = folder / "old.mp3"
+            path.write_bytes(b"not audio")
+            item = TrackItem(path=path, filename="old.mp3", ext=".mp3", proposed_filename="new.mp3")
+
+            result = apply_changes(folder, [item])
+
+            self.assertEqual(result.renamed_files, 1)
+            self.assertEqual(result.tagged_files, 0)
+            self.assertEqual(result.skipped_files, [])
+            self.assertEqual((folder / "new.mp3").read_bytes(), b"not audio")
+
+    def test_unreadable_file_with_pending_tags_is_skipped(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = Path(temp_dir)
+            path = folder / "song.flac"
+            path.write_bytes(b"not audio")
+            item = TrackItem(path=path, filename="song.flac", ext=".flac", proposed_filename="song.flac")
+            item.set_pending_tag("title", "Song")
+
+            result = apply_changes(folder, [item])
+
+            self.assertEqual(result.skipped_files, ["song.flac"])
+
+    def test_progress_counts_across_folders(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            items = []
+            for folder_name, names in (("A", ["1.flac", "2.flac"]), ("B", ["3.flac"])):
+                folder = Path(temp_dir) / folder_name
+                folder.mkdir()
+                for name in names:
+                    (folder / name).write_bytes(b"not audio")
+                    item = TrackItem(path=folder / name, filename=name, ext=".flac", proposed_filename=name)
+                    item.set_pending_tag("title", "Song")
+                    items.append(item)
+            progress = []
+
+            result = apply_changes_by_folder(items, lambda done, total: progress.append((done, total)))
+
+            self.assertEqual(progress, [(0, 3), (1, 3), (2, 3)])
+            self.assertEqual(result.skipped_files, ["1.flac", "2.flac", "3.flac"])
+
+
+if __name__ == "__main__":
+    unittest.main()
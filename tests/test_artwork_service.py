@@ -1,9 +1,11 @@
 import tempfile
 import unittest
+from io import BytesIO
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from mutagen.id3 import ID3
+from PIL import Image
 
 from models import ArtworkData, TrackItem
 from services.artwork_service import (
@@ -12,7 +14,9 @@ from services.artwork_service import (
     extract_embedded_artwork,
     has_embedded_artwork,
     load_artwork_file,
+    normalize_artwork,
 )
+from services.artwork_store import ArtworkStore
 
 
 class ArtworkServiceTests(unittest.TestCase):
@@ -58,7 +62,7 @@ class ArtworkServiceTests(unittest.TestCase):
             self.assertTrue(apply_artwork_change(item))
             self.assertFalse(has_embedded_artwork(path))
 
-    @patch("services.artwork_service.FLAC")
+    @patch("mutagen.flac.FLAC")
     def test_flac_artwork_uses_picture_api(self, flac_class):
         audio = MagicMock()
         flac_class.return_value = audio
@@ -71,7 +75,7 @@ class ArtworkServiceTests(unittest.TestCase):
         audio.add_picture.assert_called_once()
         audio.save.assert_called_once()
 
-    @patch("services.artwork_service.MP4")
+    @patch("mutagen.mp4.MP4")
     def test_m4a_artwork_uses_cover_tag(self, mp4_class):
         audio = MagicMock()
         audio.tags = {}
@@ -91,5 +95,56 @@ class ArtworkServiceTests(unittest.TestCase):
             apply_artwork_change(item)
 
 
+def make_png(width: int, height: int, mode: str = "RGB") -> bytes:
+    output = BytesIO()
+    Image.effect_noise((width, height), 64).convert(mode).save(output, format="PNG")
+    return output.getvalue()
+
+
+class NormalizeArtworkTests(unittest.TestCase):
+    def test_large_png_is_downscaled_to_jpeg(self):
+        store = ArtworkStore()
+        source = store.add(make_png(1600, 800), "image/png", "cover.png")
+
+        normalized = normalize_artwork(source, store, max_edge=400, jpeg_quality=80)
+
+        self.assertEqual(normalized.mime, "image/jpeg")
+        self.assertLess(len(normalized.data), len(source.data))
+        with Image.open(BytesIO(normalized.data)) as image:
+            self.assertEqual(image.size, (400, 200))
+
+    def test_result_is_cached_by_source_hash(self):
+        store = ArtworkStore()
+        source = store.add(make_png(800, 800, "RGBA"), "image/png", "cover.png")
+
+        first = normalize_artwork(source, store, max_edge=200)
+        again = store.add(bytes(source.data), "image/png", "cover.png")
+        with patch("services.artwork_service.BytesIO") as bytes_io:
+            second = normalize_artwork(again, store, max_edge=200)
+
+        self.assertIs(first, second)
+        bytes_io.assert_not_called()
+
+    def test_small_image_that_would_grow_is_kept(self):
+        store = ArtworkStore()
+        output = BytesIO()
+        Image.effect_noise((64, 64), 64).convert("RGB").save(output, format="JPEG", quality=20)
+        source = store.add(output.getvalue(), "image/jpeg", "tiny.jpg")
+
+        self.assertIs(normalize_artwork(source, store, max_edge=400, jpeg_quality=95), source)
+
+    def test_invalid_image_reports_artwork_error(self):
+        store = ArtworkStore()
+        source = store.add(b"not an image", "image/png", "broken.png")
+        with self.assertRaises(ArtworkError):
+            normalize_artwork(source, store, max_edge=400)
+
+    def test_oversized_image_reports_artwork_error(self):
+        store = ArtworkStore()
+        source = store.add(make_png(100, 100), "image/png", "huge.png")
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 100), self.assertRaises(ArtworkError):
+            normalize_artwork(source, store, max_edge=400)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+import gc
+import tempfile
+import unittest
+from pathlib import Path
+
+from services.artwork_service import load_artwork_file
+from services.artwork_store import ArtworkStore, artwork_digest, format_byte_size
+
+
+class ArtworkStoreTests(unittest.TestCase):
+    def test_identical_images_share_one_buffer(self):
+        store = ArtworkStore()
+        first = store.add(bytes(b"cover" * 10), "image/jpeg", "cover.jpg")
+        second = store.add(bytes(b"cover" * 10), "image/jpeg", "cover.jpg")
+
+        self.assertIs(first, second)
+        self.assertEqual(first.digest, artwork_digest(b"cover" * 10))
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.memory_usage(), 50)
+
+    def test_different_source_name_reuses_existing_bytes(self):
+        store = ArtworkStore()
+        first = store.add(bytes(b"cover" * 10), "image/jpeg", "one.jpg")
+        second = store.add(bytes(b"cover" * 10), "image/jpeg", "two.jpg")
+
+        self.assertEqual(second.source_name, "two.jpg")
+        self.assertIs(first.data, second.data)
+
+    def test_unreferenced_artwork_is_released(self):
+        store = ArtworkStore()
+        artwork = store.add(b"cover", "image/png")
+        digest = artwork.digest
+        del artwork
+        gc.collect()
+
+        self.assertIsNone(store.get(digest))
+        self.assertEqual(store.memory_usage(), 0)
+
+    def test_loading_the_same_file_twice_is_deduplicated(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cover.png"
+            path.write_bytes(b"image")
+            store = ArtworkStore()
+
+            self.assertIs(load_artwork_file(path, store), load_artwork_file(path, store))
+
+    def test_derived_entries_are_bounded_least_recently_used_first(self):
+        store = ArtworkStore(max_derived=2)
+        images = [store.add(bytes([number]), "image/jpeg") for number in range(3)]
+
+        store.remember_derived(("a",), images[0])
+        store.remember_derived(("b",), images[1])
+        store.get_derived(("a",))
+        store.remember_derived(("c",), images[2])
+
+        self.assertIs(store.get_derived(("a",)), images[0])
+        self.assertIsNone(store.get_derived(("b",)))
+        self.assertIs(store.get_derived(("c",)), images[2])
+
+    def test_formats_byte_sizes(self):
+        self.assertEqual(format_byte_size(512), "512 B")
+        self.assertEqual(format_byte_size(2048), "2 KB")
+        self.assertEqual(format_byte_size(3 * 1024 * 1024), "3.0 MB")
+
+
+if __name__ == "__main__":
+    unittest.main()
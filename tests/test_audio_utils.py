@@ -1,6 +1,15 @@
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
+from unittest.mock import patch
 
-from audio_utils import first_contributing_artist
+from mutagen.flac import FLAC
+
+from audio_utils import first_contributing_artist, load_audio
+
+
+FIXTURE_FLAC = Path(__file__).parent.parent / "TestAlbum" / "helloExtra '9' SpotiDownloader.com - Father - Kanye West.flac"
 
 
 class FirstContributingArtistTests(unittest.TestCase):
@@ -16,5 +25,35 @@ class FirstContributingArtistTests(unittest.TestCase):
         self.assertEqual(first_contributing_artist(audio), "Contributing Artist")
 
 
+class LoadAudioTests(unittest.TestCase):
+    def test_known_extension_opens_format_class_without_sniffing(self):
+        with patch("mutagen.File") as sniff:
+            audio, error = load_audio(str(FIXTURE_FLAC))
+
+        self.assertIsInstance(audio, FLAC)
+        self.assertIsNone(error)
+        sniff.assert_not_called()
+
+    def test_misnamed_file_falls_back_to_sniffing(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "song.ogg"
+            shutil.copyfile(FIXTURE_FLAC, path)
+
+            audio, error = load_audio(str(path))
+
+        self.assertIsInstance(audio, FLAC)
+        self.assertIsNone(error)
+
+    def test_unreadable_file_reports_error(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "song.flac"
+            path.write_bytes(b"not audio")
+
+            audio, error = load_audio(str(path))
+
+        self.assertIsNone(audio)
+        self.assertTrue(error)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,150 @@
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cli
+from services.scanner import read_track, ScanOptions
+from services.watch_service import FolderWatcher
+
+
+FIXTURES = Path(__file__).parent.parent / "TestAlbum"
+STRONGER = "[03] SpotiDownloader.com - Stronger - Kanye West.mp3"
+FATHER = "helloExtra '9' SpotiDownloader.com - Father - Kanye West.flac"
+
+
+class BatchCliTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = Path(temp_dir.name)
+        self.folder = self.root / "drop"
+        self.folder.mkdir()
+        for name in (STRONGER, FATHER):
+            shutil.copyfile(FIXTURES / name, self.folder / name)
+        self.settings = self.root / "settings.json"
+        self.settings.write_text(
+            json.dumps(
+                {
+                    "version": 2,
+                    "active_preset": "Default",
+                    "rule_presets": {
+                        "Default": {},
+                        "Drop": {"remove_rules": ["SpotiDownloader.com - "], "track_markers": "[]"},
+                    },
+                }
+            ),
+            encoding="utf-8",
+        )
+
+    def run_cli(self, *args: str) -> tuple[int, list[dict]]:
+        out = io.StringIO()
+        code = cli.main(
+            [str(self.folder), "--settings", str(self.settings), "--jsonl", "--workers", "1", *args],
+            out=out,
+        )
+        return code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_dry_run_reports_plan_without_changing_files(self):
+        code, records = self.run_cli("--preset", "Drop", "--track-numbers", "--dry-run")
+
+        self.assertEqual(code, cli.EXIT_OK)
+        plans = {Path(record["path"]).name: record for record in records}
+        self.assertEqual(plans[STRONGER]["rename_to"], "[03] Stronger - Kanye West.mp3")
+        self.assertEqual(plans[STRONGER]["tags"], {"tracknumber": "03"})
+        self.assertEqual(plans[FATHER]["tags"], {})
+        self.assertTrue(all(record["event"] == "plan" for record in records))
+        self.assertEqual(sorted(path.name for path in self.folder.iterdir()), sorted([STRONGER, FATHER]))
+
+    def test_apply_renames_and_writes_tags(self):
+        code, records = self.run_cli("--preset", "Drop", "--track-numbers")
+
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertEqual(records[-1]["event"], "applied")
+        self.assertEqual(records[-1]["renamed"], 2)
+        self.assertEqual(records[-1]["tagged"], 1)
+        renamed = self.folder / "[03] Stronger - Kanye West.mp3"
+        self.assertEqual(read_track(renamed, ScanOptions()).tags["tracknumber"], "03")
+
+    def test_worker_processes_give_the_same_plan(self):
+        _code, inline = self.run_cli("--preset", "Drop", "--dry-run")
+        out = io.StringIO()
+        code = cli.main(
+            [str(self.folder), "--settings", str(self.settings), "--preset", "Drop", "--jsonl", "--dry-run",
+             "--workers", "2"],
+            out=out,
+        )
+
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertEqual([json.loads(line) for line in out.getvalue().splitlines()], inline)
+
+    def test_unreadable_file_with_changes_fails_the_run(self):
+        (self.folder / "[07] broken.mp3").write_bytes(b"not audio")
+
+        code, records = self.run_cli("--preset", "Drop", "--track-numbers")
+
+        self.assertEqual(code, cli.EXIT_FAILED)
+        self.assertEqual(records[-1]["skipped"], ["[07] broken.mp3"])
+
+    def test_watch_cleans_up_files_added_later(self):
+        (self.folder / FATHER).unlink()
+        waits = []
+
+        def wait(_watcher):
+            waits.append(None)
+            if len(waits) == 1:
+                shutil.copyfile(FIXTURES / FATHER, self.folder / FATHER)
+            else:
+                raise KeyboardInterrupt
+
+        with patch.object(FolderWatcher, "wait", wait):
+            code, records = self.run_cli("--preset", "Drop", "--watch", "--settle", "0")
+
+        self.assertEqual(code, cli.EXIT_OK)
+        self.assertEqual([record["event"] for record in records], ["plan", "applied"])
+        self.assertEqual(Path(records[0]["path"]).name, FATHER)
+        self.assertEqual(
+            sorted(path.name for path in self.folder.iterdir()),
+            sorted([STRONGER, "helloExtra '9' Father - Kanye West.flac"]),
+        )
+
+    def test_watch_does_not_mark_files_of_a_folder_that_failed(self):
+        (self.folder / FATHER).unlink()
+        waits = []
+        marked = []
+
+        def wait(_watcher):
+            waits.append(None)
+            if len(waits) == 1:
+                shutil.copyfile(FIXTURES / FATHER, self.folder / FATHER)
+            else:
+                raise KeyboardInterrupt
+
+        with (
+            patch.object(FolderWatcher, "wait", wait),
+            patch.object(FolderWatcher, "mark_done", lambda _watcher, paths: marked.extend(paths)),
+            patch("cli.rename_files", side_effect=cli.ApplyError("A file could not be renamed.")),
+        ):
+            code, records = self.run_cli("--preset", "Drop", "--watch", "--settle", "0")
+
+        self.assertEqual(code, cli.EXIT_FAILED)
+        self.assertEqual(records[-1]["error"], "A file could not be renamed.")
+        self.assertEqual(marked, [])
+
+    def test_unknown_preset_is_a_usage_error(self):
+        code, records = self.run_cli("--preset", "Missing")
+
+        self.assertEqual(code, cli.EXIT_USAGE)
+        self.assertEqual(records, [])
+
+    def test_extract_tag_requires_boundaries(self):
+        code, _records = self.run_cli("--preset", "Drop", "--extract-tag", "album")
+
+        self.assertEqual(code, cli.EXIT_USAGE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from services.duplicate_service import (
+    QUICK_HASH_BYTES,
+    DuplicateGroup,
+    audio_hash,
+    audio_regions,
+    delete_duplicates,
+    find_duplicates,
+)
+
+
+FIXTURES = Path(__file__).parent.parent / "TestAlbum"
+STRONGER = "[03] SpotiDownloader.com - Stronger - Kanye West.mp3"
+FATHER = "helloExtra '9' SpotiDownloader.com - Father - Kanye West.flac"
+KING = "helloExtra '9' SpotiDownloader.com - King - Kanye West - Copy.flac"
+
+
+def id3_tag(title: str) -> bytes:
+    frame = b"\x03" + title.encode("latin-1")
+    body = b"TIT2" + len(frame).to_bytes(4, "big") + b"\x00\x00" + frame
+    size = len(body)
+    return b"ID3\x03\x00\x00" + bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0)) + body
+
+
+class DuplicateServiceTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.folder = Path(temp_dir.name)
+
+    def write(self, name: str, data: bytes) -> Path:
+        path = self.folder / name
+        path.write_bytes(data)
+        return path
+
+    def test_retagged_copies_match_and_other_audio_does_not(self):
+        audio = bytes(range(256)) * (QUICK_HASH_BYTES // 128)
+        original = self.write("song.mp3", id3_tag("Song") + audio + b"TAG" + b"\0" * 125)
+        retagged = self.write("song - Copy.mp3", id3_tag("A much longer title") + audio)
+        # Same length and same start, so only the full hash tells it apart.
+        edited = self.write("edit.mp3", id3_tag("Song") + audio[:-1] + b"\x00")
+        self.write("short.mp3", id3_tag("Song") + audio[:1000])
+
+        groups = find_duplicates(sorted(self.folder.iterdir()), workers=2)
+
+        self.assertEqual(groups, [DuplicateGroup((retagged, original), len(audio))])
+        self.assertEqual(groups[0].suggested_keep(), original)
+        self.assertNotEqual(audio_hash(edited), audio_hash(original))
+
+    def test_fixture_copies_match_despite_different_metadata(self):
+        groups = find_duplicates(sorted(FIXTURES.iterdir()))
+
+        names = [[path.name for path in group.paths] for group in groups]
+        self.assertEqual(len(names), 2)
+        self.assertIn(STRONGER, names[0])
+        self.assertEqual(names[1], [FATHER, KING])
+        # The FLAC copies differ only in their metadata blocks.
+        self.assertNotEqual((FIXTURES / FATHER).stat().st_size, (FIXTURES / KING).stat().st_size)
+        self.assertEqual(groups[1].suggested_keep().name, FATHER)
+
+    def test_mp4_regions_are_the_media_data(self):
+        audio = b"sound" * 20
+        atoms = (
+            (24).to_bytes(4, "big") + b"ftypM4A " + b"\0" * 12
+            + (16).to_bytes(4, "big") + b"moov" + b"\0" * 8
+            + (8 + len(audio)).to_bytes(4, "big") + b"mdat" + audio
+        )
+        path = self.write("song.m4a", atoms)
+
+        self.assertEqual(audio_regions(path), [(48, 48 + len(audio))])
+
+    def test_delete_keeps_at_least_one_copy(self):
+        first, second, third, fourth = (self.write(f"{name}.mp3", b"x") for name in "abcd")
+        groups = [DuplicateGroup((first, second), 1), DuplicateGroup((third, fourth), 1)]
+
+        deleted, errors = delete_duplicates(groups, {second, third, fourth})
+
+        self.assertEqual(deleted, [second])
+        self.assertEqual(len(errors), 1)
+        self.assertEqual([path.name for path in sorted(self.folder.iterdir())], ["a.mp3", "c.mp3", "d.mp3"])
+
+    def test_delete_skips_files_changed_since_the_search(self):
+        kept = self.write("song.mp3", id3_tag("Song") + b"audio")
+        replaced = self.write("song - Copy.mp3", id3_tag("Song") + b"audio")
+        groups = find_duplicates([kept, replaced])
+        replaced.write_bytes(id3_tag("Other") + b"other")
+
+        deleted, errors = delete_duplicates(groups, {replaced})
+
+        self.assertEqual(deleted, [])
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(replaced.exists())
+
+    def test_unreadable_files_are_left_out(self):
+        copy = self.folder / STRONGER
+        shutil.copy(FIXTURES / STRONGER, copy)
+
+        groups = find_duplicates([copy, FIXTURES / STRONGER, self.folder / "gone.mp3"])
+
+        self.assertEqual(len(groups), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import csv
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import TrackItem
+from services.export_service import (
+    CSV_COLUMNS,
+    TagFileError,
+    TagRow,
+    TrackMatcher,
+    export_tracks,
+    file_fingerprint,
+    read_tag_rows,
+)
+
+
+def make_item(path: Path, **tags: str) -> TrackItem:
+    return TrackItem(path=path, filename=path.name, ext=path.suffix, proposed_filename=path.name, tags=tags)
+
+
+class ExportServiceTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.folder = Path(temp_dir.name)
+        self.song = self.folder / "song.mp3"
+        self.song.write_bytes(b"audio" * 100)
+        self.item = make_item(self.song, title="Song", artist="Artist")
+        self.item.set_pending_tag("album", "Album")
+        self.item.validation_warnings.append("Filename too long")
+
+    def test_csv_export_has_effective_tags_and_reads_back(self):
+        path = self.folder / "tags.csv"
+
+        self.assertEqual(export_tracks([self.item], path, fingerprints=True), 1)
+
+        with path.open(encoding="utf-8-sig", newline="") as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(list(rows[0]), list(CSV_COLUMNS))
+        self.assertEqual((rows[0]["album"], rows[0]["artwork"]), ("Album", "None"))
+        self.assertEqual(rows[0]["warnings"], "Filename too long")
+        row = next(read_tag_rows(path))
+        self.assertEqual((row.path, row.fingerprint), (str(self.song), file_fingerprint(self.song)))
+        self.assertEqual(row.tags["title"], "Song")
+        self.assertEqual(row.tags["genre"], "")
+
+    def test_jsonl_export_reads_back(self):
+        path = self.folder / "tags.jsonl"
+
+        export_tracks([self.item], path, warnings=lambda _item: ["Missing genre"])
+
+        record = json.loads(path.read_text(encoding="utf-8"))
+        self.assertNotIn("fingerprint", record)
+        self.assertEqual(record["warnings"], ["Missing genre"])
+        self.assertEqual(next(read_tag_rows(path)).tags["album"], "Album")
+
+    def test_edited_csv_may_use_labels_and_drop_columns(self):
+        path = self.folder / "edited.csv"
+        path.write_text(f"Path,Album Artist,notes\n{self.song},Someone,keep\n\nonly-a-path\n", encoding="utf-8")
+
+        rows = list(read_tag_rows(path))
+
+        self.assertEqual([row.tags for row in rows], [{"albumartist": "Someone"}, {}])
+        self.assertEqual(rows[1].line, 4)
+
+    def test_unusable_files_are_refused(self):
+        (self.folder / "no-path.csv").write_text("title\nSong\n", encoding="utf-8")
+        for name in ("no-path.csv", "tags.txt", "missing.jsonl"):
+            with self.subTest(name=name), self.assertRaises(TagFileError):
+                read_tag_rows(self.folder / name)
+
+    def test_matcher_falls_back_to_the_fingerprint(self):
+        other = self.folder / "other.mp3"
+        other.write_bytes(b"x" * 500)
+        fingerprint = file_fingerprint(self.song)
+        moved = self.folder / "moved.mp3"
+        self.song.rename(moved)
+        items = [make_item(other), make_item(moved)]
+        matcher = TrackMatcher(items)
+
+        self.assertIs(matcher.find(TagRow(2, str(self.song), fingerprint, {})), items[1])
+        self.assertIs(matcher.find(TagRow(3, str(other), "", {})), items[0])
+        self.assertNotEqual(file_fingerprint(other), fingerprint)
+
+
+if __name__ == "__main__":
+    unittest.main()
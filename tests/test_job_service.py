@@ -0,0 +1,108 @@
+import threading
+import unittest
+
+from services.job_service import CANCELLED, DONE, FAILED, RUNNING, JobQueue
+
+
+def wait_until_finished(queue: JobQueue, job, timeout: float = 5.0) -> None:
+    version = -1
+    while not job.finished:
+        new_version, _status = queue.wait(job, version, timeout)
+        if new_version == version and not job.finished:
+            raise AssertionError("job did not finish")
+        version = new_version
+
+
+class JobQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.queue = JobQueue(max_workers=2)
+        self.addCleanup(self.queue.shutdown)
+
+    def test_result_and_progress_are_recorded(self):
+        def work(context):
+            context.progress(1, 2, "Reading")
+            return {"ok": True}
+
+        job = self.queue.submit("scan", work)
+        wait_until_finished(self.queue, job)
+
+        self.assertEqual(job.state, DONE)
+        self.assertEqual(job.result, {"ok": True})
+        self.assertEqual(
+            job.status(),
+            {"id": job.id, "method": "scan", "state": DONE, "done": 1, "total": 2, "message": "Reading"},
+        )
+
+    def test_errors_fail_the_job(self):
+        job = self.queue.submit("apply", lambda _context: 1 / 0)
+        wait_until_finished(self.queue, job)
+
+        self.assertEqual(job.state, FAILED)
+        self.assertIn("ZeroDivisionError", job.error)
+
+    def test_concurrency_is_limited_and_queued_jobs_can_be_cancelled(self):
+        release = threading.Event()
+        blockers = [self.queue.submit("scan", lambda _context: release.wait(5)) for _ in range(2)]
+        queued = self.queue.submit("scan", lambda _context: "never")
+
+        self.assertEqual([job.state for job in blockers], [RUNNING, RUNNING])
+        self.assertEqual(self.queue.cancel(queued.id).state, CANCELLED)
+        release.set()
+        for job in blockers:
+            wait_until_finished(self.queue, job)
+        self.assertIsNone(queued.result)
+
+    def test_jobs_with_the_same_key_run_one_at_a_time_in_order(self):
+        release = threading.Event()
+        order = []
+
+        def work(name):
+            def run(_context):
+                order.append(name)
+                if name == "first":
+                    release.wait(5)
+                return name
+
+            return run
+
+        first = self.queue.submit("apply", work("first"), key="album")
+        second = self.queue.submit("apply", work("second"), key="album")
+        other = self.queue.submit("scan", work("other"), key="elsewhere")
+        wait_until_finished(self.queue, other)
+
+        self.assertEqual(second.state, "queued")
+        release.set()
+        wait_until_finished(self.queue, second)
+        self.assertEqual(first.state, DONE)
+        self.assertEqual(order, ["first", "other", "second"])
+
+    def test_running_job_stops_at_its_next_progress_after_cancel(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def work(context):
+            started.set()
+            release.wait(5)
+            context.progress(1, 2)
+            return "finished"
+
+        job = self.queue.submit("apply", work)
+        started.wait(5)
+        self.queue.cancel(job.id)
+        release.set()
+        wait_until_finished(self.queue, job)
+
+        self.assertEqual(job.state, CANCELLED)
+
+    def test_only_the_latest_finished_jobs_are_kept(self):
+        queue = JobQueue(max_workers=1, keep_finished=2)
+        self.addCleanup(queue.shutdown)
+        jobs = [queue.submit("scan", lambda _context: None) for _ in range(3)]
+        for job in jobs:
+            wait_until_finished(queue, job)
+
+        self.assertEqual([job.id for job in queue.jobs()], [job.id for job in jobs[1:]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from services import library_service
+from services.library_service import LibraryError, LibraryIndex, fts_query, scan_indexed_folder
+from services.scanner import ScanOptions, scan_folder
+
+
+FIXTURES = Path(__file__).parent.parent / "TestAlbum"
+STRONGER = "[03] SpotiDownloader.com - Stronger - Kanye West.mp3"
+KING = "helloExtra '9' SpotiDownloader.com - King - Kanye West - Copy.flac"
+
+
+class LibraryIndexTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        root = Path(temp_dir.name)
+        self.folder = root / "album"
+        shutil.copytree(FIXTURES, self.folder)
+        self.library_path = root / "library.sqlite3"
+        self.options = ScanOptions(remove_rules=["SpotiDownloader.com - "])
+        self.items = scan_indexed_folder(self.folder, self.options, library_path=self.library_path)
+
+    def library(self) -> LibraryIndex:
+        library = LibraryIndex(self.library_path)
+        self.addCleanup(library.__exit__, None, None, None)
+        return library
+
+    def test_unchanged_files_are_loaded_from_the_index(self):
+        with mock.patch.object(library_service, "read_track_details", wraps=library_service.read_track_details) as read:
+            items = scan_indexed_folder(self.folder, self.options, library_path=self.library_path)
+
+        read.assert_not_called()
+        self.assertEqual(items, scan_folder(self.folder, self.options))
+
+    def test_changed_and_removed_files_are_updated(self):
+        stronger = self.folder / STRONGER
+        os.utime(stronger, ns=(stronger.stat().st_atime_ns, stronger.stat().st_mtime_ns + 10**9))
+        (self.folder / KING).unlink()
+
+        with mock.patch.object(library_service, "read_track_details", wraps=library_service.read_track_details) as read:
+            items = scan_indexed_folder(self.folder, self.options, library_path=self.library_path)
+
+        self.assertEqual([call.args[0].name for call in read.call_args_list], [STRONGER])
+        self.assertEqual(len(items), len(self.items) - 1)
+        self.assertEqual(self.library().track_count(), len(items))
+
+    def test_search_combines_words_filters_and_missing_tags(self):
+        library = self.library()
+
+        self.assertEqual([track.path.name for track in library.search("stron kanye")], [STRONGER])
+        by_artist = library.search(filters={"artist": "KANYE WEST"}, missing=["date"])
+        self.assertEqual([track.path.name for track in by_artist], [KING])
+        self.assertEqual(by_artist[0].tags, {"albumartist": "Kanye West", "album": "Bully"})
+        self.assertEqual(len(library.search(limit=2)), 2)
+        with self.assertRaises(LibraryError):
+            library.search(missing=["mood"])
+
+    def test_filtered_searches_use_an_index(self):
+        # A fresh index, since a tiny analyzed table is cheaper to scan.
+        library = LibraryIndex(self.library_path.with_name("fresh.sqlite3"))
+        self.addCleanup(library.__exit__, None, None, None)
+        connection = library._connection
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM tracks WHERE (artist = ? OR albumartist = ?) AND +date = ''",
+            ("Kanye West", "Kanye West"),
+        ).fetchall()
+
+        self.assertTrue(all("USING INDEX" in row[3] for row in plan if row[3].startswith("SEARCH")))
+        self.assertIn("MULTI-INDEX OR", [row[3] for row in plan])
+
+    def test_load_items_reports_missing_paths(self):
+        gone = self.folder / "gone.mp3"
+
+        items, missing = self.library().load_items([self.folder / STRONGER, gone], self.options)
+
+        self.assertEqual([item.filename for item in items], [STRONGER])
+        self.assertEqual(items[0].proposed_filename, "[03] Stronger - Kanye West.mp3")
+        self.assertEqual(missing, [gone])
+
+    def test_fts_query_quotes_words(self):
+        self.assertEqual(fts_query('kan "west" OR'), '"kan"* "west"* "OR"*')
+        self.assertEqual(fts_query(" - "), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
 import unittest
 
-from rename_rules import extract_index_with_pair
+from rename_rules import (
+    apply_compiled_remove_rules,
+    apply_remove_rules,
+    compile_remove_rules,
+    extract_index_with_pair,
+)
 
 
 class ExtractIndexWithPairTests(unittest.TestCase):
@@ -24,5 +29,20 @@ class ExtractIndexWithPairTests(unittest.TestCase):
         self.assertIsNone(extract_index_with_pair("[03] Stronger", "["))
 
 
+class RemoveRuleTests(unittest.TestCase):
+    def test_compiled_rules_match_uncompiled_rules(self):
+        rules = ["Downloader -", "", "  (Official  Video) "]
+        for smart_spaces in (True, False):
+            compiled = compile_remove_rules(rules, smart_spaces)
+            for name in ("Downloader - Song (Official Video)", "downloader-Song (Official  Video)"):
+                self.assertEqual(
+                    apply_compiled_remove_rules(name, compiled),
+                    apply_remove_rules(name, rules, smart_spaces),
+                )
+
+    def test_blank_rules_are_dropped(self):
+        self.assertEqual(compile_remove_rules(["", "  "], False), ())
+
+
 if __name__ == "__main__":
     unittest.main()
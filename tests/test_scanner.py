@@ -1,6 +1,10 @@
+import tempfile
 import unittest
+from pathlib import Path
+from unittest.mock import patch
 
-from services.scanner import ScanOptions, propose_filename
+from services.scanner import ScanOptions, propose_filename, scan_folder
+from track_table import TrackTable
 
 
 class ScannerTests(unittest.TestCase):
@@ -16,6 +20,30 @@ class ScannerTests(unittest.TestCase):
         self.assertEqual(proposed, "[Live] Song.flac")
         self.assertEqual(len(warnings), 1)
 
+    def test_scan_reports_progress_for_audio_files_only(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = Path(temp_dir)
+            for name in ("b.mp3", "a.flac", "notes.txt"):
+                (folder / name).write_bytes(b"not audio")
+            progress = []
+
+            items = scan_folder(folder, ScanOptions(), lambda done, total: progress.append((done, total)))
+
+            self.assertEqual([item.filename for item in items], ["a.flac", "b.mp3"])
+            self.assertEqual(progress, [(0, 2), (1, 2)])
+
+    def test_large_folders_are_read_into_a_track_table(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = Path(temp_dir)
+            for name in ("b.mp3", "a.flac"):
+                (folder / name).write_bytes(b"not audio")
+
+            with patch("services.scanner.TRACK_TABLE_MIN_ITEMS", 2):
+                items = scan_folder(folder, ScanOptions())
+
+            self.assertIsInstance(items, TrackTable)
+            self.assertEqual([item.filename for item in items], ["a.flac", "b.mp3"])
+
 
 if __name__ == "__main__":
     unittest.main()
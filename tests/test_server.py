@@ -0,0 +1,161 @@
+import http.client
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import unittest.mock
+import urllib.request
+from pathlib import Path
+
+import server
+from services.job_service import JobQueue
+
+
+FIXTURES = Path(__file__).parent.parent / "TestAlbum"
+STRONGER = "[03] SpotiDownloader.com - Stronger - Kanye West.mp3"
+FATHER = "helloExtra '9' SpotiDownloader.com - Father - Kanye West.flac"
+
+
+class JobServerTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        root = Path(temp_dir.name)
+        self.folder = root / "drop"
+        self.folder.mkdir()
+        for name in (STRONGER, FATHER):
+            shutil.copyfile(FIXTURES / name, self.folder / name)
+        settings = root / "settings.json"
+        settings.write_text(
+            json.dumps(
+                {"rule_presets": {"Default": {"remove_rules": ["SpotiDownloader.com - "], "track_markers": "[]"}}}
+            ),
+            encoding="utf-8",
+        )
+        jobs = JobQueue(max_workers=2)
+        self.server = server.JobServer(("127.0.0.1", 0), server.BatchRpc(jobs, settings, [root]))
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(jobs.shutdown)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.next_id = 0
+
+    def post(self, body: bytes) -> tuple[int, bytes]:
+        request = urllib.request.Request(
+            self.base_url + "/rpc",
+            data=body,
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read()
+
+    def rpc(self, method: str, **params) -> dict:
+        self.next_id += 1
+        body = json.dumps({"jsonrpc": "2.0", "method": method, "params": params, "id": self.next_id})
+        _status, data = self.post(body.encode("utf-8"))
+        response = json.loads(data)
+        self.assertEqual(response["id"], self.next_id)
+        return response
+
+    def events(self, job_id: str) -> list[dict]:
+        with urllib.request.urlopen(f"{self.base_url}/jobs/{job_id}/events", timeout=10) as response:
+            self.assertEqual(response.headers["Content-Type"], "application/x-ndjson")
+            return [json.loads(line) for line in response]
+
+    def run_job(self, method: str, **params) -> dict:
+        job_id = self.rpc(method, **params)["result"]["job"]
+        events = self.events(job_id)
+        self.assertEqual(events[-1]["state"], "done")
+        return self.rpc("result", job=job_id)["result"]
+
+    def test_scan_returns_compact_tracks(self):
+        result = self.run_job("scan", folder=str(self.folder))
+
+        tracks = {Path(track["path"]).name: track for track in result["tracks"]}
+        self.assertEqual(tracks[STRONGER]["proposed"], "[03] Stronger - Kanye West.mp3")
+        self.assertNotIn("pending", tracks[STRONGER])
+        self.assertNotIn("error", tracks[STRONGER])
+
+    def test_propose_then_apply(self):
+        plan = self.run_job("propose", folder=str(self.folder), track_numbers=True)["plan"]
+        plans = {Path(record["path"]).name: record for record in plan}
+        self.assertEqual(plans[STRONGER]["tags"], {"tracknumber": "03"})
+        self.assertTrue((self.folder / STRONGER).exists())
+
+        result = self.run_job("apply", folder=str(self.folder), track_numbers=True)
+
+        self.assertEqual(result["applied"], {"renamed": 2, "tagged": 1, "artwork": 0})
+        self.assertTrue((self.folder / "[03] Stronger - Kanye West.mp3").exists())
+
+    def test_events_stream_progress_until_the_job_finishes(self):
+        job_id = self.rpc("scan", folder=str(self.folder))["result"]["job"]
+
+        events = self.events(job_id)
+
+        self.assertEqual(events[-1]["state"], "done")
+        self.assertTrue(all(event["id"] == job_id for event in events))
+        self.assertEqual(self.rpc("status", job=job_id)["result"]["state"], "done")
+        self.assertIn(job_id, [job["id"] for job in self.rpc("jobs")["result"]])
+
+    def test_invalid_calls_return_json_rpc_errors(self):
+        self.assertEqual(self.rpc("missing")["error"]["code"], server.METHOD_NOT_FOUND)
+        self.assertEqual(self.rpc("scan")["error"]["code"], server.INVALID_PARAMS)
+        self.assertEqual(self.rpc("scan", folder="/")["error"]["code"], server.INVALID_PARAMS)
+        unknown_preset = self.rpc("scan", folder=str(self.folder), preset="Nope")
+        self.assertEqual(unknown_preset["error"]["code"], server.INVALID_PARAMS)
+        self.assertEqual(self.rpc("result", job="999")["error"]["code"], server.JOB_NOT_FOUND)
+        self.assertEqual(json.loads(self.post(b"{")[1])["error"]["code"], server.PARSE_ERROR)
+        string_flag = self.rpc("propose", folder=str(self.folder), titles="false")
+        self.assertEqual(string_flag["error"]["code"], server.INVALID_PARAMS)
+
+    def test_a_root_is_required(self):
+        for host in ("127.0.0.1", "0.0.0.0"):
+            with self.subTest(host=host), self.assertRaises(SystemExit), unittest.mock.patch("sys.stderr"):
+                server.main(["--host", host, "--port", "0"])
+        self.assertTrue(server.is_loopback("localhost"))
+        self.assertTrue(server.is_loopback("::1"))
+        self.assertFalse(server.is_loopback("192.168.1.5"))
+
+    def raw_post(self, headers: dict[str, str], body: bytes = b"{}") -> int:
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=10)
+        self.addCleanup(connection.close)
+        connection.putrequest("POST", "/rpc", skip_host="Host" in headers)
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        connection.endheaders(body)
+        return connection.getresponse().status
+
+    def test_requests_a_web_page_could_make_are_refused(self):
+        json_type = {"Content-Type": "application/json", "Content-Length": "2"}
+        self.assertEqual(self.raw_post({"Content-Type": "text/plain", "Content-Length": "2"}), 415)
+        self.assertEqual(self.raw_post({**json_type, "Origin": "http://evil.example"}), 403)
+        self.assertEqual(self.raw_post({**json_type, "Host": "evil.example:8765"}), 403)
+        self.assertEqual(self.raw_post({**json_type, "Origin": "http://localhost:3000"}), 200)
+        self.assertEqual(self.raw_post({"Content-Type": "application/json", "Content-Length": "x"}), 400)
+        self.assertEqual(self.raw_post({"Content-Type": "application/json", "Content-Length": "-1"}), 400)
+
+    def test_folders_outside_the_roots_are_refused(self):
+        rpc = server.BatchRpc(self.server.jobs)
+        with self.assertRaises(server.RpcError):
+            rpc._folder(str(self.folder))
+
+    def test_batches_and_notifications(self):
+        batch = [
+            {"jsonrpc": "2.0", "method": "presets", "id": 1},
+            {"jsonrpc": "2.0", "method": "presets"},
+        ]
+        _status, data = self.post(json.dumps(batch).encode("utf-8"))
+        self.assertEqual(
+            json.loads(data),
+            [{"jsonrpc": "2.0", "result": {"active": "Default", "names": ["Default"]}, "id": 1}],
+        )
+
+        status, data = self.post(json.dumps(batch[1]).encode("utf-8"))
+        self.assertEqual((status, data), (204, b""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import ArtworkData, TrackItem
+from services.session import EditError, EditSummary, Session
+from tag_service import TagNormalizer
+
+
+def make_item(filename: str, **tags: str) -> TrackItem:
+    return TrackItem(path=Path(filename), filename=filename, ext=".mp3", proposed_filename=filename, tags=tags)
+
+
+class SessionTests(unittest.TestCase):
+    def setUp(self):
+        self.items = [
+            make_item("[01] Intro - Artist.mp3", album="Album"),
+            make_item("[02] Song - Artist.mp3"),
+            make_item("Bonus.mp3", tracknumber="9"),
+        ]
+        self.session = Session(self.items)
+        self.events = []
+        self.session.items.subscribe(lambda item, field, _old, _new: self.events.append((item.filename, field)))
+
+    def test_set_tag_counts_items_that_already_had_the_value(self):
+        summary = self.session.set_tag("album", " Album ")
+
+        self.assertEqual(summary, EditSummary("album", changed=2, unchanged=1))
+        self.assertEqual([item.effective_tag("album") for item in self.items], ["Album"] * 3)
+        self.assertEqual(len(self.events), 2)
+
+    def test_empty_value_is_refused_without_changes(self):
+        with self.assertRaises(EditError) as raised:
+            self.session.set_tag("album", "  ")
+
+        self.assertEqual(raised.exception.title, "Empty value")
+        self.assertEqual(self.events, [])
+
+    def test_edits_only_touch_the_given_items(self):
+        summary = self.session.erase_tag("album", self.items[:1])
+
+        self.assertEqual(summary.changed, 1)
+        self.assertEqual(self.items[0].effective_tag("album"), "")
+        self.assertEqual(self.session.reset_tag("album").changed, 1)
+        self.assertEqual(self.items[0].effective_tag("album"), "Album")
+
+    def test_extract_tag_skips_names_without_a_match(self):
+        summary = self.session.extract_tag_from_filenames("artist", " - ", "")
+
+        self.assertEqual(summary, EditSummary("artist", changed=2, skipped=1, unmatched=("Bonus.mp3",)))
+        self.assertEqual(self.items[1].pending_tags, {"artist": "Artist"})
+
+    def test_extract_tag_requires_a_boundary(self):
+        with self.assertRaises(EditError):
+            self.session.extract_tag_from_filenames("artist", "", "")
+
+    def test_filename_pattern_sets_every_field_in_one_pass(self):
+        summary = self.session.extract_fields_from_filenames("[{track}] {title} - {artist}")
+
+        self.assertEqual(summary.field, "tracknumber, title, artist")
+        self.assertEqual((summary.changed, summary.unmatched), (2, ("Bonus.mp3",)))
+        self.assertEqual(self.items[0].pending_tags, {"tracknumber": "01", "title": "Intro", "artist": "Artist"})
+        self.assertEqual(self.session.extract_fields_from_filenames("[{track}] {*}").unchanged, 2)
+
+    def test_invalid_filename_pattern_is_refused(self):
+        for pattern in ("", "{title}{artist}", "{mood}"):
+            with self.assertRaises(EditError):
+                self.session.extract_fields_from_filenames(pattern)
+        self.assertEqual(self.events, [])
+
+    def test_normalize_tags_reports_each_field(self):
+        self.items[0].tags.update(artist="artist ft guest", genre="Rock")
+
+        summaries = {summary.field: summary for summary in self.session.normalize_tags(TagNormalizer())}
+
+        self.assertEqual(summaries["artist"], EditSummary("artist", changed=1, skipped=2))
+        self.assertEqual(summaries["genre"], EditSummary("genre", unchanged=1, skipped=2))
+        self.assertEqual(self.items[0].pending_tags, {"artist": "Artist feat. Guest"})
+        with self.assertRaises(EditError):
+            self.session.normalize_tags(TagNormalizer([]))
+
+    def test_import_tags_sets_changed_values_and_reports_unknown_rows(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "tags.jsonl"
+            path.write_text(
+                '{"path": "Bonus.mp3", "tags": {"tracknumber": "9", "title": "Bonus"}}\n'
+                f'{{"path": "{Path("[02] Song - Artist.mp3").resolve().as_posix()}", "tags": {{"album": ""}}}}\n'
+                '{"path": "Gone.mp3", "tags": {"title": "Gone"}}\n'
+                "not json\n",
+                encoding="utf-8",
+            )
+            summary = self.session.import_tags(path)
+
+        self.assertEqual(
+            summary, EditSummary("tags", changed=1, unchanged=1, skipped=2, unmatched=("Gone.mp3", "line 4"))
+        )
+        self.assertEqual(self.items[2].pending_tags, {"title": "Bonus"})
+        self.assertEqual(self.items[1].pending_tags, {})
+        with self.assertRaises(EditError):
+            self.session.import_tags(Path("tags.txt"))
+
+    def test_number_tracks_follows_the_given_order(self):
+        summary = self.session.number_tracks(reversed(self.items))
+
+        self.assertEqual(summary.applied, 3)
+        self.assertEqual([item.effective_tag("tracknumber") for item in self.items], ["03", "02", "01"])
+
+    def test_track_numbers_from_filenames_keeps_existing_numbers(self):
+        summary = self.session.track_numbers_from_filenames(" [] ")
+
+        self.assertEqual(summary, EditSummary("tracknumber", changed=2, skipped=1))
+        self.assertEqual([item.effective_tag("tracknumber") for item in self.items], ["01", "02", "9"])
+        with self.assertRaises(EditError):
+            self.session.track_numbers_from_filenames("[")
+
+    def test_titles_from_filenames(self):
+        summary = self.session.titles_from_filenames(self.items[2:])
+
+        self.assertEqual(summary.changed, 1)
+        self.assertEqual(self.items[2].pending_tags, {"title": "Bonus"})
+
+    def test_artwork_edits_and_clear_changes(self):
+        artwork = ArtworkData(b"jpg", "image/jpeg")
+
+        self.assertEqual(self.session.set_artwork(artwork).changed, 3)
+        self.assertEqual(self.session.set_artwork(artwork).unchanged, 3)
+        self.assertEqual(self.session.remove_artwork(self.items[:1]).changed, 1)
+        self.session.set_tag("genre", "Rock", self.items[1:2])
+
+        summary = self.session.clear_changes()
+
+        self.assertEqual(summary.changed, 3)
+        self.assertTrue(all(not item.pending_tags and not item.artwork_change_pending for item in self.items))
+        self.assertEqual(self.session.reset_artwork().unchanged, 3)
+
+    def test_load_replaces_the_collection(self):
+        old = self.session.items
+        items = self.session.load([make_item("new.mp3")])
+
+        self.assertIsNot(items, old)
+        self.assertEqual(len(self.session.items), 1)
+
+    def test_remove_paths_keeps_the_other_items_edits(self):
+        self.session.set_tag("genre", "Rock", self.items[1:])
+
+        removed = self.session.remove_paths([self.items[2].path, Path("gone.mp3")])
+
+        self.assertEqual(removed, [self.items[2]])
+        self.assertEqual(list(self.session.items), self.items[:2])
+        self.assertEqual(self.items[1].effective_tag("genre"), "Rock")
+        self.events.clear()
+        self.items[2].set_pending_tag("genre", "Pop")
+        self.assertEqual(self.events, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
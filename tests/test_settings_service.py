@@ -1,8 +1,19 @@
+import json
 import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
-from services.settings_service import AppSettings, RulePreset, load_settings, save_settings
+from services.settings_service import (
+    AppSettings,
+    ArtworkSettings,
+    RulePreset,
+    SettingsSaver,
+    compile_preset,
+    load_settings,
+    preset_digest,
+    save_settings,
+)
 
 
 class SettingsServiceTests(unittest.TestCase):
@@ -24,8 +35,13 @@ class SettingsServiceTests(unittest.TestCase):
                         remove_rules=["Prefix -", "- Copy"],
                         delimiter_pair="()",
                         track_markers="%%",
+                        validation_rules=["title_missing", "genre_whitelist"],
+                        genre_whitelist=["Rock", "Hip-Hop"],
+                        filename_pattern="{track} {title} - {artist}",
+                        normalize_steps=["spaces", "genre"],
                     ),
                 },
+                artwork=ArtworkSettings(normalize=True, max_edge=800, jpeg_quality=75),
             )
 
             save_settings(expected, path)
@@ -73,6 +89,124 @@ class SettingsServiceTests(unittest.TestCase):
             path.write_text('{"theme": "Neon"}', encoding="utf-8")
             self.assertEqual(load_settings(path).theme, "Light")
 
+    def test_invalid_artwork_settings_fall_back_to_defaults(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "settings.json"
+            path.write_text(
+                '{"artwork": {"normalize": true, "max_edge": -5, "jpeg_quality": 200}}',
+                encoding="utf-8",
+            )
+
+            artwork = load_settings(path).artwork
+
+            self.assertTrue(artwork.normalize)
+            self.assertEqual(artwork.max_edge, ArtworkSettings().max_edge)
+            self.assertEqual(artwork.jpeg_quality, ArtworkSettings().jpeg_quality)
+
+            path.write_text('{"artwork": {"max_edge": 0}}', encoding="utf-8")
+            self.assertEqual(load_settings(path).artwork.max_edge, ArtworkSettings().max_edge)
+
+    def test_version_2_file_loads(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "settings.json"
+            path.write_text(
+                json.dumps(
+                    {
+                        "version": 2,
+                        "theme": "Dark",
+                        "active_preset": "Live",
+                        "rule_presets": {"Default": {}, "Live": {"remove_rules": ["(Live)"]}},
+                    }
+                ),
+                encoding="utf-8",
+            )
+
+            settings = load_settings(path)
+
+            self.assertEqual(settings.version, 2)
+            self.assertEqual(settings.active_rules().remove_rules, ["(Live)"])
+
+    def test_failed_save_keeps_previous_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "settings.json"
+            save_settings(AppSettings(theme="Dark"), path)
+
+            with patch("services.settings_service.os.replace", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    save_settings(AppSettings(theme="Light"), path)
+
+            self.assertEqual(load_settings(path).theme, "Dark")
+            self.assertEqual([entry.name for entry in Path(temp_dir).iterdir()], ["settings.json"])
+
+
+class SettingsSaverTests(unittest.TestCase):
+    def test_requests_are_written_once_on_flush(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "settings.json"
+            saver = SettingsSaver(path)
+            settings = AppSettings()
+            saver.request(settings)
+            settings.theme = "Dark"
+            saver.request(settings)
+
+            self.assertFalse(path.exists())
+            self.assertTrue(saver.flush())
+            self.assertFalse(saver.pending)
+            self.assertEqual(load_settings(path).theme, "Dark")
+            self.assertFalse(saver.flush())
+
+    def test_unchanged_settings_are_not_rewritten(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            saver = SettingsSaver(Path(temp_dir) / "settings.json")
+            saver.request(AppSettings())
+            saver.flush()
+
+            saver.request(AppSettings())
+            with patch("services.settings_service._write_atomically") as write:
+                self.assertFalse(saver.flush())
+            write.assert_not_called()
+
+    def test_failed_write_stays_pending(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "settings.json"
+            saver = SettingsSaver(path)
+            saver.request(AppSettings(theme="Dark"))
+            with patch("services.settings_service.os.replace", side_effect=OSError("locked")):
+                with self.assertRaises(OSError):
+                    saver.flush()
+
+            self.assertTrue(saver.pending)
+            self.assertTrue(saver.flush())
+            self.assertEqual(load_settings(path).theme, "Dark")
+
+
+class CompiledPresetTests(unittest.TestCase):
+    def test_presets_with_equal_content_share_one_compiled_preset(self):
+        first = RulePreset(remove_rules=["Prefix -"], genre_whitelist=["Rock"])
+        second = RulePreset(remove_rules=["Prefix -"], genre_whitelist=["Rock"])
+
+        self.assertEqual(preset_digest(first), preset_digest(second))
+        self.assertIs(compile_preset(first), compile_preset(second))
+
+    def test_edited_preset_compiles_again(self):
+        preset = RulePreset(remove_rules=["Prefix -"])
+        compiled = compile_preset(preset)
+        preset.remove_rules = ["Other"]
+
+        recompiled = compile_preset(preset)
+
+        self.assertNotEqual(recompiled.digest, compiled.digest)
+        self.assertEqual(recompiled.remove_rules[0].pattern, "Other")
+
+    def test_validation_rules_are_built_per_call(self):
+        compiled = compile_preset(RulePreset(validation_rules=["title_missing"]))
+
+        first = compiled.build_validation_rules()
+        second = compiled.build_validation_rules()
+
+        self.assertEqual([rule.name for rule in first], ["title_missing"])
+        self.assertIsNot(first[0], second[0])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative import time of gui, in microseconds. Importing it currently takes
+# well under 100 ms; the budget leaves room for slow machines and cold caches.
+GUI_IMPORT_BUDGET_US = 400_000
+
+# Loaded on first use, never by opening the window.
+DEFERRED_MODULES = ("mutagen", "PIL", "ctypes", "concurrent.futures", "base64")
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Cumulative -X importtime microseconds of every module a fresh interpreter loads."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self_time, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+class StartupImportTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.times = import_times("gui")
+
+    def test_gui_import_does_not_load_deferred_modules(self):
+        for module in DEFERRED_MODULES:
+            loaded = [name for name in self.times if name == module or name.startswith(module + ".")]
+            self.assertEqual(loaded, [], f"{module} is imported at startup")
+
+    def test_gui_import_stays_within_budget(self):
+        self.assertLess(self.times["gui"], GUI_IMPORT_BUDGET_US)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,19 +1,49 @@
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
 
+from mutagen.id3 import ID3, TPE1
+from mutagen.mp4 import MP4Tags
+
+from audio_utils import load_audio
 from models import TrackItem
 from tag_service import (
+    SCANNED_TAG_KEYS,
+    FilenamePatternError,
+    TagNormalizer,
+    TagValueError,
     apply_pending_tags,
+    compile_filename_pattern,
     extract_tag_value_from_filename,
     read_supported_tags,
+    standardize_feat,
+    title_case,
     title_from_filename,
 )
 
 
+FIXTURES = Path(__file__).parent.parent / "TestAlbum"
+ROUND_TRIP_VALUES = {
+    "title": "Father",
+    "albumartist": "Kanye West",
+    "artist": "Kanye West",
+    "album": "Bully",
+    "date": "2025",
+    "genre": "Hip-Hop",
+    "tracknumber": "9/12",
+}
+
+
 class FakeAudio(dict):
     pass
 
 
+class FakeNativeAudio:
+    def __init__(self, tags):
+        self.tags = tags
+
+
 class TagServiceTests(unittest.TestCase):
     def make_item(self):
         return TrackItem(
@@ -84,5 +114,158 @@ class TagServiceTests(unittest.TestCase):
         self.assertEqual(title_from_filename("I.Wonder.flac"), "I.Wonder")
 
 
+class FilenamePatternTests(unittest.TestCase):
+    def test_pattern_captures_each_field(self):
+        pattern = compile_filename_pattern("{tracknumber} - {artist} - {title}")
+
+        self.assertEqual(
+            pattern.match("3 - Kanye West - Stronger.mp3"),
+            {"tracknumber": "03", "artist": "Kanye West", "title": "Stronger"},
+        )
+        self.assertIsNone(pattern.match("Kanye West - Stronger.mp3"))
+
+    def test_labels_wildcards_and_literal_braces(self):
+        pattern = compile_filename_pattern("{{{Track #}}} {*} - {Title}")
+
+        self.assertEqual(pattern.fields, ("tracknumber", "title"))
+        self.assertEqual(pattern.match("{7}  SpotiDownloader.com - Father.flac"), {"tracknumber": "07", "title": "Father"})
+
+    def test_invalid_patterns_are_rejected(self):
+        for source in ("{title}{artist}", "{mood}", "{title", "{title} {title}", "no fields"):
+            with self.subTest(source=source), self.assertRaises(FilenamePatternError):
+                compile_filename_pattern(source)
+
+
+
+class TagNormalizerTests(unittest.TestCase):
+    def test_title_case_keeps_small_words_and_mixed_case(self):
+        self.assertEqual(title_case("back in black"), "Back in Black")
+        self.assertEqual(title_case("the end of the road"), "The End of the Road")
+        self.assertEqual(title_case("don't stop (feat. AC/DC)"), "Don't Stop (feat. AC/DC)")
+        self.assertEqual(title_case("iPhone at 2am"), "iPhone at 2am")
+
+    def test_feat_variants_are_standardized(self):
+        for value in ("Artist ft Guest", "Artist Ft. Guest", "Artist featuring Guest", "Artist FEAT.Guest"):
+            self.assertEqual(standardize_feat(value), "Artist feat. Guest")
+        self.assertEqual(standardize_feat("Soft Left"), "Soft Left")
+        self.assertEqual(standardize_feat("Song (Ft Guest)"), "Song (feat. Guest)")
+
+    def test_feat_as_an_ordinary_word_is_kept(self):
+        for value in ("Feat of Strength", "Ft. Lauderdale", "Artist ft", "Song (feat)"):
+            self.assertEqual(standardize_feat(value), value)
+
+    def test_steps_run_per_field(self):
+        normalizer = TagNormalizer()
+
+        self.assertEqual(normalizer.normalize("artist", "kanye  west ft jay-z"), "Kanye West feat. Jay-Z")
+        self.assertEqual(normalizer.normalize("title", "Cafe\u0301"), "Caf\u00e9")
+        self.assertEqual(normalizer.normalize("genre", "hip hop; rnb;  shoegaze"), "Hip-Hop; R&B; shoegaze")
+        self.assertEqual(normalizer.normalize("date", " 2026 "), "2026")
+        self.assertEqual(normalizer.normalize("tracknumber", " 3 "), " 3 ")
+
+    def test_only_chosen_steps_run_and_whitelist_spellings_win(self):
+        normalizer = TagNormalizer(["genre"], genres=["Hip Hop"])
+
+        self.assertEqual(normalizer.keys, ("genre",))
+        self.assertEqual(normalizer.normalize("genre", "HIP-HOP"), "Hip Hop")
+        self.assertEqual(normalizer.normalize("title", "lower  case"), "lower  case")
+        with self.assertRaises(ValueError):
+            TagNormalizer(["shout"])
+
+
+class NativeTagMappingTests(unittest.TestCase):
+    def make_item(self, path: Path):
+        return TrackItem(path=path, filename=path.name, ext=path.suffix, proposed_filename=path.name)
+
+    def round_trip(self, fixture_name: str):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / fixture_name
+            shutil.copyfile(FIXTURES / fixture_name, path)
+            item = self.make_item(path)
+            for key, value in ROUND_TRIP_VALUES.items():
+                item.set_pending_tag(key, value)
+
+            audio, _error = load_audio(str(path), easy=False)
+            apply_pending_tags(audio, item)
+            audio.save()
+
+            native, _error = load_audio(str(path), easy=False)
+            easy, _error = load_audio(str(path))
+            self.assertEqual(read_supported_tags(native), ROUND_TRIP_VALUES)
+            self.assertEqual(read_supported_tags(easy), ROUND_TRIP_VALUES)
+
+            item.clear_pending_tags()
+            item.erase_tag("genre")
+            apply_pending_tags(native, item)
+            native.save()
+            reloaded, _error = load_audio(str(path), easy=False)
+            self.assertEqual(read_supported_tags(reloaded)["genre"], "")
+            self.assertEqual(read_supported_tags(reloaded)["album"], "Bully")
+
+    def test_mp3_fixture_round_trips_through_id3_frames(self):
+        self.round_trip("helloExtra-9-Bully.mp3")
+
+    def test_flac_fixture_round_trips_through_vorbis_comments(self):
+        self.round_trip("helloExtra '9' SpotiDownloader.com - King - Kanye West - Copy.flac")
+
+    def test_multi_value_id3_frame_keeps_every_value(self):
+        tags = ID3()
+        tags.add(TPE1(encoding=3, text=["First", "Second"]))
+
+        values = read_supported_tags(FakeNativeAudio(tags))
+
+        self.assertEqual(values["artist"], "First; Second")
+        self.assertEqual(values["title"], "")
+
+    def test_mp4_atoms_map_track_numbers(self):
+        audio = FakeNativeAudio(MP4Tags())
+        item = self.make_item(Path("song.m4a"))
+        item.set_pending_tag("title", "Song")
+        item.set_pending_tag("tracknumber", "3/12")
+
+        apply_pending_tags(audio, item)
+
+        self.assertEqual(audio.tags["\xa9nam"], ["Song"])
+        self.assertEqual(audio.tags["trkn"], [(3, 12)])
+        tags = read_supported_tags(audio)
+        self.assertEqual(set(tags), set(SCANNED_TAG_KEYS))
+        self.assertEqual(tags["tracknumber"], "3/12")
+
+    def test_non_numeric_mp4_track_number_is_refused_before_writing(self):
+        audio = FakeNativeAudio(MP4Tags())
+        for value in ("A1", "1/x"):
+            item = self.make_item(Path("song.m4a"))
+            item.set_pending_tag("title", "Song")
+            item.set_pending_tag("tracknumber", value)
+            with self.subTest(value=value), self.assertRaises(TagValueError):
+                apply_pending_tags(audio, item)
+            self.assertNotIn("\xa9nam", audio.tags)
+
+    def test_joined_values_are_written_as_separate_values(self):
+        id3 = FakeNativeAudio(ID3())
+        mp4 = FakeNativeAudio(MP4Tags())
+        item = self.make_item(Path("song.mp3"))
+        item.set_pending_tag("artist", "First; Second")
+        item.set_pending_tag("tracknumber", "1")
+
+        apply_pending_tags(id3, item)
+        apply_pending_tags(mp4, item)
+
+        self.assertEqual(id3.tags["TPE1"].text, ["First", "Second"])
+        self.assertEqual(mp4.tags["\xa9ART"], ["First", "Second"])
+        self.assertEqual(read_supported_tags(id3)["artist"], "First; Second")
+
+    def test_single_value_fields_are_not_split(self):
+        audio = FakeNativeAudio(ID3())
+        item = self.make_item(Path("song.mp3"))
+        item.set_pending_tag("title", "Song; Part 2")
+        item.set_pending_tag("genre", "Rock; Pop")
+
+        apply_pending_tags(audio, item)
+
+        self.assertEqual(audio.tags["TIT2"].text, ["Song; Part 2"])
+        self.assertEqual(audio.tags["TCON"].genres, ["Rock", "Pop"])
+
+
 if __name__ == "__main__":
     unittest.main()
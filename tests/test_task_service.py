@@ -0,0 +1,99 @@
+import threading
+import time
+import unittest
+
+from services.task_service import ResourceBusy, TaskCancelled, TaskRunner
+
+
+def poll_until(runner: TaskRunner, condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("task did not finish")
+        runner.poll()
+        time.sleep(0.005)
+
+
+class TaskRunnerTests(unittest.TestCase):
+    def setUp(self):
+        self.runner = TaskRunner(max_workers=2)
+        self.addCleanup(self.runner.shutdown)
+
+    def test_result_is_delivered_on_polling_thread(self):
+        results = []
+        self.runner.submit(
+            "Add",
+            lambda _context: 1 + 2,
+            on_done=lambda value: results.append((value, threading.current_thread())),
+        )
+        poll_until(self.runner, lambda: results)
+        self.assertEqual(results, [(3, threading.current_thread())])
+
+    def test_only_latest_progress_is_delivered_per_poll(self):
+        progress = []
+        done = []
+
+        def work(context):
+            for step in range(5):
+                context.progress(step, 5)
+            return "ok"
+
+        self.runner.submit(
+            "Count",
+            work,
+            on_done=done.append,
+            on_progress=lambda step, total, _message: progress.append((step, total)),
+        )
+        time.sleep(0.2)
+        poll_until(self.runner, lambda: done)
+        self.assertEqual(progress, [])  # The task finished before the first poll.
+        self.assertEqual(done, ["ok"])
+
+    def test_cancelled_task_stops_at_next_progress_report(self):
+        started = threading.Event()
+        release = threading.Event()
+        cancelled = []
+        steps = []
+
+        def work(context):
+            started.set()
+            release.wait(5)
+            for step in range(100):
+                context.progress(step, 100)
+                steps.append(step)
+
+        task = self.runner.submit("Loop", work, on_cancelled=lambda: cancelled.append(True))
+        started.wait(5)
+        task.cancel()
+        release.set()
+        poll_until(self.runner, lambda: cancelled)
+        self.assertEqual(steps, [])
+        self.assertRaises(TaskCancelled, task.token.raise_if_cancelled)
+
+    def test_resources_are_exclusive_until_result_is_delivered(self):
+        release = threading.Event()
+        follow_up = []
+
+        def start_follow_up(_value):
+            follow_up.append(self.runner.submit("Scan again", lambda _context: None, ("tracks",)))
+
+        scan = self.runner.submit("Scan", lambda _context: release.wait(5), ("tracks",), on_done=start_follow_up)
+        with self.assertRaises(ResourceBusy) as raised:
+            self.runner.submit("Apply", lambda _context: None, ("tracks", "filenames"))
+        self.assertIs(raised.exception.holder, scan)
+        self.assertIsNone(self.runner.holder("filenames"))
+
+        release.set()
+        poll_until(self.runner, lambda: follow_up)
+        self.assertIs(self.runner.holder("tracks"), follow_up[0])
+
+    def test_errors_go_to_error_callback(self):
+        errors = []
+        self.runner.submit("Fail", lambda _context: 1 / 0, on_error=errors.append)
+        poll_until(self.runner, lambda: errors)
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+        self.assertEqual(self.runner.running(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+from models import ArtworkData
+from services.thumbnail_service import ThumbnailCache, ThumbnailLoader, make_thumbnail
+
+
+FIXTURES = Path(__file__).parent.parent / "TestAlbum"
+
+
+def make_png(width: int, height: int) -> bytes:
+    output = BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(output, format="PNG")
+    return output.getvalue()
+
+
+class ThumbnailCacheTests(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted_first(self):
+        cache = ThumbnailCache(max_bytes=10)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        cache.get("a")
+        cache.put("c", b"cccc")
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.memory_usage(), 8)
+
+    def test_replacing_an_entry_updates_memory_usage(self):
+        cache = ThumbnailCache()
+        cache.put("a", b"aaaa")
+        cache.put("a", b"aa")
+        self.assertEqual(cache.memory_usage(), 2)
+
+
+class ThumbnailLoaderTests(unittest.TestCase):
+    def setUp(self):
+        self.loader = ThumbnailLoader()
+
+    def tearDown(self):
+        self.loader.shutdown()
+
+    def test_thumbnail_fits_requested_size(self):
+        with Image.open(BytesIO(make_thumbnail(make_png(900, 300), size=120))) as image:
+            self.assertEqual(image.size, (120, 40))
+
+    def test_same_artwork_is_decoded_once(self):
+        artwork = ArtworkData(make_png(400, 400), "image/png", "cover.png", "digest")
+        with patch("services.thumbnail_service.make_thumbnail", return_value=b"png") as decode:
+            first = self.loader.request(Path("a.mp3"), artwork).result()
+            second = self.loader.request(Path("b.mp3"), artwork).result()
+
+        self.assertEqual(first, b"png")
+        self.assertEqual(second, b"png")
+        decode.assert_called_once()
+
+    def test_embedded_artwork_is_loaded_from_file_once(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "song.mp3"
+            shutil.copyfile(FIXTURES / "helloExtra-9-Bully.mp3", path)
+
+            self.assertIsNotNone(self.loader.request(path).result())
+            with patch("services.thumbnail_service.extract_embedded_artwork") as extract:
+                self.assertIsNotNone(self.loader.request(path).result())
+            extract.assert_not_called()
+
+    def test_file_without_artwork_resolves_to_none(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "song.flac"
+            shutil.copyfile(FIXTURES / "helloExtra '9' SpotiDownloader.com - Father - Kanye West.flac", path)
+
+            self.assertIsNone(self.loader.request(path).result())
+            self.assertTrue(self.loader.request(path).done())
+
+    def test_remembered_embedded_digests_are_bounded(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [Path(temp_dir) / f"{number}.mp3" for number in range(3)]
+            for path in paths:
+                path.write_bytes(b"not audio")
+
+            with (
+                patch("services.thumbnail_service.EMBEDDED_DIGEST_LIMIT", 2),
+                patch("services.thumbnail_service.extract_embedded_artwork", return_value=None) as extract,
+            ):
+                for path in paths + [paths[2], paths[0]]:
+                    self.assertIsNone(self.loader.request(path).result())
+
+            # The last file was still remembered; the first had been evicted and was read again.
+            self.assertEqual(extract.call_count, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,17 @@
+import copy
 import unittest
+from dataclasses import fields, replace
 from pathlib import Path
 
-from models import ArtworkData, TrackItem
+from models import (
+    ARTWORK_FIELD,
+    FILENAME_FIELD,
+    REMOVED_FIELD,
+    ArtworkData,
+    TrackCollection,
+    TrackItem,
+    intern_tag_values,
+)
 from warning_service import get_duplicate_track_ids, get_warnings, normalize_track_id
 
 
@@ -117,6 +127,111 @@ class TrackItemWarningTests(unittest.TestCase):
         item.reset_pending_artwork()
         self.assertEqual(item.effective_artwork_status(), "Embedded")
 
+    def test_repeated_album_values_are_interned(self):
+        first = intern_tag_values({"album": "".join(["Al", "bum"]), "title": "Song"})
+        second = intern_tag_values({"album": "".join(["Alb", "um"]), "title": "Song"})
+        self.assertIs(first["album"], second["album"])
+
+    def test_track_item_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.make_item(), "__dict__"))
+
+
+class TrackChangeTests(unittest.TestCase):
+    def make_collection(self, *items):
+        changes = []
+        collection = TrackCollection(items)
+        collection.subscribe(lambda item, field, old, new: changes.append((item, field, old, new)))
+        return collection, changes
+
+    def make_item(self, **overrides):
+        values = {"path": Path("song.mp3"), "filename": "song.mp3", "ext": ".mp3", "proposed_filename": "song.mp3"}
+        values.update(overrides)
+        return TrackItem(**values)
+
+    def test_tag_edits_emit_effective_old_and_new_values(self):
+        item = self.make_item(tags={"title": "Old"})
+        _collection, changes = self.make_collection(item)
+
+        item.set_pending_tag("title", "New")
+        item.reset_pending_tag("title")
+        item.erase_tag("album")
+
+        self.assertEqual(changes, [(item, "title", "Old", "New"), (item, "title", "New", "Old")])
+
+    def test_unchanged_values_emit_nothing_and_stay_clean(self):
+        item = self.make_item(tags={"title": "Same"})
+        _collection, changes = self.make_collection(item)
+
+        item.set_pending_tag("title", "Same")
+        item.reset_pending_artwork()
+        item.set_proposed_filename("song.mp3", [])
+
+        self.assertEqual(changes, [])
+        self.assertFalse(item.is_dirty)
+
+    def test_artwork_and_filename_changes_are_reported(self):
+        item = self.make_item()
+        _collection, changes = self.make_collection(item)
+
+        item.set_pending_artwork(ArtworkData(b"cover", "image/jpeg"))
+        item.set_proposed_filename("Song.mp3", [])
+
+        self.assertEqual(
+            changes,
+            [(item, ARTWORK_FIELD, "None", "Pending"), (item, FILENAME_FIELD, "song.mp3", "Song.mp3")],
+        )
+
+    def test_dirty_fields_track_changes_until_marked_clean(self):
+        first = self.make_item()
+        second = self.make_item(filename="second.mp3")
+        collection, _changes = self.make_collection(first, second)
+
+        first.set_pending_tag("tracknumber", "01")
+        first.erase_artwork()
+
+        self.assertEqual(first.dirty_fields, {"tracknumber", ARTWORK_FIELD})
+        self.assertEqual(collection.dirty_items(), [first])
+        collection.mark_clean()
+        self.assertEqual(collection.dirty_items(), [])
+
+    def test_reordered_items_keep_reporting_changes(self):
+        first = self.make_item()
+        second = self.make_item(filename="second.mp3")
+        collection, changes = self.make_collection(first, second)
+
+        collection.swap(0, 1)
+        second.set_pending_tag("title", "Moved")
+
+        self.assertEqual(list(collection), [second, first])
+        self.assertEqual(changes, [(second, "title", "", "Moved")])
+
+    def test_replaced_and_removed_items_stop_reporting(self):
+        first = self.make_item()
+        second = self.make_item(filename="second.mp3")
+        replacement = self.make_item(filename="third.mp3")
+        collection, changes = self.make_collection(first, second)
+
+        collection[0] = replacement
+        removed = collection.remove([second])
+        first.set_pending_tag("title", "Gone")
+        second.set_pending_tag("title", "Gone")
+        replacement.set_pending_tag("title", "New")
+
+        self.assertEqual(removed, [second])
+        self.assertEqual(list(collection), [replacement])
+        self.assertEqual(changes, [(second, REMOVED_FIELD, None, None), (replacement, "title", "", "New")])
+
+    def test_bookkeeping_is_not_a_field_and_is_not_copied(self):
+        item = self.make_item()
+        _collection, _changes = self.make_collection(item)
+        item.set_pending_tag("title", "New")
+
+        self.assertNotIn("_listener", [field.name for field in fields(item)])
+        for copied in (replace(item), copy.copy(item)):
+            self.assertEqual(copied, item)
+            self.assertIsNone(copied._listener)
+            self.assertFalse(copied.is_dirty)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,154 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from models import ArtworkData, TrackCollection, TrackItem
+from services.session import EditSummary, Session
+from services.rename_service import execute_renames, plan_renames
+from track_table import TrackTable
+from warning_service import ValidationIndex, get_duplicate_track_keys, get_warnings
+
+
+def make_item(number: int, **overrides) -> TrackItem:
+    values = {
+        "path": Path("Album") / f"{number:02d} Song.mp3",
+        "filename": f"{number:02d} Song.mp3",
+        "ext": ".mp3",
+        "proposed_filename": "Song.mp3",
+        "artist_first": "Artist",
+        "tags": {"title": "Song", "album": "Album", "tracknumber": str(number)},
+    }
+    values.update(overrides)
+    return TrackItem(**values)
+
+
+class TrackTableTests(unittest.TestCase):
+    def test_rows_expose_scanned_values(self):
+        item = make_item(3, read_error="Broken", audio_ok=False, artwork_present=True)
+        row = TrackTable([item])[0]
+
+        self.assertEqual(row.path, item.path)
+        self.assertEqual(row.filename, item.filename)
+        self.assertEqual(row.proposed_filename, "Song.mp3")
+        self.assertEqual(row.ext, ".mp3")
+        self.assertFalse(row.audio_ok)
+        self.assertEqual(row.read_error, "Broken")
+        self.assertEqual(row.tags, item.tags)
+        self.assertEqual(row.effective_artwork_status(), "Embedded")
+
+    def test_pending_overlay_matches_track_item_behaviour(self):
+        item = make_item(1)
+        row = TrackTable([make_item(1)])[0]
+        for track in (item, row):
+            track.set_pending_tag("album", "New Album")
+            track.erase_tag("title")
+            track.set_pending_tag("genre", "Rock")
+            track.reset_pending_tag("genre")
+
+        for key in ("title", "album", "genre", "tracknumber"):
+            self.assertEqual(row.effective_tag(key), item.effective_tag(key))
+        self.assertEqual(row.pending_tags, item.pending_tags)
+
+        row.clear_pending_tags()
+        self.assertEqual(row.effective_tag("album"), "Album")
+        self.assertEqual(row.pending_tags, {})
+
+    def test_rows_follow_the_track_item_change_contract(self):
+        item = make_item(1)
+        row = TrackTable([make_item(1)])[0]
+        events = {}
+        for track in (item, row):
+            collection = TrackCollection([track])
+            log = events[type(track)] = []
+            collection.subscribe(lambda changed, field, old, new, log=log: log.append((field, old, new)))
+            results = [
+                track.set_pending_tag("album", "New Album"),
+                track.set_pending_tag("album", "New Album"),
+                track.reset_pending_tag("album"),
+                track.erase_tag("title"),
+                track.clear_pending_tags(),
+                track.set_pending_artwork(ArtworkData(b"cover", "image/jpeg")),
+                track.reset_pending_artwork(),
+                track.reset_pending_artwork(),
+            ]
+            track.set_proposed_filename("Other.mp3", [])
+            self.assertEqual(results, [True, False, True, True, True, True, True, False])
+            self.assertEqual(track.dirty_fields, {"album", "title", "artwork", "filename"})
+            self.assertEqual(collection.dirty_items(), [track])
+            collection.mark_clean()
+            self.assertFalse(track.is_dirty)
+        self.assertEqual(events[TrackItem], events[type(row)])
+
+    def test_session_counts_row_edits(self):
+        table = TrackTable([make_item(1), make_item(2)])
+        session = Session(table)
+
+        self.assertEqual(session.set_tag("album", "Album"), EditSummary("album", changed=0, unchanged=2))
+        self.assertEqual(session.set_tag("genre", "Rock", [table[0]]), EditSummary("genre", changed=1))
+
+    def test_artwork_overlay(self):
+        row = TrackTable([make_item(1)])[0]
+        row.set_pending_artwork(ArtworkData(b"cover", "image/jpeg"))
+        self.assertEqual(row.effective_artwork_status(), "Pending")
+        row.erase_artwork()
+        self.assertEqual(row.effective_artwork_status(), "Remove")
+        row.reset_pending_artwork()
+        self.assertEqual(row.effective_artwork_status(), "None")
+
+    def test_repeated_values_are_stored_once(self):
+        table = TrackTable([make_item(number) for number in range(1, 50)])
+        self.assertLess(len(table._pool.values), 60)
+        self.assertEqual(set(table._folders.values), {"", "Album"})
+
+    def test_rows_work_with_validation_and_renames(self):
+        items = [make_item(1), make_item(1)]
+        table = TrackTable(items)
+        index = ValidationIndex(list(table))
+        duplicates = get_duplicate_track_keys(items)
+        self.assertEqual(index.warnings(table[0]), get_warnings(items[0], duplicate_track_keys=duplicates))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = Path(temp_dir)
+            row = table[0]
+            row.path = folder / row.filename
+            row.path.write_bytes(b"audio")
+            execute_renames(plan_renames(folder, [row]))
+
+            self.assertEqual(row.filename, "Song.mp3")
+            self.assertEqual(row.path, folder / "Song.mp3")
+            self.assertTrue((folder / "Song.mp3").exists())
+
+    def test_tag_views_are_live_and_read_only(self):
+        row = TrackTable([make_item(1)])[0]
+        tags = row.tags
+        pending = row.pending_tags
+
+        row.set_pending_tag("date", "2026")
+
+        self.assertEqual(pending, {"date": "2026"})
+        self.assertEqual(tags, {"title": "Song", "album": "Album", "tracknumber": "1"})
+        with self.assertRaises(TypeError):
+            tags["title"] = "Other"
+        with self.assertRaises(TypeError):
+            pending["date"] = "2027"
+
+    def test_scanned_state_can_be_updated(self):
+        row = TrackTable([make_item(1)])[0]
+
+        row.audio_ok = False
+        row.read_error = "Broken"
+        row.artwork_present = True
+
+        self.assertEqual((row.audio_ok, row.read_error, row.artwork_present), (False, "Broken", True))
+        row.audio_ok = True
+        row.read_error = None
+        row.artwork_present = False
+        self.assertEqual((row.audio_ok, row.read_error, row.artwork_present), (True, None, False))
+
+    def test_to_item_round_trips(self):
+        item = make_item(2, pending_tags={"date": "2026"}, validation_warnings=["Check"])
+        self.assertEqual(TrackTable([item]).to_item(0), item)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from pathlib import Path
+
+from models import TrackItem
+from track_view import SearchIndex, TrackView, natural_key
+
+
+def make_item(filename: str, **tags) -> TrackItem:
+    return TrackItem(path=Path(filename), filename=filename, ext=".mp3", proposed_filename=filename, tags=tags)
+
+
+def row_values(item: TrackItem) -> tuple[str, ...]:
+    return (item.filename, item.effective_tag("date"), item.effective_tag("tracknumber"))
+
+
+class NaturalKeyTests(unittest.TestCase):
+    def test_numbers_sort_numerically_and_case_is_ignored(self):
+        names = ["track 10", "Track 2", "track 1", "", "Track 1b"]
+        self.assertEqual(sorted(names, key=natural_key), ["", "track 1", "Track 1b", "Track 2", "track 10"])
+
+
+class SearchIndexTests(unittest.TestCase):
+    def test_every_query_word_must_match_a_token_substring(self):
+        index = SearchIndex()
+        index.update(1, "Song (Copy).mp3 Year missing")
+        index.update(2, "Song.mp3 2026")
+
+        self.assertEqual(index.search("copy"), {1})
+        self.assertEqual(index.search("SONG mp3"), {1, 2})
+        self.assertEqual(index.search("song 2026"), {2})
+        self.assertEqual(index.search("so"), {1, 2})
+        self.assertEqual(index.search("absent"), set())
+        self.assertIsNone(index.search("  "))
+
+    def test_updates_replace_previous_tokens(self):
+        index = SearchIndex()
+        index.update(1, "Year missing")
+        index.update(1, "2026")
+        self.assertEqual(index.search("missing"), set())
+        self.assertEqual(index.search("2026"), {1})
+        index.remove(1)
+        self.assertEqual(index.search("2026"), set())
+        self.assertEqual(index._postings, {})
+        self.assertEqual(index._grams, {})
+
+
+class TrackViewTests(unittest.TestCase):
+    def setUp(self):
+        self.items = [
+            make_item("b.mp3", tracknumber="10"),
+            make_item("a.mp3", tracknumber="2", date="2026"),
+            make_item("a copy.mp3", tracknumber="1"),
+        ]
+        self.view = TrackView(row_values)
+        self.view.reset(self.items)
+
+    def test_rows_follow_filter_and_natural_sort(self):
+        self.view.set_sort(2)
+        self.assertEqual(self.view.rows, [2, 1, 0])
+
+        self.view.set_filter("a")
+        self.assertEqual(self.view.rows, [2, 1])
+        self.assertTrue(self.view.is_filtered)
+
+        self.view.set_sort(2, descending=True)
+        self.assertEqual(self.view.rows, [1, 2])
+
+    def test_update_refreshes_index_and_cached_sort_keys(self):
+        self.view.set_sort(2)
+        self.view.set_filter("2026")
+        self.assertEqual(self.view.rows, [1])
+
+        self.items[0].set_pending_tag("date", "2026")
+        self.items[0].set_pending_tag("tracknumber", "01")
+        self.view.update([self.items[0]])
+
+        self.assertEqual(self.view.rows, [0, 1])
+
+    def test_rebuild_follows_reordered_items(self):
+        self.view.set_filter("a")
+        self.items[0], self.items[2] = self.items[2], self.items[0]
+        self.view.rebuild()
+        self.assertEqual(self.view.rows, [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
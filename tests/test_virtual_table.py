@@ -0,0 +1,125 @@
+import unittest
+
+from virtual_table import SELECTED_TAG, TableSelection, VirtualTable
+
+
+class FakeTree:
+    """Records the Treeview calls VirtualTable makes."""
+
+    def __init__(self):
+        self.rows: dict[str, tuple] = {}
+        self.tags: dict[str, tuple] = {}
+        self.bindings = {}
+        self.events = []
+        self.item_calls = 0
+
+    def configure(self, **options):
+        pass
+
+    def bind(self, sequence, callback):
+        self.bindings[sequence] = callback
+
+    def tag_configure(self, tag, **options):
+        pass
+
+    def insert(self, parent, index, iid):
+        self.rows[iid] = ()
+
+    def delete(self, iid):
+        del self.rows[iid]
+
+    def item(self, iid, values, tags):
+        self.rows[iid] = values
+        self.tags[iid] = tags
+        self.item_calls += 1
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def event_generate(self, sequence):
+        self.events.append(sequence)
+
+
+class TableSelectionTests(unittest.TestCase):
+    def test_extend_selects_range_from_anchor(self):
+        selection = TableSelection()
+        selection.click(5)
+        selection.extend(2)
+        self.assertEqual(selection.indices, {2, 3, 4, 5})
+        selection.extend(7)
+        self.assertEqual(selection.indices, {5, 6, 7})
+
+    def test_toggle_adds_and_removes_single_rows(self):
+        selection = TableSelection()
+        selection.click(1)
+        selection.toggle(4)
+        selection.toggle(1)
+        self.assertEqual(selection.indices, {4})
+
+    def test_move_cursor_clamps_to_rows(self):
+        selection = TableSelection()
+        self.assertEqual(selection.move_cursor(1, 10), 0)
+        self.assertEqual(selection.move_cursor(20, 10), 9)
+        self.assertEqual(selection.move_cursor(-2, 10, extend=True), 7)
+        self.assertEqual(selection.indices, {7, 8, 9})
+
+    def test_reset_drops_rows_past_the_end(self):
+        selection = TableSelection()
+        selection.set({1, 8}, cursor=8)
+        selection.reset(5)
+        self.assertEqual(selection.indices, {1})
+        self.assertIsNone(selection.cursor)
+
+
+class VirtualTableTests(unittest.TestCase):
+    def make_table(self, row_count=50_000, visible=10):
+        tree = FakeTree()
+        table = VirtualTable(tree, lambda index: (f"row {index}",), overscan=2)
+        table.visible = visible
+        table.set_row_count(row_count)
+        return tree, table
+
+    def test_only_visible_rows_and_overscan_are_materialized(self):
+        tree, table = self.make_table()
+        self.assertEqual(len(tree.rows), 12)
+        self.assertEqual(tree.rows["slot0"], ("row 0",))
+
+        table.yview("moveto", "0.5")
+
+        self.assertEqual(len(tree.rows), 12)
+        self.assertEqual(tree.rows["slot0"], ("row 25000",))
+
+    def test_refresh_rewrites_only_changed_slots(self):
+        tree, table = self.make_table()
+        calls = tree.item_calls
+        table.refresh()
+        self.assertEqual(tree.item_calls, calls)
+
+    def test_selection_survives_scrolling(self):
+        tree, table = self.make_table()
+        table.select([3, 40_000], cursor=3)
+        self.assertEqual(tree.tags["slot3"], (SELECTED_TAG,))
+
+        table.see(40_000)
+
+        self.assertEqual(table.selected_indices(), [3, 40_000])
+        self.assertEqual(tree.rows["slot9"], ("row 40000",))
+        self.assertEqual(tree.tags["slot9"], (SELECTED_TAG,))
+        self.assertEqual(tree.events, ["<<TreeviewSelect>>"])
+
+    def test_keyboard_navigation_scrolls_with_cursor(self):
+        tree, table = self.make_table(visible=5)
+        table.select([4], cursor=4)
+        tree.bindings["<Down>"](None)
+        tree.bindings["<Shift-Down>"](None)
+        self.assertEqual(table.selected_indices(), [5, 6])
+        self.assertEqual(table.first, 2)
+
+    def test_shrinking_row_count_removes_slots(self):
+        tree, table = self.make_table()
+        table.set_row_count(3)
+        self.assertEqual(sorted(tree.rows), ["slot0", "slot1", "slot2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+import random
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from models import TrackItem
+from warning_service import (
+    FILENAME_KEY,
+    MissingTagRule,
+    ValidationIndex,
+    ValidationOptions,
+    build_rules,
+    get_duplicate_track_ids,
+    get_duplicate_track_keys,
+    get_warnings,
+)
+
+
+COMPLETE_TAGS = {
+    "title": "Song",
+    "artist": "Artist",
+    "album": "Album",
+    "date": "2026",
+    "genre": "Rock",
+}
+
+
+def make_item(name: str, track: str) -> TrackItem:
+    return TrackItem(
+        path=Path(name),
+        filename=name,
+        ext=".mp3",
+        proposed_filename=name,
+        tags={**COMPLETE_TAGS, "tracknumber": track},
+    )
+
+
+class ValidationIndexTests(unittest.TestCase):
+    def test_initial_warnings_match_full_evaluation(self):
+        items = [make_item("a.mp3", "1"), make_item("b.mp3", "01"), make_item("c.mp3", "")]
+        index = ValidationIndex(items)
+
+        duplicates = get_duplicate_track_keys(items)
+        self.assertEqual(index.duplicate_track_ids(), get_duplicate_track_ids(items))
+        for item in items:
+            self.assertEqual(index.warnings(item), get_warnings(item, duplicate_track_keys=duplicates))
+
+    def test_edit_reports_only_rows_whose_warnings_changed(self):
+        items = [make_item(f"{number}.mp3", str(number)) for number in range(1, 6)]
+        index = ValidationIndex(items)
+
+        items[4].set_pending_tag("tracknumber", "2")
+        changed = index.update([items[4]])
+
+        self.assertCountEqual(changed, [items[1], items[4]])
+        self.assertEqual(index.warnings(items[1]), ["Duplicate Track #"])
+        self.assertEqual(index.duplicate_track_ids(), {"2"})
+
+    def test_resolving_a_duplicate_clears_the_other_row(self):
+        items = [make_item("a.mp3", "1"), make_item("b.mp3", "1"), make_item("c.mp3", "1")]
+        index = ValidationIndex(items)
+
+        items[2].set_pending_tag("tracknumber", "3")
+        self.assertEqual(index.update([items[2]]), [items[2]])
+
+        items[1].set_pending_tag("tracknumber", "2")
+        self.assertCountEqual(index.update([items[1]]), [items[0], items[1]])
+        self.assertEqual(index.duplicate_track_ids(), set())
+
+    def test_unchanged_edit_reports_nothing(self):
+        items = [make_item("a.mp3", "1")]
+        index = ValidationIndex(items)
+        items[0].set_pending_tag("genre", "Pop")
+        self.assertEqual(index.update(items), [])
+
+    def test_new_and_removed_items_update_duplicates(self):
+        first = make_item("a.mp3", "1")
+        index = ValidationIndex([first])
+        second = make_item("b.mp3", "1")
+
+        self.assertCountEqual(index.update([second]), [first, second])
+        self.assertEqual(index.remove([second]), [first])
+        self.assertEqual(index.warnings(first), [])
+
+    def test_track_numbers_only_collide_within_a_folder(self):
+        first = make_item("AlbumA/a.mp3", "1")
+        second = make_item("AlbumB/b.mp3", "1")
+        index = ValidationIndex([first, second])
+
+        self.assertEqual(index.duplicate_track_ids(), set())
+        self.assertEqual(get_duplicate_track_ids([first, second]), set())
+        self.assertEqual(index.warnings(first), [])
+
+        third = make_item("AlbumB/c.mp3", "01")
+        self.assertCountEqual(index.update([third]), [second, third])
+        self.assertEqual(index.duplicate_track_ids(), {"1"})
+        self.assertEqual(index.warnings(first), [])
+
+
+class ValidationRuleTests(unittest.TestCase):
+    def test_default_rules_match_get_warnings(self):
+        item = TrackItem(path=Path("a.mp3"), filename="a.mp3", ext=".mp3", proposed_filename="a.mp3")
+        index = ValidationIndex([item])
+        self.assertEqual(index.warnings(item), get_warnings(item))
+
+    def test_year_format_and_genre_whitelist(self):
+        item = make_item("a.mp3", "1")
+        item.set_pending_tag("date", "'99")
+        item.set_pending_tag("genre", "Polka")
+        rules = build_rules(
+            ["year_format", "genre_whitelist"],
+            ValidationOptions(genre_whitelist=("Rock", "hip-hop")),
+        )
+        index = ValidationIndex([item], rules)
+
+        self.assertEqual(index.warnings(item), ["Year is not a valid date", "Genre not in whitelist"])
+
+        item.set_pending_tag("date", "1999-04-01")
+        item.set_pending_tag("genre", "Hip-Hop")
+        self.assertEqual(index.update([item], {"date", "genre"}), [item])
+        self.assertEqual(index.warnings(item), [])
+
+    def test_title_filename_mismatch_follows_proposed_filename(self):
+        item = make_item("Song.mp3", "1")
+        index = ValidationIndex([item], build_rules(["title_filename"]))
+        self.assertEqual(index.warnings(item), [])
+
+        item.proposed_filename = "Other.mp3"
+        index.update([item], {FILENAME_KEY})
+        self.assertEqual(index.warnings(item), ["Title does not match filename"])
+
+    def test_album_artist_minority_is_flagged_within_album(self):
+        items = [make_item(f"{number}.mp3", str(number)) for number in range(1, 4)]
+        for item in items:
+            item.set_pending_tag("albumartist", "Kanye West")
+        items[2].set_pending_tag("albumartist", "Kanye")
+        index = ValidationIndex(items, build_rules(["albumartist_consistency"]))
+
+        self.assertEqual(index.warnings(items[2]), ["Album Artist differs from 2 other tracks"])
+        self.assertEqual(index.warnings(items[0]), [])
+
+        items[2].set_pending_tag("album", "Other Album")
+        index.update([items[2]], {"album"})
+        self.assertEqual(index.warnings(items[2]), [])
+
+    def test_only_rules_reading_edited_keys_are_rerun(self):
+        items = [make_item("a.mp3", "1")]
+        index = ValidationIndex(items)
+        with patch.object(MissingTagRule, "check", autospec=True, return_value=[]) as check:
+            index.update(items, {"tracknumber"})
+        check.assert_not_called()
+
+        with patch.object(MissingTagRule, "check", autospec=True, return_value=[]) as check:
+            index.update(items, {"genre"})
+        self.assertEqual(check.call_count, 1)
+
+
+class GroupConsistencyTests(unittest.TestCase):
+    def make_album(self, count: int, folder: str = "Album") -> list[TrackItem]:
+        items = []
+        for number in range(1, count + 1):
+            item = make_item(f"{number:02d}.mp3", str(number))
+            item.path = Path(folder) / item.filename
+            items.append(item)
+        return items
+
+    def test_minority_year_reports_majority_size(self):
+        items = self.make_album(12)
+        items[0].set_pending_tag("date", "2025")
+        index = ValidationIndex(items, build_rules(["date_consistency"]))
+
+        self.assertEqual(index.warnings(items[0]), ["Year differs from 11 other tracks"])
+        self.assertEqual(index.warnings(items[1]), [])
+
+    def test_groups_are_separated_by_folder(self):
+        items = self.make_album(3, "One") + self.make_album(1, "Two")
+        items[3].set_pending_tag("genre", "Jazz")
+        index = ValidationIndex(items, build_rules(["genre_consistency", "album_consistency"]))
+
+        self.assertTrue(all(index.warnings(item) == [] for item in items))
+
+    def test_edit_only_reports_rows_whose_message_changed(self):
+        items = self.make_album(10)
+        items[0].set_pending_tag("genre", "Jazz")
+        index = ValidationIndex(items, build_rules(["genre_consistency"]))
+
+        items[1].set_pending_tag("genre", "Pop")
+        changed = index.update([items[1]], {"genre"})
+
+        self.assertCountEqual(changed, [items[0], items[1]])
+        self.assertEqual(index.warnings(items[0]), ["Genre differs from 8 other tracks"])
+
+        items[1].reset_pending_tag("genre")
+        items[0].reset_pending_tag("genre")
+        self.assertCountEqual(index.update([items[0], items[1]], {"genre"}), [items[0], items[1]])
+        self.assertTrue(all(index.warnings(item) == [] for item in items))
+
+    def test_tied_values_are_not_flagged(self):
+        items = self.make_album(2)
+        items[0].set_pending_tag("date", "2025")
+        index = ValidationIndex(items, build_rules(["date_consistency"]))
+        self.assertEqual(index.warnings(items[0]), [])
+
+    def test_matches_full_rebuild_after_random_edits(self):
+        generator = random.Random(7)
+        items = self.make_album(60)
+        rules = ["album_consistency", "albumartist_consistency", "date_consistency", "genre_consistency"]
+        index = ValidationIndex(items, build_rules(rules))
+        for _edit in range(300):
+            item = generator.choice(items)
+            key = generator.choice(["album", "albumartist", "date", "genre"])
+            item.set_pending_tag(key, generator.choice(["A", "B", "C", ""]))
+            index.update([item], {key})
+        rebuilt = ValidationIndex(items, build_rules(rules))
+
+        for item in items:
+            self.assertEqual(index.warnings(item), rebuilt.warnings(item))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from services.watch_service import FolderWatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FolderWatcherTests(unittest.TestCase):
+    use_inotify = False
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.folder = Path(temp_dir.name)
+        (self.folder / "old.mp3").write_bytes(b"old")
+        self.clock = FakeClock()
+        self.watcher = FolderWatcher([self.folder], settle_seconds=2.0, use_inotify=self.use_inotify, clock=self.clock)
+        self.addCleanup(self.watcher.close)
+
+    def poll_at(self, seconds: float) -> dict[Path, list[Path]]:
+        self.clock.now = seconds
+        return self.watcher.poll()
+
+    def test_existing_files_are_not_reported(self):
+        self.assertEqual(self.poll_at(0), {})
+        self.assertEqual(self.poll_at(10), {})
+
+    def test_new_file_is_reported_once_it_settles(self):
+        (self.folder / "new.mp3").write_bytes(b"data")
+
+        self.assertEqual(self.poll_at(0), {})
+        self.assertEqual(self.poll_at(1), {})
+        self.assertEqual(self.poll_at(2), {self.folder: [self.folder / "new.mp3"]})
+        self.assertEqual(self.poll_at(10), {})
+
+    def test_growing_file_waits_until_writes_stop(self):
+        download = self.folder / "song.flac"
+        download.write_bytes(b"a")
+        self.poll_at(0)
+
+        with download.open("ab") as file:
+            file.write(b"more")
+        self.assertEqual(self.poll_at(3), {})
+        self.assertEqual(self.poll_at(4), {})
+        self.assertEqual(self.poll_at(5), {self.folder: [download]})
+
+    def test_empty_and_non_audio_files_are_not_reported(self):
+        (self.folder / "empty.mp3").write_bytes(b"")
+        (self.folder / "song.mp3.part").write_bytes(b"partial")
+
+        self.poll_at(0)
+        self.assertEqual(self.poll_at(10), {})
+
+    def test_files_arriving_together_are_batched_in_name_order(self):
+        for name in ("b.mp3", "A.flac", "c.m4a"):
+            (self.folder / name).write_bytes(b"data")
+
+        self.poll_at(0)
+        batch = self.poll_at(2)
+
+        self.assertEqual([path.name for path in batch[self.folder]], ["A.flac", "b.mp3", "c.m4a"])
+
+    def test_marked_files_are_not_reported(self):
+        (self.folder / "SpotiDownloader.com - new.mp3").write_bytes(b"data")
+        self.poll_at(0)
+        self.poll_at(2)
+
+        (self.folder / "SpotiDownloader.com - new.mp3").rename(self.folder / "new.mp3")
+        self.watcher.mark_done([self.folder / "new.mp3"])
+
+        self.assertEqual(self.poll_at(3), {})
+        self.assertEqual(self.poll_at(10), {})
+
+    def test_file_removed_before_it_settles_is_dropped(self):
+        (self.folder / "new.mp3").write_bytes(b"data")
+        self.poll_at(0)
+        (self.folder / "new.mp3").unlink()
+
+        self.assertEqual(self.poll_at(5), {})
+
+
+class InotifyFolderWatcherTests(FolderWatcherTests):
+    use_inotify = True
+
+    def setUp(self):
+        super().setUp()
+        if self.watcher.backend != "inotify":
+            self.skipTest("inotify is not available")
+
+
+class UnchangedFolderTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.folder = Path(temp_dir.name)
+        (self.folder / "old.mp3").write_bytes(b"old")
+        # Age the folder so its mtime can be trusted to change.
+        os.utime(self.folder, ns=(1_000_000_000, 1_000_000_000))
+
+    def test_polling_an_unchanged_folder_does_not_list_it(self):
+        with FolderWatcher([self.folder], use_inotify=False) as watcher:
+            with patch("services.watch_service.os.scandir") as scandir:
+                watcher.poll()
+                watcher.poll()
+
+        scandir.assert_not_called()
+
+    def test_inotify_does_not_touch_an_unchanged_folder(self):
+        with FolderWatcher([self.folder]) as watcher:
+            if watcher.backend != "inotify":
+                self.skipTest("inotify is not available")
+            with patch("services.watch_service.os.stat") as stat, patch("services.watch_service.os.scandir") as scandir:
+                watcher.poll()
+
+        stat.assert_not_called()
+        scandir.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
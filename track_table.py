@@ -0,0 +1,379 @@
+from array import array
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+from models import ARTWORK_FIELD, FILENAME_FIELD, ArtworkData, TrackItem
+from tag_service import SCANNED_TAG_KEYS
+
+
+# Scans at least this large are held in a TrackTable, which needs about a third of the memory.
+TRACK_TABLE_MIN_ITEMS = 20000
+
+_AUDIO_OK = 1
+_ARTWORK_PRESENT = 2
+
+
+class _ValuePool:
+    """Distinct strings stored once; columns hold their integer ids."""
+
+    __slots__ = ("values", "ids")
+
+    def __init__(self):
+        self.values = [""]
+        self.ids = {"": 0}
+
+    def add(self, value: str) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.ids[value] = value_id
+            self.values.append(value)
+        return value_id
+
+
+class TrackTable:
+    """Column-oriented track storage for very large scans.
+
+    Scanned tags live in array-backed columns of ids into a shared value pool.
+    Edits go to a small per-row overlay, so rows without pending changes cost
+    only their column slots. Rows are TrackRow views with the TrackItem API.
+    """
+
+    def __init__(self, items: list[TrackItem] = ()):
+        self._pool = _ValuePool()
+        self._folders = _ValuePool()
+        self._folder_ids = array("I")
+        self._filenames: list[str] = []
+        self._proposed: list[str | None] = []
+        self._flags = array("B")
+        self._ext_ids = array("I")
+        self._artist_first_ids = array("I")
+        self._tag_columns = {key: array("I") for key in SCANNED_TAG_KEYS}
+        # Sparse per-row state.
+        self._read_errors: dict[int, str] = {}
+        self._validation_warnings: dict[int, list[str]] = {}
+        self._extra_tags: dict[int, dict[str, str]] = {}
+        self._pending_tags: dict[int, dict[str, str]] = {}
+        self._pending_artwork: dict[int, ArtworkData | None] = {}
+        self._dirty: dict[int, set[str]] = {}
+        self._rows: list[TrackRow] = []
+        for item in items:
+            self.append(item)
+
+    def append(self, item: TrackItem) -> "TrackRow":
+        index = len(self._rows)
+        self._folder_ids.append(self._folders.add(str(item.path.parent)))
+        self._filenames.append(item.path.name)
+        self._proposed.append(None if item.proposed_filename == item.path.name else item.proposed_filename)
+        self._flags.append(
+            (_AUDIO_OK if item.audio_ok else 0) | (_ARTWORK_PRESENT if item.artwork_present else 0)
+        )
+        self._ext_ids.append(self._pool.add(item.ext))
+        self._artist_first_ids.append(self._pool.add(item.artist_first))
+        for key, column in self._tag_columns.items():
+            column.append(self._pool.add(item.tags.get(key, "")))
+        extra = {key: value for key, value in item.tags.items() if key not in self._tag_columns}
+        if extra:
+            self._extra_tags[index] = extra
+        if item.read_error:
+            self._read_errors[index] = item.read_error
+        if item.validation_warnings:
+            self._validation_warnings[index] = list(item.validation_warnings)
+        if item.pending_tags:
+            self._pending_tags[index] = dict(item.pending_tags)
+        if item.artwork_change_pending:
+            self._pending_artwork[index] = item.pending_artwork
+        if item.is_dirty:
+            self._dirty[index] = set(item.dirty_fields)
+        row = TrackRow(self, index)
+        self._rows.append(row)
+        return row
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index: int) -> "TrackRow":
+        return self._rows[index]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def to_item(self, index: int) -> TrackItem:
+        row = self._rows[index]
+        return TrackItem(
+            path=row.path,
+            filename=row.filename,
+            ext=row.ext,
+            proposed_filename=row.proposed_filename,
+            audio_ok=row.audio_ok,
+            read_error=row.read_error,
+            artist_first=row.artist_first,
+            tags=dict(row.tags),
+            pending_tags=dict(row.pending_tags),
+            validation_warnings=list(row.validation_warnings),
+            artwork_present=row.artwork_present,
+            pending_artwork=row.pending_artwork,
+            artwork_change_pending=row.artwork_change_pending,
+        )
+
+    def _scanned_tag(self, index: int, key: str) -> str:
+        column = self._tag_columns.get(key)
+        if column is not None:
+            return self._pool.values[column[index]]
+        return self._extra_tags.get(index, {}).get(key, "")
+
+    def _set_flag(self, index: int, flag: int, value: bool) -> None:
+        if value:
+            self._flags[index] |= flag
+        else:
+            self._flags[index] &= ~flag & 0xFF
+
+
+class _RowTags(Mapping):
+    """A row's scanned tags, read live from the table; empty values are left out."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: TrackTable, index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key: str) -> str:
+        value = self._table._scanned_tag(self._index, key)
+        if not value:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        table = self._table
+        for key in table._tag_columns:
+            if table._scanned_tag(self._index, key):
+                yield key
+        for key, value in table._extra_tags.get(self._index, {}).items():
+            if value:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _key in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class _RowPendingTags(Mapping):
+    """A row's pending tags, read live from the table; edited through the row's methods."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: TrackTable, index: int):
+        self._table = table
+        self._index = index
+
+    def _values(self) -> dict[str, str]:
+        return self._table._pending_tags.get(self._index, {})
+
+    def __getitem__(self, key: str) -> str:
+        return self._values()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values())
+
+    def __len__(self) -> int:
+        return len(self._values())
+
+    def __repr__(self) -> str:
+        return repr(self._values())
+
+
+class TrackRow:
+    """A row of a TrackTable, usable wherever a TrackItem is read or edited.
+
+    Its edit methods follow TrackItem's: they return whether the row changed,
+    report changes to _listener and keep the row dirty until mark_clean().
+    """
+
+    __slots__ = ("_table", "_index", "_listener")
+
+    def __init__(self, table: TrackTable, index: int):
+        self._table = table
+        self._index = index
+        self._listener = None
+
+    @property
+    def path(self) -> Path:
+        table = self._table
+        return Path(table._folders.values[table._folder_ids[self._index]]) / table._filenames[self._index]
+
+    @path.setter
+    def path(self, path: Path) -> None:
+        table = self._table
+        table._folder_ids[self._index] = table._folders.add(str(path.parent))
+        table._filenames[self._index] = path.name
+
+    @property
+    def filename(self) -> str:
+        return self._table._filenames[self._index]
+
+    @filename.setter
+    def filename(self, filename: str) -> None:
+        proposed = self.proposed_filename
+        self._table._filenames[self._index] = filename
+        self.proposed_filename = proposed
+
+    @property
+    def ext(self) -> str:
+        return self._table._pool.values[self._table._ext_ids[self._index]]
+
+    @property
+    def proposed_filename(self) -> str:
+        proposed = self._table._proposed[self._index]
+        return self.filename if proposed is None else proposed
+
+    @proposed_filename.setter
+    def proposed_filename(self, proposed_filename: str) -> None:
+        self._table._proposed[self._index] = None if proposed_filename == self.filename else proposed_filename
+
+    @property
+    def audio_ok(self) -> bool:
+        return bool(self._table._flags[self._index] & _AUDIO_OK)
+
+    @audio_ok.setter
+    def audio_ok(self, audio_ok: bool) -> None:
+        self._table._set_flag(self._index, _AUDIO_OK, audio_ok)
+
+    @property
+    def artwork_present(self) -> bool:
+        return bool(self._table._flags[self._index] & _ARTWORK_PRESENT)
+
+    @artwork_present.setter
+    def artwork_present(self, artwork_present: bool) -> None:
+        self._table._set_flag(self._index, _ARTWORK_PRESENT, artwork_present)
+
+    @property
+    def read_error(self) -> str | None:
+        return self._table._read_errors.get(self._index)
+
+    @read_error.setter
+    def read_error(self, read_error: str | None) -> None:
+        if read_error:
+            self._table._read_errors[self._index] = read_error
+        else:
+            self._table._read_errors.pop(self._index, None)
+
+    @property
+    def artist_first(self) -> str:
+        return self._table._pool.values[self._table._artist_first_ids[self._index]]
+
+    @property
+    def tags(self) -> Mapping[str, str]:
+        """The scanned tags; read-only, as they only change by scanning again."""
+        return _RowTags(self._table, self._index)
+
+    @property
+    def pending_tags(self) -> Mapping[str, str]:
+        """The pending tags; read-only, use set_pending_tag() and the other edit methods."""
+        return _RowPendingTags(self._table, self._index)
+
+    @property
+    def validation_warnings(self) -> list[str]:
+        return self._table._validation_warnings.get(self._index, [])
+
+    @validation_warnings.setter
+    def validation_warnings(self, warnings: list[str]) -> None:
+        if warnings:
+            self._table._validation_warnings[self._index] = warnings
+        else:
+            self._table._validation_warnings.pop(self._index, None)
+
+    @property
+    def pending_artwork(self) -> ArtworkData | None:
+        return self._table._pending_artwork.get(self._index)
+
+    @property
+    def artwork_change_pending(self) -> bool:
+        return self._index in self._table._pending_artwork
+
+    def effective_tag(self, key: str) -> str:
+        pending = self._table._pending_tags.get(self._index)
+        if pending is not None and key in pending:
+            return pending[key]
+        return self._table._scanned_tag(self._index, key)
+
+    def set_pending_tag(self, key: str, value: str) -> bool:
+        old = self.effective_tag(key)
+        self._table._pending_tags.setdefault(self._index, {})[key] = value
+        if old == value:
+            return False
+        self._changed(key, old, value)
+        return True
+
+    def erase_tag(self, key: str) -> bool:
+        return self.set_pending_tag(key, "")
+
+    def reset_pending_tag(self, key: str) -> bool:
+        pending = self._table._pending_tags.get(self._index)
+        if pending is None or key not in pending:
+            return False
+        old = pending.pop(key)
+        if not pending:
+            del self._table._pending_tags[self._index]
+        new = self._table._scanned_tag(self._index, key)
+        if old == new:
+            return False
+        self._changed(key, old, new)
+        return True
+
+    def clear_pending_tags(self) -> bool:
+        changed = False
+        for key in list(self.pending_tags):
+            changed = self.reset_pending_tag(key) or changed
+        return changed
+
+    def set_pending_artwork(self, artwork: ArtworkData) -> bool:
+        return self._set_artwork_state(artwork, True)
+
+    def erase_artwork(self) -> bool:
+        return self._set_artwork_state(None, True)
+
+    def reset_pending_artwork(self) -> bool:
+        return self._set_artwork_state(None, False)
+
+    def set_proposed_filename(self, proposed_filename: str, validation_warnings: list[str]) -> None:
+        old = self.proposed_filename
+        changed = old != proposed_filename or self.validation_warnings != validation_warnings
+        self.proposed_filename = proposed_filename
+        self.validation_warnings = validation_warnings
+        if changed:
+            self._changed(FILENAME_FIELD, old, proposed_filename)
+
+    @property
+    def dirty_fields(self) -> frozenset[str]:
+        return frozenset(self._table._dirty.get(self._index, ()))
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._index in self._table._dirty
+
+    def mark_clean(self) -> None:
+        self._table._dirty.pop(self._index, None)
+
+    def effective_artwork_status(self) -> str:
+        if self.artwork_change_pending:
+            return "Pending" if self.pending_artwork is not None else "Remove"
+        return "Embedded" if self.artwork_present else "None"
+
+    def _set_artwork_state(self, artwork: ArtworkData | None, change_pending: bool) -> bool:
+        if self.pending_artwork is artwork and self.artwork_change_pending == change_pending:
+            return False
+        old = self.effective_artwork_status()
+        if change_pending:
+            self._table._pending_artwork[self._index] = artwork
+        else:
+            self._table._pending_artwork.pop(self._index, None)
+        self._changed(ARTWORK_FIELD, old, self.effective_artwork_status())
+        return True
+
+    def _changed(self, field_name: str, old, new) -> None:
+        self._table._dirty.setdefault(self._index, set()).add(field_name)
+        if self._listener is not None:
+            self._listener(self, field_name, old, new)
@@ -0,0 +1,173 @@
+import re
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Sequence
+
+from models import TrackItem
+
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(text: str) -> tuple:
+    """Sort key that orders embedded numbers numerically: "Track 2" < "Track 10"."""
+    return tuple(
+        (0, int(part)) if part.isdigit() else (1, part)
+        for part in _DIGITS.split(text.casefold())
+        if part
+    )
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[start:start + 3] for start in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Word index for substring filtering over row text.
+
+    Each key maps to the casefolded whitespace-separated tokens of its text,
+    and every distinct token is indexed by its trigrams, so a query word is
+    matched against the token vocabulary instead of every row.
+    """
+
+    def __init__(self):
+        self._key_tokens: dict[int, frozenset[str]] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._grams: dict[str, set[str]] = defaultdict(set)
+
+    def clear(self) -> None:
+        self._key_tokens.clear()
+        self._postings.clear()
+        self._grams.clear()
+
+    def update(self, key: int, text: str) -> None:
+        tokens = frozenset(text.casefold().split())
+        old_tokens = self._key_tokens.get(key, frozenset())
+        if tokens == old_tokens:
+            return
+        for token in old_tokens - tokens:
+            self._discard(token, key)
+        for token in tokens - old_tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                for gram in _trigrams(token):
+                    self._grams[gram].add(token)
+            postings.add(key)
+        self._key_tokens[key] = tokens
+
+    def remove(self, key: int) -> None:
+        for token in self._key_tokens.pop(key, ()):
+            self._discard(token, key)
+
+    def search(self, query: str) -> set[int] | None:
+        """Keys whose text contains every query word; None for an empty query."""
+        words = query.casefold().split()
+        if not words:
+            return None
+        result: set[int] | None = None
+        # Longer words match fewer tokens, so they narrow the result fastest.
+        for word in sorted(set(words), key=len, reverse=True):
+            matched: set[int] = set()
+            for token in self._matching_tokens(word):
+                matched |= self._postings[token]
+            result = matched if result is None else result & matched
+            if not result:
+                return set()
+        return result
+
+    def _matching_tokens(self, word: str) -> list[str]:
+        if len(word) < 3:
+            candidates: Iterable[str] = self._postings
+        else:
+            gram_sets = sorted((self._grams.get(gram, set()) for gram in _trigrams(word)), key=len)
+            candidates = set.intersection(*gram_sets) if gram_sets[0] else ()
+        return [token for token in candidates if word in token]
+
+    def _discard(self, token: str, key: int) -> None:
+        postings = self._postings[token]
+        postings.discard(key)
+        if postings:
+            return
+        del self._postings[token]
+        for gram in _trigrams(token):
+            tokens = self._grams[gram]
+            tokens.discard(token)
+            if not tokens:
+                del self._grams[gram]
+
+
+class TrackView:
+    """The filtered and sorted order in which the table shows a list of items.
+
+    rows holds indices into items. Row text comes from row_values(item), the
+    same tuple the table displays; sort keys are computed per column on first
+    use and, like the search index, refreshed only for items passed to update().
+    """
+
+    def __init__(self, row_values: Callable[[TrackItem], Sequence[str]]):
+        self.row_values = row_values
+        self.items: Sequence[TrackItem] = ()
+        self.rows: list[int] = []
+        self.query = ""
+        self.sort_column: int | None = None
+        self.descending = False
+        self._index = SearchIndex()
+        self._matched: set[int] | None = None
+        # column -> id(item) -> natural_key of that cell.
+        self._sort_keys: dict[int, dict[int, tuple]] = {}
+
+    @property
+    def is_filtered(self) -> bool:
+        return self._matched is not None
+
+    @property
+    def is_sorted(self) -> bool:
+        return self.sort_column is not None
+
+    def reset(self, items: Sequence[TrackItem]) -> None:
+        self.items = items
+        self._index.clear()
+        self._sort_keys.clear()
+        for item in items:
+            self._index.update(id(item), " ".join(self.row_values(item)))
+        self._matched = self._index.search(self.query)
+        self.rebuild()
+
+    def update(self, items: Iterable[TrackItem]) -> None:
+        """Re-index items whose displayed values may have changed."""
+        for item in items:
+            self._index.update(id(item), " ".join(self.row_values(item)))
+            for keys in self._sort_keys.values():
+                keys.pop(id(item), None)
+        self._matched = self._index.search(self.query)
+        self.rebuild()
+
+    def set_filter(self, query: str) -> None:
+        self.query = query
+        self._matched = self._index.search(query)
+        self.rebuild()
+
+    def set_sort(self, column: int | None, descending: bool = False) -> None:
+        self.sort_column = column
+        self.descending = descending
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Recompute rows, e.g. after items were reordered."""
+        items = self.items
+        matched = self._matched
+        if matched is None:
+            rows = list(range(len(items)))
+        else:
+            rows = [index for index, item in enumerate(items) if id(item) in matched]
+        if self.sort_column is not None:
+            keys = self._column_keys(self.sort_column)
+            rows.sort(key=lambda index: keys[id(items[index])], reverse=self.descending)
+        self.rows = rows
+
+    def _column_keys(self, column: int) -> dict[int, tuple]:
+        keys = self._sort_keys.setdefault(column, {})
+        for item in self.items:
+            if id(item) not in keys:
+                keys[id(item)] = natural_key(self.row_values(item)[column])
+        return keys
@@ -0,0 +1,236 @@
+from collections.abc import Callable, Iterable
+from tkinter import ttk
+
+
+SELECTED_TAG = "selected"
+
+
+class TableSelection:
+    """Selected row indices plus the anchor and cursor of extended selection."""
+
+    def __init__(self):
+        self.indices: set[int] = set()
+        self.anchor: int | None = None
+        self.cursor: int | None = None
+
+    def reset(self, row_count: int) -> None:
+        """Drop indices that no longer exist after the row count changed."""
+        self.indices = {index for index in self.indices if index < row_count}
+        if self.anchor is not None and self.anchor >= row_count:
+            self.anchor = None
+        if self.cursor is not None and self.cursor >= row_count:
+            self.cursor = None
+
+    def set(self, indices: Iterable[int], cursor: int | None = None) -> None:
+        self.indices = set(indices)
+        self.anchor = self.cursor = cursor
+
+    def click(self, index: int) -> None:
+        self.set((index,), index)
+
+    def toggle(self, index: int) -> None:
+        self.indices ^= {index}
+        self.anchor = self.cursor = index
+
+    def extend(self, index: int) -> None:
+        if self.anchor is None:
+            self.anchor = index
+        low, high = sorted((self.anchor, index))
+        self.indices = set(range(low, high + 1))
+        self.cursor = index
+
+    def select_all(self, row_count: int) -> None:
+        self.indices = set(range(row_count))
+
+    def move_cursor(self, delta: int, row_count: int, extend: bool = False) -> int | None:
+        if row_count == 0:
+            return None
+        if self.cursor is None:
+            start = -1 if delta > 0 else row_count
+        else:
+            start = self.cursor
+        index = max(0, min(row_count - 1, start + delta))
+        if extend:
+            self.extend(index)
+        else:
+            self.click(index)
+        return index
+
+
+class VirtualTable:
+    """Drives a ttk.Treeview that only holds the rows currently in view.
+
+    The tree keeps one row per visible slot plus a small overscan, and
+    scrolling rewrites those slots from row_values(index) instead of inserting
+    rows, so the cost of a redraw does not depend on the number of rows.
+    Selection is kept here as row indices, covering rows that are not
+    materialized, and <<TreeviewSelect>> is generated on the tree when it changes.
+    """
+
+    def __init__(
+        self,
+        tree: ttk.Treeview,
+        row_values: Callable[[int], tuple[str, ...]],
+        overscan: int = 4,
+    ):
+        self.tree = tree
+        self.row_values = row_values
+        self.overscan = overscan
+        self.selection = TableSelection()
+        self.yscrollcommand: Callable[[float, float], None] | None = None
+        self.row_count = 0
+        self.first = 0
+        self.visible = 1
+        # Last (values, selected) written to each slot.
+        self._slots: list[tuple[tuple[str, ...], bool]] = []
+
+        tree.configure(selectmode="none")
+        tree.bind("<Configure>", self._on_configure)
+        tree.bind("<Button-1>", lambda event: self._on_click(event, self.selection.click))
+        tree.bind("<Control-Button-1>", lambda event: self._on_click(event, self.selection.toggle))
+        tree.bind("<Shift-Button-1>", lambda event: self._on_click(event, self.selection.extend))
+        tree.bind("<B1-Motion>", lambda event: self._on_click(event, self.selection.extend))
+        tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        tree.bind("<Button-4>", lambda _event: self._scroll_units(-3))
+        tree.bind("<Button-5>", lambda _event: self._scroll_units(3))
+        for sequence, delta in (
+            ("Up", -1),
+            ("Down", 1),
+            ("Prior", None),
+            ("Next", None),
+            ("Home", float("-inf")),
+            ("End", float("inf")),
+        ):
+            tree.bind(f"<{sequence}>", lambda _event, d=delta, s=sequence: self._on_key(d, s, False))
+            tree.bind(f"<Shift-{sequence}>", lambda _event, d=delta, s=sequence: self._on_key(d, s, True))
+        tree.bind("<Control-a>", lambda _event: self.select_all())
+
+    def set_selection_colors(self, background: str, foreground: str) -> None:
+        self.tree.tag_configure(SELECTED_TAG, background=background, foreground=foreground)
+
+    def set_row_count(self, row_count: int) -> None:
+        self.row_count = row_count
+        self.selection.reset(row_count)
+        self._scroll_to(self.first)
+
+    def refresh(self) -> None:
+        """Rewrite the visible slots whose values or selection changed."""
+        self._render()
+
+    def selected_indices(self) -> list[int]:
+        return sorted(self.selection.indices)
+
+    def select(self, indices: Iterable[int], cursor: int | None = None) -> None:
+        self.selection.set(indices, cursor)
+        if cursor is not None:
+            self.see(cursor)
+        self._render()
+        self._notify()
+
+    def select_all(self) -> str:
+        self.selection.select_all(self.row_count)
+        self._render()
+        self._notify()
+        return "break"
+
+    def see(self, index: int) -> None:
+        if index < self.first:
+            self._scroll_to(index)
+        elif index >= self.first + self.visible:
+            self._scroll_to(index - self.visible + 1)
+
+    def yview(self, *args) -> None:
+        """Scrollbar command: ("moveto", fraction) or ("scroll", count, "units"/"pages")."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self.row_count))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            self._scroll_units(count * self.visible if args[2] == "pages" else count)
+
+    def _scroll_units(self, count: int) -> str:
+        self._scroll_to(self.first + count)
+        return "break"
+
+    def _scroll_to(self, first: int) -> None:
+        self.first = max(0, min(first, self.row_count - self.visible))
+        self._render()
+        if self.yscrollcommand is not None:
+            if self.row_count:
+                self.yscrollcommand(
+                    self.first / self.row_count,
+                    min(1.0, (self.first + self.visible) / self.row_count),
+                )
+            else:
+                self.yscrollcommand(0.0, 1.0)
+
+    def _render(self) -> None:
+        slot_count = max(0, min(self.visible + self.overscan, self.row_count - self.first))
+        while len(self._slots) < slot_count:
+            self.tree.insert("", "end", iid=f"slot{len(self._slots)}")
+            self._slots.append(((), False))
+        while len(self._slots) > slot_count:
+            self._slots.pop()
+            self.tree.delete(f"slot{len(self._slots)}")
+        selected_indices = self.selection.indices
+        for slot, previous in enumerate(self._slots):
+            index = self.first + slot
+            state = (self.row_values(index), index in selected_indices)
+            if state != previous:
+                self.tree.item(
+                    f"slot{slot}",
+                    values=state[0],
+                    tags=(SELECTED_TAG,) if state[1] else (),
+                )
+                self._slots[slot] = state
+        # Overscan slots sit below the viewport; keep the tree scrolled to the top.
+        self.tree.yview_moveto(0)
+
+    def _notify(self) -> None:
+        self.tree.event_generate("<<TreeviewSelect>>")
+
+    def _on_configure(self, event) -> None:
+        row_height = 20
+        header_height = 24
+        if self._slots:
+            bbox = self.tree.bbox("slot0")
+            if bbox:
+                header_height, row_height = bbox[1], bbox[3]
+        self.visible = max(1, (event.height - header_height) // max(1, row_height))
+        self._scroll_to(self.first)
+
+    def _on_click(self, event, action: Callable[[int], None]) -> str | None:
+        if self.tree.identify_region(event.x, event.y) not in {"cell", "tree"}:
+            # Leave heading clicks and column resizing to the tree.
+            return None
+        iid = self.tree.identify_row(event.y)
+        if not iid:
+            return "break"
+        self.tree.focus_set()
+        index = self.first + int(iid.removeprefix("slot"))
+        if index >= self.row_count:
+            return "break"
+        if action == self.selection.extend and index == self.selection.cursor:
+            return "break"
+        action(index)
+        self.see(index)
+        self._render()
+        self._notify()
+        return "break"
+
+    def _on_mouse_wheel(self, event) -> str:
+        # Windows reports multiples of 120 per notch; macOS reports small deltas.
+        notches = event.delta // 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        return self._scroll_units(-3 * notches)
+
+    def _on_key(self, delta: float | None, sequence: str, extend: bool) -> str:
+        if delta is None:
+            delta = -self.visible if sequence == "Prior" else self.visible
+        delta = int(max(-self.row_count, min(self.row_count, delta)))
+        index = self.selection.move_cursor(delta, self.row_count, extend)
+        if index is not None:
+            self.see(index)
+            self._render()
+            self._notify()
+        return "break"
@@ -1,6 +1,15 @@
-from collections import Counter
+import re
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
 
-from models import TrackItem
+from models import FILENAME_FIELD, TrackItem
+from rename_rules import clean_spaces
+
+
+# Pseudo tag key for edits to proposed_filename and its validation warnings.
+FILENAME_KEY = FILENAME_FIELD
 
 
 def normalize_track_id(value: str) -> str:
@@ -10,26 +19,525 @@ def normalize_track_id(value: str) -> str:
     return track_id.casefold()
 
 
+# A track number within its folder: items opened from a library search span
+# several albums, and each album has its own track 1.
+TrackKey = tuple[Path, str]
+
+
+def get_duplicate_track_keys(items: list[TrackItem]) -> set[TrackKey]:
+    counts = Counter(key for item in items if (key := _indexed_track_key(item)) is not None)
+    return {key for key, count in counts.items() if count > 1}
+
+
 def get_duplicate_track_ids(items: list[TrackItem]) -> set[str]:
-    track_ids = [
-        normalize_track_id(item.effective_tag("tracknumber"))
-        for item in items
-        if item.audio_ok and item.effective_tag("tracknumber").strip()
-    ]
-    counts = Counter(track_ids)
-    return {track_id for track_id, count in counts.items() if count > 1}
+    """Track numbers used more than once within some folder.
+
+    The folders are not kept, so a number listed here may still be unique
+    in other folders; get_duplicate_track_keys says which folders.
+    """
+    return {track_id for _folder, track_id in get_duplicate_track_keys(items)}
+
+
+def _indexed_track_key(item: TrackItem) -> TrackKey | None:
+    track_number = item.effective_tag("tracknumber")
+    if not item.audio_ok or not track_number.strip():
+        return None
+    return item.path.parent, normalize_track_id(track_number)
+
+
+@dataclass(frozen=True)
+class ValidationOptions:
+    genre_whitelist: tuple[str, ...] = ()
+
+
+class ValidationRule:
+    """A check over the effective tags of a set of items.
+
+    keys names the tag keys the rule reads, so edits to other keys skip it.
+    Rules that compare items with each other keep their own index in reset()
+    and update(), which return the items whose result may have changed.
+    """
+
+    name = ""
+    label = ""
+    keys: frozenset[str] = frozenset()
+
+    def reset(self, items: Iterable[TrackItem]) -> None:
+        pass
+
+    def update(self, items: list[TrackItem]) -> list[TrackItem]:
+        return items
+
+    def remove(self, items: list[TrackItem]) -> list[TrackItem]:
+        return []
+
+    def check(self, item: TrackItem) -> list[str]:
+        raise NotImplementedError
+
+
+class MissingTagRule(ValidationRule):
+    def __init__(self, name: str, label: str, key: str, message: str):
+        self.name = name
+        self.label = label
+        self.key = key
+        self.keys = frozenset({key})
+        self.message = message
+
+    def check(self, item: TrackItem) -> list[str]:
+        return [] if item.effective_tag(self.key) else [self.message]
+
+
+class ContributingArtistRule(ValidationRule):
+    name = "artist_missing"
+    label = "Contributing Artist missing"
+    keys = frozenset({"artist"})
+
+    def check(self, item: TrackItem) -> list[str]:
+        return [] if item.effective_tag("artist") or item.artist_first else ["Contributing Artist missing"]
+
+
+def _track_number_warnings(
+    item: TrackItem,
+    duplicate_track_ids: Iterable[str] = (),
+    duplicate_track_keys: Iterable[TrackKey] = (),
+) -> list[str]:
+    track_number = item.effective_tag("tracknumber")
+    if not track_number:
+        return ["Track# missing"]
+    track_id = normalize_track_id(track_number)
+    if track_id in duplicate_track_ids or (item.path.parent, track_id) in duplicate_track_keys:
+        return ["Duplicate Track #"]
+    return []
+
+
+class TrackNumberRule(ValidationRule):
+    """Missing track numbers, and duplicates within a folder counted incrementally."""
+
+    name = "track_number"
+    label = "Track # missing or duplicated"
+    keys = frozenset({"tracknumber"})
+
+    def __init__(self):
+        self.reset(())
+
+    def reset(self, items: Iterable[TrackItem]) -> None:
+        self._track_keys: dict[int, TrackKey | None] = {}
+        self._members: defaultdict[TrackKey, dict[int, TrackItem]] = defaultdict(dict)
+        for item in items:
+            track_key = _indexed_track_key(item)
+            self._track_keys[id(item)] = track_key
+            if track_key is not None:
+                self._members[track_key][id(item)] = item
+        self.duplicates = {
+            track_key for track_key, members in self._members.items() if len(members) > 1
+        }
+
+    def update(self, items: list[TrackItem]) -> list[TrackItem]:
+        affected = {id(item): item for item in items}
+        for item in items:
+            key = id(item)
+            old_track_key = self._track_keys.get(key)
+            new_track_key = _indexed_track_key(item)
+            if old_track_key == new_track_key:
+                continue
+            self._track_keys[key] = new_track_key
+            if old_track_key is not None:
+                self._members[old_track_key].pop(key, None)
+                affected.update(self._sync_duplicate(old_track_key))
+            if new_track_key is not None:
+                self._members[new_track_key][key] = item
+                affected.update(self._sync_duplicate(new_track_key))
+        return list(affected.values())
+
+    def remove(self, items: list[TrackItem]) -> list[TrackItem]:
+        affected = {}
+        for item in items:
+            track_key = self._track_keys.pop(id(item), None)
+            if track_key is not None:
+                self._members[track_key].pop(id(item), None)
+                affected.update(self._sync_duplicate(track_key))
+        return list(affected.values())
+
+    def check(self, item: TrackItem) -> list[str]:
+        return _track_number_warnings(item, duplicate_track_keys=self.duplicates)
+
+    def _sync_duplicate(self, track_key: TrackKey) -> dict[int, TrackItem]:
+        members = self._members[track_key]
+        if not members:
+            del self._members[track_key]
+        is_duplicate = len(members) > 1
+        if is_duplicate == (track_key in self.duplicates):
+            return {}
+        if is_duplicate:
+            self.duplicates.add(track_key)
+        else:
+            self.duplicates.discard(track_key)
+        return members
+
+
+YEAR_PATTERN = re.compile(r"\d{4}(-\d{2}(-\d{2})?)?")
+
+
+class YearFormatRule(ValidationRule):
+    name = "year_format"
+    label = "Year must be YYYY or YYYY-MM-DD"
+    keys = frozenset({"date"})
+
+    def check(self, item: TrackItem) -> list[str]:
+        year = item.effective_tag("date").strip()
+        if not year or YEAR_PATTERN.fullmatch(year):
+            return []
+        return ["Year is not a valid date"]
+
+
+class GenreWhitelistRule(ValidationRule):
+    name = "genre_whitelist"
+    label = "Genre must be in the whitelist"
+    keys = frozenset({"genre"})
+
+    def __init__(self, genres: Iterable[str]):
+        self.genres = {genre.strip().casefold() for genre in genres if genre.strip()}
+
+    def check(self, item: TrackItem) -> list[str]:
+        genre = item.effective_tag("genre").strip()
+        if not self.genres or not genre or genre.casefold() in self.genres:
+            return []
+        return ["Genre not in whitelist"]
+
+
+class TitleFilenameRule(ValidationRule):
+    name = "title_filename"
+    label = "Title must appear in the filename"
+    keys = frozenset({"title", FILENAME_KEY})
+
+    def check(self, item: TrackItem) -> list[str]:
+        title = clean_spaces(item.effective_tag("title")).casefold()
+        if not title:
+            return []
+        stem = clean_spaces(Path(item.proposed_filename).stem).casefold()
+        return [] if title in stem else ["Title does not match filename"]
+
+
+def _folder_group(item: TrackItem) -> tuple:
+    return (item.path.parent,)
+
+
+def _album_group(item: TrackItem) -> tuple:
+    return (item.path.parent, item.effective_tag("album").strip().casefold())
+
+
+class GroupConsistencyRule(ValidationRule):
+    """Flags minority values of one tag within a group of tracks.
+
+    Members are indexed by group and value, so an edit only revisits the tracks
+    whose message can change: the edited ones and the minority of their groups.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        key: str,
+        field_label: str,
+        group_by: Callable[[TrackItem], tuple],
+        group_keys: frozenset[str] = frozenset(),
+    ):
+        self.name = name
+        self.label = f"{field_label} consistent within album"
+        self.key = key
+        self.keys = frozenset({key}) | group_keys
+        self.field_label = field_label
+        self.group_by = group_by
+        self.reset(())
+
+    def reset(self, items: Iterable[TrackItem]) -> None:
+        self._entries: dict[int, tuple[tuple, str] | None] = {}
+        self._members: defaultdict[tuple, defaultdict[str, dict[int, TrackItem]]] = defaultdict(
+            lambda: defaultdict(dict)
+        )
+        self._majorities: dict[tuple, tuple[str, int] | None] = {}
+        for item in items:
+            entry = self._entry(item)
+            self._entries[id(item)] = entry
+            if entry is not None:
+                self._members[entry[0]][entry[1]][id(item)] = item
+
+    def update(self, items: list[TrackItem]) -> list[TrackItem]:
+        affected = {id(item): item for item in items}
+        before = {}
+        for item in items:
+            old_entry = self._entries.get(id(item))
+            new_entry = self._entry(item)
+            if old_entry == new_entry:
+                continue
+            for entry in (old_entry, new_entry):
+                if entry is not None and entry[0] not in before:
+                    before[entry[0]] = self._majority(entry[0])
+            self._entries[id(item)] = new_entry
+            if old_entry is not None:
+                self._discard(old_entry, id(item))
+            if new_entry is not None:
+                self._members[new_entry[0]][new_entry[1]][id(item)] = item
+        self._collect_changed_groups(before, affected)
+        return list(affected.values())
+
+    def remove(self, items: list[TrackItem]) -> list[TrackItem]:
+        affected = {}
+        before = {}
+        for item in items:
+            entry = self._entries.pop(id(item), None)
+            if entry is None:
+                continue
+            if entry[0] not in before:
+                before[entry[0]] = self._majority(entry[0])
+            self._discard(entry, id(item))
+        self._collect_changed_groups(before, affected)
+        return list(affected.values())
+
+    def check(self, item: TrackItem) -> list[str]:
+        entry = self._entries.get(id(item))
+        if entry is None:
+            return []
+        majority = self._majority(entry[0])
+        if majority is None or entry[1] == majority[0]:
+            return []
+        return [f"{self.field_label} differs from {majority[1]} other tracks"]
+
+    def _entry(self, item: TrackItem) -> tuple[tuple, str] | None:
+        value = item.effective_tag(self.key).strip()
+        if not item.audio_ok or not value:
+            return None
+        return self.group_by(item), value
+
+    def _discard(self, entry: tuple[tuple, str], key: int) -> None:
+        group, value = entry
+        values = self._members[group]
+        values[value].pop(key, None)
+        if not values[value]:
+            del values[value]
+        if not values:
+            del self._members[group]
+
+    def _majority(self, group: tuple) -> tuple[str, int] | None:
+        """The most common value and its count, or None when there is no single majority."""
+        if group in self._majorities:
+            return self._majorities[group]
+        majority = None
+        values = self._members.get(group)
+        if values and len(values) > 1:
+            counts = sorted(((len(members), value) for value, members in values.items()), reverse=True)
+            (top_count, top_value), (runner_up_count, _value) = counts[0], counts[1]
+            if top_count > runner_up_count:
+                majority = (top_value, top_count)
+        self._majorities[group] = majority
+        return majority
+
+    def _collect_changed_groups(self, before: dict, affected: dict[int, TrackItem]) -> None:
+        for group, old_majority in before.items():
+            self._majorities.pop(group, None)
+            new_majority = self._majority(group)
+            if new_majority == old_majority:
+                continue
+            for value, members in self._members.get(group, {}).items():
+                majority_both_times = (
+                    old_majority is not None
+                    and new_majority is not None
+                    and value == old_majority[0] == new_majority[0]
+                )
+                if not majority_both_times:
+                    affected.update(members)
+
+
+RuleFactory = Callable[[ValidationOptions], ValidationRule]
+
+# Registration order is the order warnings are listed in.
+RULE_FACTORIES: dict[str, RuleFactory] = {}
+
+
+def register_rule(name: str, factory: RuleFactory) -> None:
+    RULE_FACTORIES[name] = factory
+
+
+register_rule("title_missing", lambda _options: MissingTagRule("title_missing", "Title missing", "title", "Title missing"))
+register_rule("artist_missing", lambda _options: ContributingArtistRule())
+register_rule("album_missing", lambda _options: MissingTagRule("album_missing", "Album missing", "album", "Album missing"))
+register_rule("year_missing", lambda _options: MissingTagRule("year_missing", "Year missing", "date", "Year missing"))
+register_rule("year_format", lambda _options: YearFormatRule())
+register_rule("genre_missing", lambda _options: MissingTagRule("genre_missing", "Genre missing", "genre", "Genre missing"))
+register_rule("genre_whitelist", lambda options: GenreWhitelistRule(options.genre_whitelist))
+register_rule("track_number", lambda _options: TrackNumberRule())
+register_rule("title_filename", lambda _options: TitleFilenameRule())
+register_rule(
+    "album_consistency",
+    lambda _options: GroupConsistencyRule("album_consistency", "album", "Album", _folder_group),
+)
+register_rule(
+    "albumartist_consistency",
+    lambda _options: GroupConsistencyRule(
+        "albumartist_consistency", "albumartist", "Album Artist", _album_group, frozenset({"album"})
+    ),
+)
+register_rule(
+    "date_consistency",
+    lambda _options: GroupConsistencyRule(
+        "date_consistency", "date", "Year", _album_group, frozenset({"album"})
+    ),
+)
+register_rule(
+    "genre_consistency",
+    lambda _options: GroupConsistencyRule(
+        "genre_consistency", "genre", "Genre", _album_group, frozenset({"album"})
+    ),
+)
+
+DEFAULT_RULE_NAMES = (
+    "title_missing",
+    "artist_missing",
+    "album_missing",
+    "year_missing",
+    "genre_missing",
+    "track_number",
+    "album_consistency",
+    "albumartist_consistency",
+    "date_consistency",
+    "genre_consistency",
+)
+
+
+def build_rules(
+    names: Iterable[str] = DEFAULT_RULE_NAMES,
+    options: ValidationOptions = ValidationOptions(),
+) -> list[ValidationRule]:
+    enabled = set(names)
+    return [factory(options) for name, factory in RULE_FACTORIES.items() if name in enabled]
+
+
+def rule_labels() -> dict[str, str]:
+    return {name: factory(ValidationOptions()).label for name, factory in RULE_FACTORIES.items()}
+
+
+def _read_failure_warnings(item: TrackItem) -> list[str]:
+    warnings = ["Failed to read as audio file/Could not read tags"]
+    if item.read_error:
+        warnings.append(item.read_error)
+    warnings.extend(item.validation_warnings)
+    return warnings
+
+
+class ValidationIndex:
+    """Evaluates validation rules in batch and keeps per-item warnings current.
+
+    update() re-runs only the rules whose keys were edited, for the edited
+    items plus any items a cross-item rule reports as affected, and returns
+    the items whose warnings actually changed.
+    """
+
+    def __init__(self, items: Iterable[TrackItem] = (), rules: list[ValidationRule] | None = None):
+        self.rules = build_rules() if rules is None else rules
+        self.reset(items)
+
+    def set_rules(self, rules: list[ValidationRule]) -> None:
+        self.rules = rules
+        self.reset(list(self._items.values()))
+
+    def reset(self, items: Iterable[TrackItem]) -> None:
+        items = list(items)
+        self._items: dict[int, TrackItem] = {id(item): item for item in items}
+        # Per rule: item id -> non-empty warning list.
+        self._results: list[dict[int, list[str]]] = []
+        for rule in self.rules:
+            rule.reset(items)
+            self._results.append(
+                {id(item): warnings for item in items if (warnings := rule.check(item))}
+            )
+        self._warnings = {id(item): self._compose(item) for item in items}
+
+    def update(self, items: Iterable[TrackItem], keys: Iterable[str] | None = None) -> list[TrackItem]:
+        """Re-validate edited items. keys limits which rules run; None runs all of them."""
+        items = list(items)
+        if not items:
+            return []
+        new_items = [item for item in items if id(item) not in self._items]
+        for item in new_items:
+            self._items[id(item)] = item
+        edited_keys = None if keys is None else frozenset(keys)
+
+        affected = {id(item): item for item in items}
+        for rule, results in zip(self.rules, self._results):
+            if edited_keys is not None and not new_items and rule.keys.isdisjoint(edited_keys):
+                continue
+            for item in rule.update(items):
+                affected[id(item)] = item
+                self._store(results, item, rule.check(item))
+        return self._recompose(affected.values())
+
+    def remove(self, items: Iterable[TrackItem]) -> list[TrackItem]:
+        """Drop items from the index and return remaining items whose warnings changed."""
+        items = [item for item in items if self._items.pop(id(item), None) is not None]
+        for item in items:
+            self._warnings.pop(id(item), None)
+        affected = {}
+        for rule, results in zip(self.rules, self._results):
+            for item in items:
+                results.pop(id(item), None)
+            for item in rule.remove(items):
+                if id(item) in self._items:
+                    affected[id(item)] = item
+                    self._store(results, item, rule.check(item))
+        return self._recompose(affected.values())
+
+    def warnings(self, item: TrackItem) -> list[str]:
+        return self._warnings.get(id(item), [])
+
+    def duplicate_track_keys(self) -> set[TrackKey]:
+        """(folder, track number) pairs used by more than one item."""
+        for rule in self.rules:
+            if isinstance(rule, TrackNumberRule):
+                return set(rule.duplicates)
+        return get_duplicate_track_keys(list(self._items.values()))
+
+    def duplicate_track_ids(self) -> set[str]:
+        """Track numbers duplicated within some folder; see get_duplicate_track_ids."""
+        return {track_id for _folder, track_id in self.duplicate_track_keys()}
+
+    @staticmethod
+    def _store(results: dict[int, list[str]], item: TrackItem, warnings: list[str]) -> None:
+        if warnings:
+            results[id(item)] = warnings
+        else:
+            results.pop(id(item), None)
+
+    def _compose(self, item: TrackItem) -> list[str]:
+        if not item.audio_ok:
+            return _read_failure_warnings(item)
+        warnings = list(item.validation_warnings)
+        key = id(item)
+        for results in self._results:
+            rule_warnings = results.get(key)
+            if rule_warnings:
+                warnings.extend(rule_warnings)
+        return warnings
+
+    def _recompose(self, items: Iterable[TrackItem]) -> list[TrackItem]:
+        changed = []
+        for item in items:
+            warnings = self._compose(item)
+            if warnings != self._warnings.get(id(item)):
+                self._warnings[id(item)] = warnings
+                changed.append(item)
+        return changed
 
 
 def get_warnings(
     item: TrackItem,
     duplicate_track_ids: set[str] | None = None,
+    *,
+    duplicate_track_keys: set[TrackKey] | None = None,
 ) -> list[str]:
+    """Every warning for item. duplicate_track_ids flag a track number in any
+    folder; duplicate_track_keys, as from get_duplicate_track_keys, only in its own.
+    """
     if not item.audio_ok:
-        warnings = ["Failed to read as audio file/Could not read tags"]
-        if item.read_error:
-            warnings.append(item.read_error)
-        warnings.extend(item.validation_warnings)
-        return warnings
+        return _read_failure_warnings(item)
 
     warnings = list(item.validation_warnings)
 
@@ -43,10 +551,6 @@ def get_warnings(
         warnings.append("Year missing")
     if not item.effective_tag("genre"):
         warnings.append("Genre missing")
-
-    if not item.effective_tag("tracknumber"):
-        warnings.append("Track# missing")
-    elif normalize_track_id(item.effective_tag("tracknumber")) in (duplicate_track_ids or set()):
-        warnings.append("Duplicate Track #")
+    warnings.extend(_track_number_warnings(item, duplicate_track_ids or (), duplicate_track_keys or ()))
 
     return warnings